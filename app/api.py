@@ -1,15 +1,173 @@
-from flask import Flask, request, jsonify
+from flask import Flask, g, request, jsonify
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+from itertools import chain
 from src.account_registry import AccountRegistry
 from src.personal_account import PersonalAccount
+from src.company_account import CompanyAccount
 from src.mongo_repository import MongoAccountsRepository
+from src.account_import import import_accounts, parse_csv_rows, parse_ndjson_rows
+from src.account_journal import AccountJournal
+from src.binary_snapshot import BinarySnapshot
+from src.nip_validator import mf_validator
+from src.company_registration import CompanyRegistrationQueue
+from src.email_dispatcher import EmailDispatcher
+from src.metrics import metrics
+from src.structured_logging import StructuredLogging
+from src.request_profiler import RequestProfiler
+import time
 
 app = Flask(__name__)
+# Logi JSON zapisywane w tle; poziom (BANK_LOG_LEVEL, "OFF" wyłącza) i próbkowanie tras
+# (BANK_LOG_SAMPLING, np. "GET /api/accounts=0.01,GET /api/accounts/count=0.1")
+logs = StructuredLogging(
+    os.environ.get("BANK_LOG_LEVEL", "INFO"),
+    StructuredLogging.parse_sampling(os.environ.get("BANK_LOG_SAMPLING", "")),
+)
+logs.start()
+atexit.register(logs.stop)
+request_log = logging.getLogger("bank.api")
 registry = AccountRegistry()
 mongo_repo = MongoAccountsRepository()
+# Dziennik zmian rejestru - włączany przez BANK_JOURNAL_DIR (tryb: BANK_JOURNAL_DURABILITY)
+journal = AccountJournal(
+    registry,
+    os.environ.get("BANK_JOURNAL_DIR"),
+    durability=os.environ.get("BANK_JOURNAL_DURABILITY", "group"),
+)
+# Binarny snapshot rejestru (BANK_SNAPSHOT_PATH) - przy starcie jest tylko mapowany
+# do pamięci, konta powstają przy pierwszym odwołaniu, a reszta w tle.
+# Snapshot dziennika ma pierwszeństwo: dziennik zapisuje każdą zmianę, a snapshot binarny
+# to stan z chwili zapisu - gdy dziennik ma snapshot, binarny nie jest podpinany.
+SNAPSHOT_PATH = os.environ.get("BANK_SNAPSHOT_PATH")
+if SNAPSHOT_PATH and os.path.exists(SNAPSHOT_PATH) and not journal.has_snapshot():
+    registry.attach_snapshot(BinarySnapshot(SNAPSHOT_PATH))
+    threading.Thread(target=registry.load_snapshot, daemon=True).start()
+journal.recover()
+# Konta firmowe są zakładane w tle (walidacja NIP w MF trwa); w toku może być najwyżej
+# BANK_COMPANY_MAX_PENDING zleceń - kolejne dostają 503 z Retry-After
+company_registrations = CompanyRegistrationQueue(
+    journal,
+    workers=int(os.environ.get("BANK_COMPANY_WORKERS", "4")),
+    max_pending=int(os.environ.get("BANK_COMPANY_MAX_PENDING", "1000")),
+)
+# Maile z historią kont są wysyłane w tle przez pulę połączeń SMTP
+email_dispatcher = EmailDispatcher(
+    os.environ.get("BANK_SMTP_HOST", "localhost"),
+    int(os.environ.get("BANK_SMTP_PORT", "25")),
+    sender=os.environ.get("BANK_SMTP_SENDER", "bank@example.com"),
+)
+# Po ilu sekundach ponowić zlecenie konta firmowego odrzucone przy pełnej kolejce (nagłówek Retry-After)
+COMPANY_RETRY_AFTER = 1
+# Budżet czasu (s) na zapytania do API MF w jednym żądaniu - wolne MF nie blokuje wątku na pełny timeout
+MF_REQUEST_DEADLINE = float(os.environ.get("BANK_MF_DEADLINE", "2.0"))
+
+# Metryki eksportowane przez GET /api/metrics (format Prometheusa)
+# Liczba żądań wg statusu to _count histogramu czasu - jeden zapis na koniec żądania zamiast dwóch
+metrics.histogram("http_request_duration_seconds", "Request latency (until the response is returned)",
+                  ("method", "endpoint", "status"))
+metrics.counter("http_requests_started_total", "Requests started")
+metrics.gauge("http_requests_in_flight", "Requests being handled",
+              function=lambda: metrics.value("http_requests_started_total")
+              - metrics.total("http_request_duration_seconds"))
+metrics.histogram("mongo_operation_duration_seconds", "MongoDB save/load duration", ("operation",),
+                  buckets=(0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0))
+metrics.gauge("accounts", "Accounts in the registry", function=registry.get_account_count)
+metrics.gauge("email_queue_size", "Emails waiting in the dispatcher queue",
+              function=lambda: email_dispatcher.stats()["queued"])
+metrics.gauge("log_records_dropped", "Log records dropped because the log queue was full",
+              function=lambda: logs.dropped)
+
+
+def instrument_requests(wsgi_app):
+    """
+    Middleware WSGI z metrykami żądań: czas (do zwrócenia odpowiedzi) ze statusem i liczba
+    żądań w toku. Działa poza Flaskiem, bez proxy request/g - każde odwołanie do nich
+    kosztuje ~2 us, a narzut metryk ma zostać w granicach kilku us na żądanie.
+    """
+    def instrumented(environ, start_response):
+        start_time = time.perf_counter()
+        status = "500"
+        endpoint = "unmatched"
+
+        def capture_status(status_line, headers, exc_info=None):
+            nonlocal status, endpoint
+            status = status_line[:3]
+            # Flask woła start_response, gdy obiekt żądania jest jeszcze w environ (po żądaniu go usuwa).
+            # Szablon ścieżki (np. /api/accounts/<pesel>), nie sama ścieżka - liczba serii jest ograniczona
+            flask_request = environ.get("werkzeug.request")
+            if flask_request is not None and flask_request.url_rule is not None:
+                endpoint = flask_request.url_rule.rule
+            return start_response(status_line, headers, exc_info)
+
+        metrics.inc("http_requests_started_total")
+        try:
+            return wsgi_app(environ, capture_status)
+        finally:
+            metrics.observe("http_request_duration_seconds", time.perf_counter() - start_time,
+                            (environ.get("REQUEST_METHOD", "GET"), endpoint, status))
+
+    return instrumented
+
+
+# Profilowanie żądań (cProfile): nagłówkiem X-Profile z tokenem BANK_PROFILE_TOKEN albo losowo
+# (BANK_PROFILE_SAMPLING - odsetek żądań, tylko razem z tokenem). Bez tokenu middleware nie jest instalowany
+profiler = RequestProfiler(
+    os.environ.get("BANK_PROFILE_TOKEN"),
+    float(os.environ.get("BANK_PROFILE_SAMPLING", "0")),
+    keep=int(os.environ.get("BANK_PROFILE_KEEP", "20")),
+)
+app.wsgi_app = instrument_requests(profiler.wrap(app.wsgi_app))
+
+
+@app.before_request
+def start_mf_deadline():
+    g.mf_deadline = mf_validator.start_deadline(MF_REQUEST_DEADLINE)
+
+
+@app.teardown_request
+def end_mf_deadline(exception):
+    token = g.pop("mf_deadline", None)
+    if token is not None:
+        mf_validator.end_deadline(token)
+
+
+def log_request(route: str, message: str, **fields):
+    """Log żądania z próbkowaniem trasy - odrzucone zdarzenie nie tworzy nawet rekordu"""
+    if request_log.isEnabledFor(logging.INFO) and logs.sample(route):
+        fields["route"] = route
+        request_log.info(message, extra=fields)
+
+
+def account_to_json(acc):
+    """Dane konta zwracane przez API (konta osobiste i firmowe)"""
+    if isinstance(acc, CompanyAccount):
+        return {"company_name": acc.company_name, "nip": acc.nip, "balance": acc.balance}
+    return {"name": acc.first_name, "surname": acc.last_name, "pesel": acc.pesel, "balance": acc.balance}
+
+
+def iter_stream_lines(stream, chunk_size=64 * 1024):
+    """Dzieli strumień na linie czytając go blokami (szybciej niż readline na LimitedStream)"""
+    rest = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (rest + chunk).split(b"\n")
+        rest = lines.pop()
+        yield from lines
+    if rest:
+        yield rest
+
 @app.route("/api/accounts", methods=['POST'])
 def create_account():
     data = request.get_json()
-    print(f"Create account request: {data}")
+    log_request("POST /api/accounts", "Create account request",
+                pesel=data.get("pesel") if isinstance(data, dict) else None)
     
     # Sprawdź czy PESEL już istnieje
     if registry.account_with_pesel_exists(data["pesel"]):
@@ -18,30 +176,204 @@ def create_account():
         }), 409  # 409 Conflict
     
     account = PersonalAccount(data["name"], data["surname"], data["pesel"])
-    registry.add_account(account)
+    # Dodanie jest atomowe - równoległy POST z tym samym PESEL mógł nas wyprzedzić
+    if not journal.try_add_account(account):
+        return jsonify({
+            "error": f"Account with PESEL {data['pesel']} already exists"
+        }), 409
     return jsonify({"message": "Account created"}), 201
 
+@app.route("/api/company-accounts", methods=['POST'])
+def create_company_account():
+    """Przyjmuje zlecenie założenia konta firmowego - walidacja NIP i dodanie konta dzieją się w tle"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("company_name"), str) \
+            or not isinstance(data.get("nip"), str):
+        return jsonify({"error": "Missing required fields: company_name, nip"}), 400
+    nip = data["nip"]
+    if len(nip) != 10 or not nip.isdigit():
+        return jsonify({"error": "NIP must have 10 digits"}), 400
+    if registry.get_account_by_nip(nip) is not None:
+        return jsonify({"error": f"Account with NIP {nip} already exists"}), 409
+
+    try:
+        job_id = company_registrations.submit(data["company_name"], nip)
+    except queue.Full:
+        return jsonify({"error": "Too many pending company registrations, try again later"}), 503, \
+            {"Retry-After": str(COMPANY_RETRY_AFTER)}
+    status_url = f"/api/company-accounts/jobs/{job_id}"
+    return jsonify({"job_id": job_id, "status_url": status_url}), 202, {"Location": status_url}
+
+@app.route("/api/company-accounts/jobs/<job_id>", methods=['GET'])
+def get_company_registration(job_id):
+    """Stan zlecenia założenia konta firmowego: pending, running, completed albo failed"""
+    job = company_registrations.status(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+@app.route("/api/accounts/import", methods=['POST'])
+def bulk_import_accounts():
+    """Masowe zakładanie kont z NDJSON albo CSV (name,surname,pesel) - body czytane strumieniowo"""
+    lines = iter_stream_lines(request.stream)
+    if request.mimetype == "application/x-ndjson":
+        rows = parse_ndjson_rows(lines)
+    elif request.mimetype == "text/csv":
+        rows = parse_csv_rows(lines)
+    else:
+        return jsonify({"error": "Content-Type must be application/x-ndjson or text/csv"}), 415
+
+    try:
+        chunk_size = int(request.args.get("chunk_size", 1000))
+    except ValueError:
+        chunk_size = 0
+    if chunk_size < 1:
+        return jsonify({"error": "chunk_size must be a positive integer"}), 400
+
+    try:
+        report = import_accounts(journal, rows, chunk_size=chunk_size)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(report), 200
+
+STREAM_PAGE_SIZE = 1000
+
+
+def iter_account_pages():
+    """Strony kont z rejestru - blokada rejestru jest trzymana tylko na czas jednej strony"""
+    cursor = None
+    while True:
+        accounts, cursor = registry.get_accounts_page(cursor, STREAM_PAGE_SIZE)
+        yield [json.dumps(account_to_json(acc)) for acc in accounts]
+        if cursor is None:
+            return
+
+
+def stream_accounts_json():
+    """Lista kont jako tablica JSON wysyłana kawałkami (jedna strona rejestru na kawałek)"""
+    yield "["
+    separator = ""
+    for page in iter_account_pages():
+        if page:
+            yield separator + ",".join(page)
+            separator = ","
+    yield "]"
+
+
+def stream_accounts_ndjson():
+    for page in iter_account_pages():
+        if page:
+            yield "\n".join(page) + "\n"
+
+
 @app.route("/api/accounts", methods=['GET'])
 def get_all_accounts():
-    print("Get all accounts request received")
+    """
+    Lista kont. Bez parametrów zwraca całą listę; ?limit= i ?cursor= zwracają stronę
+    z kursorem następnej, a ?stream=json|ndjson wysyła listę strumieniowo.
+    """
+    log_request("GET /api/accounts", "Get all accounts request received")
+    stream = request.args.get("stream")
+    if stream is not None:
+        if stream == "json":
+            return app.response_class(stream_accounts_json(), mimetype="application/json")
+        if stream == "ndjson":
+            return app.response_class(stream_accounts_ndjson(), mimetype="application/x-ndjson")
+        return jsonify({"error": "stream must be json or ndjson"}), 400
+
+    if "limit" in request.args or "cursor" in request.args:
+        try:
+            limit = int(request.args.get("limit", 100))
+            cursor = request.args.get("cursor")
+            cursor = int(cursor) if cursor is not None else None
+            accounts, next_cursor = registry.get_accounts_page(cursor, limit)
+        except ValueError as e:
+            return jsonify({"error": f"Invalid pagination parameters: {e}"}), 400
+        return jsonify({
+            "accounts": [account_to_json(acc) for acc in accounts],
+            "next_cursor": next_cursor
+        }), 200
+
     accounts = registry.get_all_accounts()
 
-    accounts_data = [{
-        "name": acc.first_name,
-        "surname": acc.last_name,
-        "pesel": acc.pesel,
-        "balance": acc.balance
-    } for acc in accounts]
+    accounts_data = [account_to_json(acc) for acc in accounts]
 
     return jsonify(accounts_data), 200
 
 @app.route("/api/accounts/count", methods=['GET'])
 def get_account_count():
-    print("Get account count request received")
+    log_request("GET /api/accounts/count", "Get account count request received")
 
-    count = len(registry.get_all_accounts())
+    count = registry.get_account_count()
     return jsonify({"count": count}), 200
 
+@app.route("/api/metrics", methods=['GET'])
+def get_metrics():
+    """Metryki aplikacji w formacie tekstowym Prometheusa"""
+    return app.response_class(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+def admin_authorized():
+    return profiler.authorized(request.headers.get("X-Admin-Token"))
+
+@app.route("/api/profiles", methods=['GET'])
+def get_profiles():
+    """Zapisane profile żądań (od najwolniejszego) - tylko z tokenem administratora"""
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    return jsonify(profiler.profiles()), 200
+
+@app.route("/api/profiles/<int:profile_id>", methods=['GET'])
+def get_profile(profile_id):
+    """Profil jako raport pstats (format=pstats, sort, limit) albo collapsed stacks (format=collapsed)"""
+    if not admin_authorized():
+        return jsonify({"error": "Admin token required"}), 403
+    output_format = request.args.get("format", "pstats")
+    try:
+        if output_format == "pstats":
+            text = profiler.pstats_text(profile_id, request.args.get("sort", "cumulative"),
+                                        int(request.args.get("limit", "50")))
+        elif output_format == "collapsed":
+            text = profiler.collapsed_text(profile_id)
+        else:
+            return jsonify({"error": "Format must be pstats or collapsed"}), 400
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    if text is None:
+        return jsonify({"error": "Profile not found"}), 404
+    return app.response_class(text, mimetype="text/plain")
+
+@app.route("/api/mf/cache", methods=['GET'])
+def get_mf_cache_stats():
+    """Statystyki cache walidacji NIP w API MF (trafienia, chybienia, rozmiar)"""
+    return jsonify(mf_validator.stats()), 200
+
+@app.route("/api/mf/breaker", methods=['GET'])
+def get_mf_breaker_stats():
+    """Stan bezpiecznika zapytań do API MF i jego liczniki"""
+    return jsonify(mf_validator.breaker_stats()), 200
+
+@app.route("/api/accounts/search", methods=['GET'])
+def search_accounts():
+    """Wyszukiwanie kont przez indeksy rejestru: ?nip= albo ?name=, ?surname=, ?q="""
+    nip = request.args.get("nip")
+    if nip is not None:
+        account = registry.get_account_by_nip(nip)
+        return jsonify([account_to_json(account)] if account else []), 200
+
+    name = request.args.get("name")
+    surname = request.args.get("surname")
+    text = request.args.get("q")
+    if name is None and surname is None and text is None:
+        return jsonify({"error": "Provide at least one of: nip, name, surname, q"}), 400
+
+    try:
+        limit = int(request.args.get("limit", 50))
+        accounts = registry.search_accounts(name, surname, text, limit=limit)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify([account_to_json(acc) for acc in accounts]), 200
+
 @app.route("/api/accounts/<pesel>", methods=['GET'])
 def get_account_by_pesel(pesel):
     account = registry.get_account_by_pesel(pesel)
@@ -59,10 +391,7 @@ def update_account(pesel):
     if account is None:
         return jsonify({"error": "Account not found"}), 404
     
-    if "name" in data:
-        account.first_name = data["name"]
-    if "surname" in data:
-        account.last_name = data["surname"]
+    journal.update_account_names(pesel, data.get("name"), data.get("surname"))
 
     #implementacja powinna znaleźć się tutaj
     return jsonify({"message": "Account updated"}), 200
@@ -74,10 +403,43 @@ def delete_account(pesel):
     if account is None:
         return jsonify({"error": "Account not found"}), 404
     
-    registry.delete_account(pesel)
+    journal.delete_account(pesel)
     return jsonify({"message": "Account deleted"}), 200
 
 
+TRANSFER_TYPES = ["incoming", "outgoing", "express"]
+TRANSFER_ACCEPTED = {"message": "Zlecenie przyjęto do realizacji"}
+
+
+def apply_transfer(account, transfer_type, amount):
+    """
+    Wykonuje przelew incoming/outgoing/express na koncie.
+
+    Returns:
+        Para (treść odpowiedzi, kod HTTP) - wspólna dla pojedynczego przelewu i batcha
+    """
+    # Sprawdź czy type jest poprawny
+    if transfer_type not in TRANSFER_TYPES:
+        return {"error": f"Invalid transfer type. Must be one of: {TRANSFER_TYPES}"}, 400
+
+    # Wykonaj przelew
+    if transfer_type == "incoming":
+        account.incoming_transfer(amount)
+        return TRANSFER_ACCEPTED, 200
+
+    elif transfer_type == "outgoing":
+        if not account.outgoing_transfer(amount):  # Nie udało się
+            return {"error": "Insufficient funds"}, 422
+        return TRANSFER_ACCEPTED, 200
+
+    # Sprawdź czy jest metoda express dla tego konta
+    if not hasattr(account, 'express_outgoing_pers'):
+        return {"error": "This account type does not support express transfers"}, 400
+    if not account.express_outgoing_pers(amount):  # Nie udało się
+        return {"error": "Insufficient funds"}, 422
+    return TRANSFER_ACCEPTED, 200
+
+
 @app.route("/api/accounts/<pesel>/transfer", methods=['POST'])
 def transfer(pesel):
     """Endpoint do przelewów - incoming, outgoing, express"""
@@ -87,53 +449,167 @@ def transfer(pesel):
         return jsonify({"error": "Account not found"}), 404
     
     data = request.get_json()
+    with journal.transfer(account):
+        body, status = apply_transfer(account, data.get("type"), data.get("amount"))
+    return jsonify(body), status
+
+
+def read_batch_items():
+    """Czyta pozycje batcha: tablica JSON albo NDJSON (jedna pozycja w linii, czytane strumieniowo)"""
+    if request.mimetype == "application/x-ndjson":
+        items = []
+        for line in iter_stream_lines(request.stream):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                items.append(None)  # Niepoprawna linia - błąd 400 tylko dla tej pozycji
+        return items
+
+    items = request.get_json(silent=True)
+    return items if isinstance(items, list) else None
+
+
+@app.route("/api/transfers/batch", methods=['POST'])
+def transfer_batch():
+    """
+    Wiele przelewów incoming/outgoing/express w jednym żądaniu.
+    Pozycje są grupowane po koncie: konto jest wyszukiwane i blokowane raz na grupę,
+    a przelewy na tym samym koncie wykonują się w kolejności z żądania.
+    Wynik każdej pozycji ma taki sam kod jak pojedynczy /api/accounts/<pesel>/transfer.
+    """
+    items = read_batch_items()
+    if items is None:
+        return jsonify({"error": "Body must be a JSON array or NDJSON stream of transfers"}), 400
+
+    results = [None] * len(items)
+    groups = {}
+    for i, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[i] = {"status": 400, "error": "Transfer must be a JSON object"}
+            continue
+        if not isinstance(item.get("pesel"), str):
+            results[i] = {"status": 400, "error": "PESEL must be a string"}
+            continue
+        groups.setdefault(item["pesel"], []).append(i)
+
+    for pesel, indexes in groups.items():
+        account = registry.get_account_by_pesel(pesel)
+        if account is None:
+            for i in indexes:
+                results[i] = {"status": 404, "error": "Account not found"}
+            continue
+
+        # Cała grupa to jeden wpis w dzienniku
+        with journal.transfer(account):
+            for i in indexes:
+                amount = items[i].get("amount")
+                # bool to podklasa int - true/false z JSON-a nie są kwotą
+                if not isinstance(amount, (int, float)) or isinstance(amount, bool):
+                    # Jedna zła pozycja nie może przerwać całego batcha
+                    results[i] = {"status": 400, "error": "Amount must be a number"}
+                    continue
+                body, status = apply_transfer(account, items[i].get("type"), amount)
+                results[i] = {"status": status} if status == 200 else {"status": status, **body}
+
+    return jsonify({"results": results}), 200
+
+@app.route("/api/transfers", methods=['POST'])
+def transfer_between_accounts():
+    """Przelew z konta na konto - obciążenie i uznanie wykonują się atomowo"""
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("from"), str) or not isinstance(data.get("to"), str):
+        return jsonify({"error": "Fields from and to must be PESEL strings"}), 400
+    source_pesel = data["from"]
+    target_pesel = data["to"]
     amount = data.get("amount")
-    transfer_type = data.get("type")
-    
-    # Sprawdź czy type jest poprawny
-    valid_types = ["incoming", "outgoing", "express"]
-    if transfer_type not in valid_types:
-        return jsonify({
-            "error": f"Invalid transfer type. Must be one of: {valid_types}"
-        }), 400  # Bad Request
-    
-    # Wykonaj przelew
-    if transfer_type == "incoming":
-        account.incoming_transfer(amount)
-        return jsonify({"message": "Zlecenie przyjęto do realizacji"}), 200
-    
-    elif transfer_type == "outgoing":
-        old_balance = account.balance
-        account.outgoing_transfer(amount)
-        
-        if account.balance == old_balance:  # Nie udało się
-            return jsonify({"error": "Insufficient funds"}), 422
-        
-        return jsonify({"message": "Zlecenie przyjęto do realizacji"}), 200
-    
-    elif transfer_type == "express":
-        # Sprawdź czy jest metoda express dla tego konta
-        if hasattr(account, 'express_outgoing_pers'):
-            old_balance = account.balance
-            account.express_outgoing_pers(amount)
-            
-            if account.balance == old_balance:  # Nie udało się
-                return jsonify({"error": "Insufficient funds"}), 422
-            
-            return jsonify({"message": "Zlecenie przyjęto do realizacji"}), 200
-        else:
-            return jsonify({
-                "error": "This account type does not support express transfers"
-            }), 400
+    # Jak w batchu: bool to podklasa int - true/false z JSON-a nie są kwotą; "not > 0" odrzuca też NaN
+    if not isinstance(amount, (int, float)) or isinstance(amount, bool) or not amount > 0:
+        return jsonify({"error": "Amount must be a positive number"}), 400
+
+    if source_pesel == target_pesel:
+        return jsonify({"error": "Source and target accounts must be different"}), 400
+
+    source = registry.get_account_by_pesel(source_pesel)
+    target = registry.get_account_by_pesel(target_pesel)
+    if source is None or target is None:
+        return jsonify({"error": "Account not found"}), 404
+
+    with journal.transfer(source, target):
+        transferred = source.transfer_to(target, amount)
+    if not transferred:
+        return jsonify({"error": "Insufficient funds"}), 422
+
+    return jsonify({"message": "Zlecenie przyjęto do realizacji"}), 200
+
+def statement_options(values):
+    """Zakres i format wyciągu z historii: start, stop, format (csv|text), compress - z JSON albo query stringu"""
+    stop = values.get("stop")
+    compress = values.get("compress", False)
+    if isinstance(compress, str):
+        compress = compress.lower() in ("1", "true", "yes")
+    return int(values.get("start", 0)), int(stop) if stop is not None else None, values.get("format", "csv"), bool(compress)
+
+@app.route("/api/accounts/<pesel>/history", methods=['GET'])
+def download_account_history(pesel):
+    """Wyciąg z historii konta wysyłany strumieniowo, kawałkami (np. ?format=text&start=-1000&compress=1)"""
+    account = registry.get_account_by_pesel(pesel)
+    if account is None:
+        return jsonify({"error": "Account not found"}), 404
+    try:
+        statement = account.history_statement(*statement_options(request.args))
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid statement parameters: {e}"}), 400
+    return app.response_class(
+        statement.encoded(),
+        mimetype=statement.content_type,
+        headers={"Content-Disposition": f'attachment; filename="{statement.filename}"'},
+    )
+
+@app.route("/api/accounts/<pesel>/history/email", methods=['POST'])
+def email_account_history(pesel):
+    """
+    Zleca wysłanie historii konta mailem - odpowiedź nie czeka na serwer SMTP.
+    Historia idzie jako załącznik; opcjonalnie start, stop, format i compress jak w GET .../history.
+    """
+    account = registry.get_account_by_pesel(pesel)
+    if account is None:
+        return jsonify({"error": "Account not found"}), 404
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("email"), str) or "@" not in data["email"]:
+        return jsonify({"error": "Missing or invalid field: email"}), 400
+
+    try:
+        start, stop, fmt, compress = statement_options(data)
+        handle = account.queue_history_email(email_dispatcher, data["email"], start, stop, fmt, compress)
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid request: {e}"}), 400
+    except queue.Full:
+        return jsonify({"error": "Email queue is full, try again later"}), 503
+    status_url = f"/api/emails/{handle.id}"
+    return jsonify({"delivery_id": handle.id, "status_url": status_url}), 202, {"Location": status_url}
+
+@app.route("/api/emails/<delivery_id>", methods=['GET'])
+def get_email_delivery(delivery_id):
+    """Stan wysyłki maila: queued, sending, sent, failed albo partial (wynik dla każdego adresata)"""
+    handle = email_dispatcher.get(delivery_id)
+    if handle is None:
+        return jsonify({"error": "Delivery not found"}), 404
+    return jsonify(handle.to_dict()), 200
 
 @app.route("/api/accounts/save", methods=['POST'])
 def save_accounts():
     """Zapisuje wszystkie konta z registry do MongoDB"""
     try:
         accounts = registry.get_all_accounts()
-        mongo_repo.save_all(accounts)
+        # Do bazy trafiają tylko konta zmienione od ostatniego zapisu
+        with metrics.timer("mongo_operation_duration_seconds", ("save",)):
+            result = mongo_repo.save_all(accounts)
         return jsonify({
-            "message": f"Successfully saved {len(accounts)} accounts to database"
+            "message": f"Successfully saved {len(accounts)} accounts to database",
+            "upserted": result["upserted"],
+            "deleted": result["deleted"]
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -142,21 +618,40 @@ def save_accounts():
 def load_accounts():
     """Ładuje wszystkie konta z MongoDB do registry"""
     try:
-        # Ładujemy z bazy
-        accounts = mongo_repo.load_all()
-        
-        # Czyścimy obecne konta przed załadowaniem
-        registry.accounts.clear()
-        
-        # Dodajemy do registry
-        for account in accounts:
-            registry.add_account(account)
+        with metrics.timer("mongo_operation_duration_seconds", ("load",)):
+            # Konta z bazy są ładowane strumieniowo - pierwsza paczka jest pobierana
+            # przed wyczyszczeniem registry, więc błąd połączenia go nie opróżnia
+            accounts = mongo_repo.iter_all()
+            first = next(accounts, None)
+
+            # Czyścimy obecne konta przed załadowaniem
+            registry.clear()
+
+            # Dodajemy do registry na bieżąco
+            loaded = 0
+            for account in chain([first] if first is not None else [], accounts):
+                registry.add_account(account)
+                loaded += 1
+
+        # Wczytany stan zastępuje dziennik - od teraz odtwarzanie zaczyna się od tego snapshotu
+        journal.snapshot()
         
         return jsonify({
-            "message": f"Successfully loaded {len(accounts)} accounts from database"
+            "message": f"Successfully loaded {loaded} accounts from database"
         }), 200
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route("/api/accounts/snapshot", methods=['POST'])
+def write_snapshot():
+    """Zapisuje rejestr do binarnego snapshotu (BANK_SNAPSHOT_PATH), z którego startuje serwer"""
+    if not SNAPSHOT_PATH:
+        return jsonify({"error": "BANK_SNAPSHOT_PATH is not set"}), 400
+    try:
+        count = BinarySnapshot.write(SNAPSHOT_PATH, registry.iter_accounts())
+        return jsonify({"message": f"Successfully saved {count} accounts to snapshot"}), 200
+    except (OSError, ValueError) as e:
+        return jsonify({"error": str(e)}), 500
+
 if __name__ == "__main__":
     app.run(host="127.0.0.1", port=5000)
\ No newline at end of file
@@ -1,23 +1,100 @@
+import threading
+from typing import Optional
+
+from src.history_statement import HistoryStatement
+from src.transaction_history import TransactionHistory
+
+
 class Account:
+    # __slots__ zamiast __dict__ w każdej instancji - przy milionach kont w rejestrze to duża oszczędność
+    __slots__ = ("balance", "history", "lock", "version")
 
     def __init__(self):
         self.balance = 0.0
-        self.history = []
+        self.history = TransactionHistory()
+        # Blokada konta - operacje na saldzie tego samego konta wykonują się po kolei,
+        # operacje na różnych kontach mogą iść równolegle (RLock: express woła outgoing_transfer)
+        self.lock = threading.RLock()
+        # Licznik zmian - repozytorium zapisuje tylko konta zmienione od ostatniego zapisu
+        self.version = 0
+
+    def mark_changed(self):
+        self.version += 1
+
+    def history_statement(self, start: int = 0, stop: Optional[int] = None, fmt: str = "csv",
+                          compress: bool = False) -> HistoryStatement:
+        """Wyciąg z historii konta (wpisy [start, stop)) generowany kawałkami"""
+        return HistoryStatement(self.history, start, stop, fmt, compress)
+
+    def queue_history_email(self, dispatcher, email_address: str, start: int = 0, stop: Optional[int] = None,
+                            fmt: str = "csv", compress: bool = False):
+        """
+        Zleca wysłanie historii konta mailem w tle (bez czekania na serwer SMTP).
+        Historia idzie jako załącznik generowany kawałkami w trakcie wysyłki,
+        więc długa historia nie jest składana w jeden napis.
+
+        Args:
+            dispatcher: EmailDispatcher, który wyśle wiadomość
+            email_address: Adres email odbiorcy
+            start, stop: Zakres wpisów historii
+            fmt: "csv" albo "text"
+            compress: Załącznik skompresowany gzipem
+
+        Returns:
+            DeliveryHandle - stan wysyłki
+        """
+        statement = self.history_statement(start, stop, fmt, compress)
+        subject, text = self._history_email(statement)
+        attachment = (statement.filename, statement.content_type, statement.encoded)
+        return dispatcher.submit(subject, text, [email_address], attachment=attachment)
+
+    @classmethod
+    def _hydrate(cls, balance: float, history: TransactionHistory):
+        """
+        Tworzy konto z zapisanego stanu bez wywoływania konstruktora (walidacje
+        i promocja zostały już wykonane przy zakładaniu konta). Pola podklasy
+        ustawia wywołujący.
+        """
+        account = object.__new__(cls)
+        account.balance = balance
+        account.history = history
+        account.lock = threading.RLock()
+        account.version = 0
+        return account
+
+    def outgoing_transfer(self, amount: float) -> bool:
+        with self.lock:
+            if (amount <= 0 or amount > self.balance):
+                return False
 
-    def outgoing_transfer(self, amount: float) -> None:
-        if (amount <= 0 or amount > self.balance):
-            return
+            self.balance -= amount
+            self.history.append(-amount)
+            self.version += 1
+            return True
 
-        self.balance -= amount
-        self.history.append(-amount)
-        
-    
+    def incoming_transfer(self, amount: float) -> bool:
+        with self.lock:
+            if amount <= 0:
+                return False
+            else:
+                self.balance += amount
+                self.history.append(amount)
+                self.version += 1
+                return True
 
-    def incoming_transfer(self, amount: float):
-        if amount <= 0:
-            return
-        else:
-            self.balance += amount
-            self.history.append(amount)
+    def transfer_to(self, target: "Account", amount: float) -> bool:
+        """
+        Przelew między kontami - obciążenie tego konta i uznanie konta docelowego
+        wykonują się atomowo (pod blokadami obu kont).
 
-    
+        Blokady są brane zawsze w tej samej kolejności (po id obiektu), więc dwa
+        przeciwne przelewy A->B i B->A nie mogą się zakleszczyć.
+        """
+        if target is self:
+            return False
+        first, second = sorted((self, target), key=id)
+        with first.lock, second.lock:
+            if not self.outgoing_transfer(amount):
+                return False
+            target.incoming_transfer(amount)
+            return True
@@ -0,0 +1,127 @@
+import csv
+import json
+import time
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src.personal_account import PersonalAccount
+
+
+REQUIRED_FIELDS = ("name", "surname", "pesel")
+
+
+def parse_ndjson_rows(lines: Iterable[bytes]) -> Iterator[Optional[Dict]]:
+    """Zamienia linie NDJSON na słowniki (None dla linii, której nie da się odczytać)"""
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+def parse_csv_rows(lines: Iterable[bytes]) -> Iterator[Optional[Dict]]:
+    """
+    Zamienia linie CSV z nagłówkiem (name,surname,pesel) na słowniki
+    (None dla linii, która nie jest poprawnym UTF-8).
+
+    Raises:
+        ValueError: Gdy nagłówek nie jest poprawnym UTF-8 (zgłaszany przed pierwszym wierszem)
+    """
+    header = None
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            text = line.decode("utf-8").rstrip("\r")
+        except UnicodeDecodeError:
+            if header is None:
+                raise ValueError("CSV header is not valid UTF-8")
+            yield None
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = values
+        else:
+            yield dict(zip(header, values))
+
+
+def validate_row(row: Optional[Dict]) -> Optional[str]:
+    """Zwraca opis błędu wiersza albo None gdy wiersz jest poprawny"""
+    if row is None:
+        return "Row could not be read (invalid JSON object or UTF-8)"
+    for field in REQUIRED_FIELDS:
+        if not isinstance(row.get(field), str) or not row[field]:
+            return f"Missing field: {field}"
+    pesel = row["pesel"]
+    # isdigit przepuszcza też cyfry Unicode (np. "²"), których nie da się zamienić na int
+    if len(pesel) != 11 or not (pesel.isascii() and pesel.isdigit()):
+        return "PESEL must have 11 digits"
+    return None
+
+
+def import_accounts(registry, rows: Iterable[Optional[Dict]], chunk_size=1000, max_reported_rejects=1000) -> Dict:
+    """
+    Strumieniowy import kont osobistych do rejestru.
+
+    Wiersze są czytane i wstawiane paczkami po chunk_size, więc w pamięci jest naraz
+    tylko jedna paczka. Duplikaty w obrębie paczki są odrzucane przed wstawieniem,
+    duplikaty względem rejestru (także wcześniejszych paczek) odrzuca try_add_accounts.
+
+    Args:
+        registry: AccountRegistry (albo AccountJournal), do którego trafiają konta
+        rows: Wiersze z polami name, surname, pesel (None dla nieczytelnego wiersza)
+        chunk_size: Liczba wierszy wstawianych naraz
+        max_reported_rejects: Ile odrzuconych wierszy opisać w raporcie (licznik jest zawsze pełny)
+
+    Returns:
+        Raport: liczba zaimportowanych i odrzuconych wierszy, opisy odrzuceń, wiersze/s
+    """
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be a positive integer")
+
+    start_time = time.perf_counter()
+    imported = rejected = 0
+    rejects: List[Dict] = []
+
+    def reject(row_number, row, error):
+        nonlocal rejected
+        rejected += 1
+        if len(rejects) < max_reported_rejects:
+            pesel = row.get("pesel") if isinstance(row, dict) else None
+            rejects.append({"row": row_number, "pesel": pesel, "error": error})
+
+    numbered_rows = enumerate(rows, start=1)
+    while True:
+        chunk = list(islice(numbered_rows, chunk_size))
+        if not chunk:
+            break
+
+        accounts, numbers, seen = [], [], set()
+        for row_number, row in chunk:
+            error = validate_row(row)
+            if error is None and row["pesel"] in seen:
+                error = "Duplicate PESEL in upload"
+            if error is not None:
+                reject(row_number, row, error)
+                continue
+            seen.add(row["pesel"])
+            accounts.append(PersonalAccount(row["name"], row["surname"], row["pesel"]))
+            numbers.append(row_number)
+
+        for row_number, account, added in zip(numbers, accounts, registry.try_add_accounts(accounts)):
+            if added:
+                imported += 1
+            else:
+                reject(row_number, {"pesel": account.pesel}, f"Account with PESEL {account.pesel} already exists")
+
+    duration = time.perf_counter() - start_time
+    return {
+        "imported": imported,
+        "rejected": rejected,
+        "rejects": rejects,
+        "duration": duration,
+        "rows_per_second": (imported + rejected) / duration if duration > 0 else 0.0,
+    }
@@ -0,0 +1,436 @@
+from src.account import Account
+from src.account_registry import AccountRegistry
+from src.company_account import CompanyAccount
+from src.personal_account import PersonalAccount
+from contextlib import ExitStack, contextmanager
+from typing import Dict, Iterator, List, Optional
+import json
+import os
+import threading
+import time
+
+
+class AccountJournal:
+    """
+    Dziennik zmian rejestru kont (write-ahead journal) z okresowymi snapshotami.
+
+    Każda zmiana (założenie, zmiana danych, usunięcie konta, przelew) jest dopisywana
+    jako linia JSON do bieżącego segmentu dziennika, jeszcze pod blokadą konta - więc
+    kolejność wpisów dla jednego konta jest taka sama jak kolejność zmian. Przelew
+    zapisuje stan po zmianie (nowe wpisy historii od pozycji "from" i saldo), dzięki
+    czemu odtworzenie jest idempotentne i snapshot nie musi zatrzymywać zmian.
+
+    Tryby trwałości:
+        "sync"  - każdy wpis jest zapisywany i fsync-owany od razu
+        "group" - wpisy czekające w tej samej chwili idą na dysk jednym fsync
+                  (group commit); operacja wraca dopiero po fsync
+        "async" - fsync w tle co flush_interval; operacja nie czeka na dysk
+                  (po awarii można stracić wpisy z ostatniego flush_interval)
+
+    Bez katalogu (directory=None) dziennik jest wyłączony i operacje trafiają
+    prosto do rejestru.
+    """
+
+    DURABILITY_MODES = ("sync", "group", "async")
+    SEGMENT_PREFIX = "journal-"
+    SNAPSHOT_PREFIX = "snapshot-"
+
+    def __init__(self, registry: AccountRegistry, directory: Optional[str] = None, durability: str = "group",
+                 flush_interval: float = 0.005, snapshot_every: int = 100_000):
+        """
+        Args:
+            registry: Rejestr, którego zmiany są zapisywane
+            directory: Katalog na segmenty dziennika i snapshoty (None = dziennik wyłączony)
+            durability: Tryb trwałości - "sync", "group" albo "async"
+            flush_interval: Odstęp między fsync w trybie "async" (sekundy)
+            snapshot_every: Po tylu wpisach od ostatniego snapshotu robiony jest nowy (w tle)
+        """
+        if durability not in self.DURABILITY_MODES:
+            raise ValueError(f"Durability must be one of: {self.DURABILITY_MODES}")
+        self.registry = registry
+        self.directory = directory
+        self.durability = durability
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+
+        # Blokady: _io_lock (zapis do pliku) -> _append_lock (numeracja i bufor wpisów)
+        self._io_lock = threading.Lock()
+        self._append_lock = threading.Lock()
+        self._has_pending = threading.Condition(self._append_lock)
+        self._durable = threading.Condition(self._append_lock)
+        self._pending: List[bytes] = []
+        self._next_seq = 1
+        self._durable_seq = 0
+        self._error: Optional[OSError] = None
+        self._file = None
+        self._flusher: Optional[threading.Thread] = None
+        self._closed = False
+
+        self._snapshot_lock = threading.Lock()
+        self._snapshot_running = False
+        self._records_since_snapshot = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.directory is not None
+
+    # --- operacje na rejestrze zapisywane w dzienniku ---
+
+    def try_add_account(self, account: Account) -> bool:
+        """Dodaje konto do rejestru (jak AccountRegistry.try_add_account) i zapisuje to w dzienniku"""
+        seq = 0
+        with account.lock:
+            if not self.registry.try_add_account(account):
+                return False
+            if self.enabled:
+                seq = self._append({"op": "create", "account": account.to_dict()})
+        self.wait(seq)
+        return True
+
+    def try_add_accounts(self, accounts: List[PersonalAccount]) -> List[bool]:
+        """Paczka kont osobistych (jak AccountRegistry.try_add_accounts) - jeden wpis na konto, jedno czekanie"""
+        if not self.enabled:
+            return self.registry.try_add_accounts(accounts)
+        seq = 0
+        with ExitStack() as stack:
+            # Konta nie są jeszcze nigdzie widoczne, ale przelew na świeżo dodane konto
+            # nie może trafić do dziennika przed wpisem o jego założeniu
+            for account in accounts:
+                stack.enter_context(account.lock)
+            results = self.registry.try_add_accounts(accounts)
+            for account, added in zip(accounts, results):
+                if added:
+                    seq = self._append({"op": "create", "account": account.to_dict()})
+        self.wait(seq)
+        return results
+
+    def update_account_names(self, pesel, first_name=None, last_name=None) -> bool:
+        account = self.registry.get_account_by_pesel(pesel)
+        if account is None:
+            return False
+        seq = 0
+        with account.lock:
+            if not self.registry.update_account_names(pesel, first_name, last_name):
+                return False
+            if self.enabled:
+                seq = self._append({"op": "update", "pesel": pesel, "first_name": first_name, "last_name": last_name})
+        self.wait(seq)
+        return True
+
+    def delete_account(self, pesel) -> bool:
+        account = self.registry.get_account_by_pesel(pesel)
+        if account is None:
+            return False
+        seq = 0
+        with account.lock:
+            if not self.registry.delete_account(pesel):
+                return False
+            if self.enabled:
+                seq = self._append({"op": "delete", "pesel": pesel})
+        self.wait(seq)
+        return True
+
+    @contextmanager
+    def transfer(self, *accounts: Account) -> Iterator[None]:
+        """
+        Blokuje konta (w kolejności id, jak Account.transfer_to) na czas operacji w bloku
+        with i zapisuje w dzienniku zmiany tych kont, które się zmieniły (licznik version).
+        Czekanie na zapis (tryb "sync"/"group") odbywa się już po zwolnieniu blokad kont.
+        """
+        if not self.enabled:
+            yield
+            return
+        seq = 0
+        with ExitStack() as stack:
+            for account in sorted(set(accounts), key=id):
+                stack.enter_context(account.lock)
+            before = [(account, len(account.history), account.version) for account in accounts]
+            try:
+                yield
+            finally:
+                changes = [
+                    {**self._account_key(account),
+                     "from": length, "amounts": account.history.since(length), "balance": account.balance}
+                    for account, length, version in before
+                    if account.version != version and self._is_registered(account)
+                ]
+                if changes:
+                    seq = self._append({"op": "transfer", "changes": changes})
+        self.wait(seq)
+
+    # --- zapis wpisów ---
+
+    def _append(self, record: Dict) -> int:
+        """Dopisuje wpis (wywoływane pod blokadą zmienianych kont) i zwraca jego numer"""
+        if self._file is None:
+            raise RuntimeError("Journal is not open - call recover() first")
+        if self.durability == "sync":
+            with self._io_lock, self._append_lock:
+                seq = self._number(record)
+                self._file.write(self._encode(record))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._durable_seq = seq
+        else:
+            with self._append_lock:
+                seq = self._number(record)
+                self._pending.append(self._encode(record))
+                self._has_pending.notify()
+
+        self._records_since_snapshot += 1
+        if self._records_since_snapshot >= self.snapshot_every and not self._snapshot_running:
+            self._snapshot_running = True
+            threading.Thread(target=self._background_snapshot, daemon=True).start()
+        return seq
+
+    def _number(self, record: Dict) -> int:
+        seq = self._next_seq
+        self._next_seq += 1
+        record["seq"] = seq
+        return seq
+
+    @staticmethod
+    def _encode(record: Dict) -> bytes:
+        return (json.dumps(record, separators=(",", ":")) + "\n").encode()
+
+    def wait(self, seq: int):
+        """Czeka, aż wpis seq będzie na dysku (w trybie "async" nie czeka)"""
+        if not seq or self.durability == "async":
+            return
+        with self._append_lock:
+            while self._durable_seq < seq and self._error is None:
+                self._durable.wait()
+            if self._error is not None:
+                raise self._error
+
+    def flush(self):
+        """Zapisuje na dysk wszystkie oczekujące wpisy (także w trybie "async")"""
+        with self._io_lock:
+            self._write_pending()
+
+    def _write_pending(self):
+        """Zapis i fsync oczekujących wpisów (wywoływane pod _io_lock)"""
+        with self._append_lock:
+            lines, self._pending = self._pending, []
+            last = self._next_seq - 1
+        if lines:
+            try:
+                self._file.write(b"".join(lines))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except OSError as e:
+                with self._append_lock:
+                    self._error = e
+                    self._durable.notify_all()
+                raise
+        with self._append_lock:
+            self._durable_seq = last
+            self._durable.notify_all()
+
+    def _flush_loop(self):
+        """Wątek group commit: wszystko, co przyszło w czasie poprzedniego fsync, idzie jednym fsync"""
+        while True:
+            with self._append_lock:
+                while not self._pending and not self._closed:
+                    self._has_pending.wait()
+                if self._closed and not self._pending:
+                    return
+            try:
+                with self._io_lock:
+                    self._write_pending()
+            except OSError:
+                return
+            if self.durability == "async":
+                time.sleep(self.flush_interval)
+
+    # --- segmenty i snapshoty ---
+
+    def _path(self, prefix: str, seq: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{prefix}{seq:012d}{suffix}")
+
+    def _files(self, prefix: str, suffix: str) -> List[tuple]:
+        """Pliki (numer, ścieżka) z katalogu dziennika, posortowane po numerze"""
+        files = []
+        for name in os.listdir(self.directory):
+            if name.startswith(prefix) and name.endswith(suffix):
+                files.append((int(name[len(prefix):-len(suffix)]), os.path.join(self.directory, name)))
+        return sorted(files)
+
+    def _open_segment(self, seq: int):
+        """Zamyka bieżący segment i otwiera nowy, zaczynający się od wpisu seq (pod _io_lock)"""
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self._path(self.SEGMENT_PREFIX, seq, ".log"), "ab")
+        self._fsync_directory()
+
+    def _fsync_directory(self):
+        if hasattr(os, "O_DIRECTORY"):
+            fd = os.open(self.directory, os.O_RDONLY | os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _background_snapshot(self):
+        try:
+            self.snapshot()
+        finally:
+            self._snapshot_running = False
+
+    def snapshot(self) -> int:
+        """
+        Zapisuje snapshot rejestru i usuwa starsze segmenty dziennika.
+
+        Nowy segment zaczyna się od numeru S, potem konta są zapisywane po kolei, każde
+        pod swoją blokadą - zmiany w trakcie nie są wstrzymywane. Konto może już zawierać
+        zmiany z wpisów >= S, ale te wpisy i tak zostaną odtworzone (idempotentnie).
+
+        Returns:
+            Liczba kont w snapshocie
+        """
+        if not self.enabled:
+            return 0
+        with self._snapshot_lock:
+            with self._io_lock:
+                self._write_pending()
+                with self._append_lock:
+                    start = self._next_seq
+                    self._records_since_snapshot = 0
+                self._open_segment(start)
+
+            path = self._path(self.SNAPSHOT_PREFIX, start, ".ndjson")
+            count = 0
+            with open(path + ".tmp", "wb") as f:
+                f.write(self._encode({"seq": start}))
+                for account in self.registry.iter_accounts():
+                    with account.lock:
+                        data = account.to_dict()
+                    f.write(self._encode(data))
+                    count += 1
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(path + ".tmp", path)
+            self._fsync_directory()
+
+            for seq, old in self._files(self.SNAPSHOT_PREFIX, ".ndjson") + self._files(self.SEGMENT_PREFIX, ".log"):
+                if seq < start:
+                    os.remove(old)
+        return count
+
+    def has_snapshot(self) -> bool:
+        """Czy katalog dziennika ma snapshot - wtedy recover odtwarza z niego cały rejestr"""
+        return self.enabled and os.path.isdir(self.directory) \
+            and bool(self._files(self.SNAPSHOT_PREFIX, ".ndjson"))
+
+    def recover(self) -> Dict:
+        """
+        Odtwarza rejestr z ostatniego snapshotu i dziennika, potem otwiera nowy segment.
+        Wywoływane raz, przy starcie - przed pierwszą zmianą.
+
+        Snapshot dziennika jest źródłem całego stanu rejestru, więc rejestr musi być
+        wtedy pusty (np. bez podpiętego snapshotu binarnego - zob. has_snapshot).
+        Bez snapshotu wpisy dziennika są odtwarzane na tym, co już jest w rejestrze.
+
+        Returns:
+            Raport: liczba kont ze snapshotu, liczba odtworzonych wpisów, czas
+
+        Raises:
+            ValueError: Jest snapshot dziennika, a rejestr nie jest pusty
+        """
+        report = {"snapshot_accounts": 0, "replayed": 0, "duration": 0.0}
+        if not self.enabled:
+            return report
+        start_time = time.perf_counter()
+        os.makedirs(self.directory, exist_ok=True)
+
+        start = 1
+        snapshots = self._files(self.SNAPSHOT_PREFIX, ".ndjson")
+        if snapshots:
+            start, path = snapshots[-1]
+            if self.registry.get_account_count():
+                raise ValueError("Journal snapshot can only be recovered into an empty registry")
+            with open(path, "rb") as f:
+                f.readline()  # nagłówek {"seq": S}
+                for line in f:
+                    self.registry.add_account(self._account_from_dict(json.loads(line)))
+                    report["snapshot_accounts"] += 1
+
+        last = start - 1
+        for _, path in self._files(self.SEGMENT_PREFIX, ".log"):
+            with open(path, "rb") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break  # Urwany ostatni wpis (awaria w trakcie zapisu)
+                    if record["seq"] < start:
+                        continue
+                    self._replay(record)
+                    last = record["seq"]
+                    report["replayed"] += 1
+
+        with self._io_lock:
+            with self._append_lock:
+                self._next_seq = last + 1
+                self._durable_seq = last
+            self._open_segment(self._next_seq)
+        if self.durability != "sync" and self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flusher.start()
+        report["duration"] = time.perf_counter() - start_time
+        return report
+
+    def _replay(self, record: Dict):
+        op = record["op"]
+        if op == "create":
+            self.registry.add_account(self._account_from_dict(record["account"]))
+        elif op == "update":
+            self.registry.update_account_names(record["pesel"], record["first_name"], record["last_name"])
+        elif op == "delete":
+            self.registry.delete_account(record["pesel"])
+        elif op == "transfer":
+            for change in record["changes"]:
+                account = self._find_account(change)
+                if account is None:
+                    continue
+                # Wpisy sprzed "from" są już w historii; jeśli są i te, snapshot zawiera tę zmianę
+                if len(account.history) == change["from"]:
+                    account.history.extend(change["amounts"])
+                account.balance = change["balance"]
+                account.mark_changed()
+
+    def _find_account(self, data: Dict) -> Optional[Account]:
+        if "nip" in data:
+            return self.registry.get_account_by_nip(data["nip"])
+        return self.registry.get_account_by_pesel(data["pesel"])
+
+    def _is_registered(self, account: Account) -> bool:
+        """Czy konto nadal jest w rejestrze (zmiany usuniętego konta nie trafiają do dziennika)"""
+        return self._find_account(self._account_key(account)) is account
+
+    @staticmethod
+    def _account_key(account: Account) -> Dict:
+        if isinstance(account, CompanyAccount):
+            return {"nip": account.nip}
+        return {"pesel": account.pesel}
+
+    @staticmethod
+    def _account_from_dict(data: Dict) -> Account:
+        if data.get("type") == "company":
+            return CompanyAccount.from_dict(data)
+        return PersonalAccount.from_dict(data)
+
+    def close(self):
+        """Zapisuje oczekujące wpisy, zatrzymuje wątek zapisu i zamyka segment"""
+        if self._file is None:
+            return
+        with self._append_lock:
+            self._closed = True
+            self._has_pending.notify_all()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        with self._io_lock:
+            self._write_pending()
+            self._file.close()
+            self._file = None
@@ -1,35 +1,490 @@
+from src.account import Account
 from src.personal_account import PersonalAccount
-from typing import List
+from src.company_account import CompanyAccount
+from src.name_index import NameIndex
+from src.binary_snapshot import BinarySnapshot
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import ExitStack
+from itertools import groupby, islice
+from typing import Dict, Iterator, List, Optional, Tuple
+import heapq
+import threading
 
 
 class AccountRegistry:
-    def __init__(self):
-        self.accounts: List[PersonalAccount] = []
+    """
+    Rejestr kont podzielony na shardy (lock striping).
 
-    def add_account(self, account: PersonalAccount):
-        self.accounts.append(account)
+    Konto osobiste trafia do sharda wybranego po hashu PESEL; każdy shard ma własną
+    blokadę, więc zmiany w różnych shardach nie czekają na siebie. Odczyt pojedynczego
+    konta nie bierze blokady (operacje na dict są atomowe).
+
+    Każde dodane konto dostaje rosnący numer kolejny i trafia na koniec indeksu
+    kolejności - z niego korzysta listowanie i stronicowanie (numer jest kursorem).
+
+    Blokady są brane zawsze w kolejności: shard -> indeksy pomocnicze -> kolejność.
+
+    Rejestr może startować z binarnego snapshotu (attach_snapshot): konta ze snapshotu
+    mają numery kolejne równe numerom wierszy, a obiekty kont powstają dopiero przy
+    pierwszym odwołaniu do nich.
+    """
+
+    # Indeks kolejności jest przebudowywany, gdy usunięte wpisy to ponad połowa
+    COMPACT_MIN_TOMBSTONES = 1024
+    # Wpis indeksu kolejności dla konta ze snapshotu, które jeszcze nie zostało utworzone
+    _PENDING = object()
+    # Liczba wierszy snapshotu tworzonych pod jednym wzięciem blokad w load_snapshot
+    SNAPSHOT_LOAD_BATCH = 1000
+
+    def __init__(self, shard_count: int = 16):
+        # Shard: PESEL -> (numer kolejny dodania, konto)
+        self._shards: List[Dict[str, Tuple[int, PersonalAccount]]] = [{} for _ in range(shard_count)]
+        self._shard_locks = [threading.Lock() for _ in range(shard_count)]
+        # Indeksy pomocnicze: NIP -> (numer kolejny, konto firmowe), imię i nazwisko -> PESEL
+        self._index_lock = threading.Lock()
+        self._nip_index: Dict[str, Tuple[int, CompanyAccount]] = {}
+        self._first_name_index = NameIndex()
+        self._last_name_index = NameIndex()
+        # Indeks kolejności: posortowane numery kolejne i konta (None = konto usunięte)
+        self._order_lock = threading.Lock()
+        self._order_seqs = array("q")
+        self._order_accounts: List[Optional[Account]] = []
+        self._tombstones = 0
+        self._next_seq = 0
+        # Podpięty snapshot i liczba jego kont, których obiekty jeszcze nie powstały
+        self._snapshot: Optional[BinarySnapshot] = None
+        self._snapshot_pending = 0
+
+    def _shard_of(self, pesel) -> int:
+        return hash(pesel) % len(self._shards)
+
+    def _enter_all_locks(self, stack: ExitStack):
+        """Bierze wszystkie blokady rejestru w ustalonej kolejności: shardy, indeksy, kolejność"""
+        for lock in self._shard_locks:
+            stack.enter_context(lock)
+        stack.enter_context(self._index_lock)
+        stack.enter_context(self._order_lock)
+
+    def _append_order(self, account: Account) -> int:
+        """Nadaje numer kolejny i dopisuje konto na koniec indeksu kolejności"""
+        with self._order_lock:
+            seq = self._next_seq
+            self._next_seq += 1
+            self._order_seqs.append(seq)
+            self._order_accounts.append(account)
+        return seq
+
+    def _remove_order(self, seq: int):
+        with self._order_lock:
+            i = bisect_left(self._order_seqs, seq)
+            if i == len(self._order_seqs) or self._order_seqs[i] != seq:
+                return
+            self._order_accounts[i] = None
+            self._tombstones += 1
+            if self._tombstones > max(self.COMPACT_MIN_TOMBSTONES, len(self._order_seqs) // 2):
+                self._compact_order()
+
+    def _compact_order(self):
+        """Usuwa z indeksu kolejności wpisy usuniętych kont (wywoływane pod _order_lock)"""
+        live = [i for i, account in enumerate(self._order_accounts) if account is not None]
+        self._order_seqs = array("q", (self._order_seqs[i] for i in live))
+        self._order_accounts = [self._order_accounts[i] for i in live]
+        self._tombstones = 0
+
+    def add_account(self, account: Account):
+        """
+        Dodaje konto. Jak w rejestrze opartym na liście wyszukanie zwraca pierwsze konto
+        z danym PESEL/NIP - kolejne konto z tym samym kluczem jest pomijane (nie zastępuje
+        pierwszego). Różnica względem listy: duplikat nie jest liczony ani listowany, więc
+        konta z PESEL "Invalid" (i NIP "Invalid") zajmują w rejestrze jedno miejsce.
+        """
+        self._add(account)
+
+    def try_add_account(self, account: Account) -> bool:
+        """Dodaje konto tylko gdy jego PESEL/NIP jest wolny (sprawdzenie i dodanie są atomowe)"""
+        return self._add(account)
+
+    def _add(self, account: Account) -> bool:
+        if self._snapshot is not None:
+            # Konto o tym samym PESEL/NIP może czekać w snapshocie
+            if isinstance(account, CompanyAccount):
+                self._from_snapshot("nip", account.nip)
+            else:
+                self._from_snapshot("pesel", account.pesel)
+
+        if isinstance(account, CompanyAccount):
+            with self._index_lock:
+                if account.nip in self._nip_index:
+                    return False
+                self._nip_index[account.nip] = (self._append_order(account), account)
+            return True
+
+        pesel = account.pesel
+        i = self._shard_of(pesel)
+        with self._shard_locks[i]:
+            shard = self._shards[i]
+            with self._index_lock:
+                if pesel in shard:
+                    return False
+                self._index_names(pesel, account)
+                shard[pesel] = (self._append_order(account), account)
+        return True
+
+    def _index_names(self, pesel, account: PersonalAccount):
+        """
+        Dodaje imię i nazwisko konta do indeksów wyszukiwania (pod _index_lock).
+        Wywoływane przed wpisaniem konta do sharda i indeksu kolejności - błąd nie
+        zostawia konta dodanego tylko częściowo.
+        """
+        self._first_name_index.add(pesel, account.first_name)
+        try:
+            self._last_name_index.add(pesel, account.last_name)
+        except BaseException:
+            self._first_name_index.remove(pesel)
+            raise
+
+    def try_add_accounts(self, accounts: List[PersonalAccount]) -> List[bool]:
+        """
+        Dodaje paczkę kont osobistych (tylko te z wolnym PESEL) i zwraca wynik dla każdego.
+        Blokady potrzebnych shardów są brane raz na paczkę, w rosnącej kolejności,
+        więc konta dostają numery kolejne w kolejności z listy.
+        """
+        if self._snapshot is not None:
+            for account in accounts:
+                self._from_snapshot("pesel", account.pesel)
+
+        shard_ids = sorted({self._shard_of(account.pesel) for account in accounts})
+        with ExitStack() as stack:
+            for i in shard_ids:
+                stack.enter_context(self._shard_locks[i])
+            stack.enter_context(self._index_lock)
+
+            results = []
+            for account in accounts:
+                pesel = account.pesel
+                shard = self._shards[self._shard_of(pesel)]
+                if pesel in shard:
+                    results.append(False)
+                    continue
+                self._index_names(pesel, account)
+                shard[pesel] = (self._append_order(account), account)
+                results.append(True)
+        return results
 
     def get_account_by_pesel(self, pesel):
-        for account in self.accounts:
-            if account.pesel == pesel:
-                return account
-        return None
-    def get_all_accounts(self):
-        return self.accounts
-    
+        entry = self._shards[self._shard_of(pesel)].get(pesel)
+        if entry is None:
+            return self._from_snapshot("pesel", pesel) if self._snapshot is not None else None
+        return entry[1]
+
+    def get_account_by_nip(self, nip) -> Optional[CompanyAccount]:
+        entry = self._nip_index.get(nip)
+        if entry is None:
+            return self._from_snapshot("nip", nip) if self._snapshot is not None else None
+        return entry[1]
+
+    def attach_snapshot(self, snapshot: BinarySnapshot):
+        """
+        Podpina binarny snapshot jako zawartość pustego rejestru - bez tworzenia kont.
+
+        Konto ze snapshotu powstaje przy pierwszym odwołaniu po PESEL/NIP (odczyt,
+        zmiana, usunięcie) albo przy czytaniu strony, na której jest (get_accounts_page).
+        Pełna lista tworzy wszystkie pozostałe konta (load_snapshot), wyszukiwanie
+        przegląda imiona i nazwiska w kolumnach snapshotu.
+        Rejestr przejmuje snapshot - zamyka go, gdy wszystkie konta już powstały albo
+        przy clear.
+        """
+        with ExitStack() as stack:
+            self._enter_all_locks(stack)
+            if self._order_seqs or self._snapshot is not None:
+                raise ValueError("Snapshot can only be attached to an empty registry")
+            count = len(snapshot)
+            self._order_seqs = array("q", range(count))
+            self._order_accounts = [self._PENDING] * count
+            self._tombstones = 0
+            self._next_seq = count
+            if not count:
+                snapshot.close()
+                return
+            self._snapshot = snapshot
+            self._snapshot_pending = count
+
+    def load_snapshot(self):
+        """Tworzy wszystkie konta podpiętego snapshotu, których jeszcze nie ma (np. w tle po starcie)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return
+        # Wiersze paczkami pod wszystkimi blokadami - między paczkami inne wątki mają dostęp do rejestru
+        for start in range(0, len(snapshot), self.SNAPSHOT_LOAD_BATCH):
+            with ExitStack() as stack:
+                self._enter_all_locks(stack)
+                if self._snapshot is not snapshot:
+                    return
+                seqs, order = self._order_seqs, self._order_accounts
+                i = bisect_left(seqs, start)
+                while i < len(seqs) and seqs[i] < start + self.SNAPSHOT_LOAD_BATCH:
+                    if order[i] is self._PENDING:
+                        self._insert_from_snapshot(snapshot, i)
+                    i += 1
+
+    def _from_snapshot(self, field: str, value: str) -> Optional[Account]:
+        """Konto z podpiętego snapshotu, tworzone przy pierwszym odwołaniu (None gdy go tam nie ma)"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None
+
+        with ExitStack() as stack:
+            if field == "pesel":
+                i = self._shard_of(value)
+                stack.enter_context(self._shard_locks[i])
+                entries = self._shards[i]
+            else:
+                entries = self._nip_index
+            stack.enter_context(self._index_lock)
+            stack.enter_context(self._order_lock)
+
+            # Pod blokadami snapshot nie zostanie w trakcie wyszukiwania odpięty i zamknięty
+            row = snapshot.find(field, value) if self._snapshot is snapshot else None
+            seqs = self._order_seqs
+            i = bisect_left(seqs, row) if row is not None else len(seqs)
+            if i == len(seqs) or seqs[i] != row or self._order_accounts[i] is not self._PENDING:
+                # Konto już utworzone (albo utworzone i usunięte, albo rejestr wyczyszczony)
+                entry = entries.get(value)
+                return entry[1] if entry is not None else None
+            return self._insert_from_snapshot(snapshot, i)
+
+    def _insert_from_snapshot(self, snapshot: BinarySnapshot, i: int) -> Account:
+        """Tworzy konto z wiersza snapshotu dla i-tej pozycji indeksu kolejności (pod blokadami konta)"""
+        row = self._order_seqs[i]
+        account = snapshot.account(row)
+        if isinstance(account, CompanyAccount):
+            self._nip_index[account.nip] = (row, account)
+        else:
+            pesel = account.pesel
+            self._index_names(pesel, account)
+            self._shards[self._shard_of(pesel)][pesel] = (row, account)
+        self._order_accounts[i] = account
+        self._snapshot_pending -= 1
+        if not self._snapshot_pending:
+            # Wszystkie konta już powstały - snapshot nie jest potrzebny (zwalniamy mmap i plik)
+            self._snapshot = None
+            snapshot.close()
+        return account
+
+    def get_all_accounts(self) -> List[Account]:
+        """
+        Zwraca wszystkie konta (osobiste i firmowe) w kolejności dodawania.
+        Potrzebuje wszystkich kont snapshotu - strony (get_accounts_page) tworzą tylko swoje.
+        """
+        self.load_snapshot()
+        with self._order_lock:
+            return [account for account in self._order_accounts if account is not None]
+
+    def get_accounts_page(self, cursor: Optional[int] = None, limit: int = 100) -> Tuple[List[Account], Optional[int]]:
+        """
+        Strona kont w kolejności dodawania.
+
+        Args:
+            cursor: Numer kolejny ostatniego konta z poprzedniej strony (None = od początku)
+            limit: Maksymalna liczba kont na stronie
+
+        Returns:
+            Konta ze strony i kursor następnej strony (None gdy to ostatnia strona).
+            Kursor to numer kolejny, więc dodanie lub usunięcie innych kont między
+            stronami nie powoduje pominięcia ani powtórzenia konta.
+        """
+        if limit < 1:
+            raise ValueError("Page limit must be positive")
+        with ExitStack() as stack:
+            if self._snapshot is not None:
+                # Konta snapshotu ze strony powstają pod wszystkimi blokadami - pozostałe dalej czekają
+                self._enter_all_locks(stack)
+            else:
+                stack.enter_context(self._order_lock)
+                if self._snapshot is not None:
+                    # Snapshot podpięty w międzyczasie - strona od nowa, już pod wszystkimi blokadami
+                    stack.close()
+                    return self.get_accounts_page(cursor, limit)
+            snapshot = self._snapshot
+            accounts = []
+            last = 0
+            seqs, order = self._order_seqs, self._order_accounts
+            i = 0 if cursor is None else bisect_right(seqs, cursor)
+            while i < len(seqs):
+                account = order[i]
+                if account is not None:
+                    if len(accounts) == limit:
+                        return accounts, seqs[last]
+                    if account is self._PENDING:
+                        account = self._insert_from_snapshot(snapshot, i)
+                    accounts.append(account)
+                    last = i
+                i += 1
+        return accounts, None
+
+    def iter_accounts(self, page_size: int = 1000) -> Iterator[Account]:
+        """Iteruje po wszystkich kontach stronami - blokada jest trzymana tylko na czas jednej strony"""
+        cursor = None
+        while True:
+            accounts, cursor = self.get_accounts_page(cursor, page_size)
+            yield from accounts
+            if cursor is None:
+                return
+
     def get_account_count(self):
-        return len(self.accounts)
+        return sum(len(shard) for shard in self._shards) + len(self._nip_index) + self._snapshot_pending
 
     def delete_account(self, pesel):
-        for account in self.accounts:
-            if account.pesel == pesel:
-                self.accounts.remove(account)
-                return True
-        return False
+        if self._snapshot is not None:
+            self._from_snapshot("pesel", pesel)
+        i = self._shard_of(pesel)
+        with self._shard_locks[i]:
+            with self._index_lock:
+                entry = self._shards[i].pop(pesel, None)
+                if entry is None:
+                    return False
+                self._remove_order(entry[0])
+                self._first_name_index.remove(pesel)
+                self._last_name_index.remove(pesel)
+        return True
+
+    def delete_company_account(self, nip) -> bool:
+        if self._snapshot is not None:
+            self._from_snapshot("nip", nip)
+        with self._index_lock:
+            entry = self._nip_index.pop(nip, None)
+            if entry is None:
+                return False
+            self._remove_order(entry[0])
+        return True
 
     def account_with_pesel_exists(self, pesel: str) -> bool:
         """Sprawdza czy w rejestrze istnieje konto z podanym PESEL"""
-        for account in self.accounts:
-            if account.pesel == pesel:
-                return True
-        return False
\ No newline at end of file
+        if pesel in self._shards[self._shard_of(pesel)]:
+            return True
+        return self._snapshot is not None and self._from_snapshot("pesel", pesel) is not None
+
+    def update_account_names(self, pesel, first_name=None, last_name=None) -> bool:
+        """Zmienia imię i/lub nazwisko konta osobistego, aktualizując indeksy wyszukiwania"""
+        if self._snapshot is not None:
+            self._from_snapshot("pesel", pesel)
+        i = self._shard_of(pesel)
+        with self._shard_locks[i]:
+            entry = self._shards[i].get(pesel)
+            if entry is None:
+                return False
+            account = entry[1]
+            with self._index_lock, account.lock:
+                # Najpierw indeks, potem konto - błąd indeksu nie zostawia nowej nazwy bez wpisu w indeksie
+                if first_name is not None:
+                    self._first_name_index.add(pesel, first_name)
+                    account.first_name = first_name
+                if last_name is not None:
+                    self._last_name_index.add(pesel, last_name)
+                    account.last_name = last_name
+                account.mark_changed()
+        return True
+
+    def search_accounts(self, first_name=None, last_name=None, text=None, limit=50) -> List[PersonalAccount]:
+        """
+        Wyszukuje konta osobiste przez indeksy trigramowe (bez przeglądania rejestru).
+
+        Args:
+            first_name: Prefiks imienia
+            last_name: Prefiks nazwiska
+            text: Fragment (min. 3 znaki) imienia lub nazwiska
+            limit: Maksymalna liczba wyników
+
+        Returns:
+            Konta spełniające wszystkie podane kryteria, posortowane po PESEL
+        """
+        if text is not None and len(text) < NameIndex.MIN_FRAGMENT_LENGTH:
+            raise ValueError(f"Search fragment must have at least {NameIndex.MIN_FRAGMENT_LENGTH} characters")
+
+        # Konta snapshotu, które jeszcze nie powstały, sprawdzamy przed indeksami - konto
+        # utworzone w międzyczasie jest już w indeksach, więc żadne nie zostanie pominięte
+        pending = self._search_snapshot(first_name, last_name, text)
+        first_names, last_names = self._first_name_index, self._last_name_index
+        with self._index_lock:
+            # Kandydatów bierzemy z jednego indeksu (nazwisko, imię albo fragment),
+            # pozostałe kryteria sprawdzamy już tylko dla tych kandydatów.
+            # Indeksy zwracają PESEL-e rosnąco, więc wystarczy pierwszych limit trafień.
+            if last_name is not None:
+                candidates = last_names.search_prefix(last_name)
+            elif first_name is not None:
+                candidates = first_names.search_prefix(first_name)
+            elif text is not None:
+                candidates = _unique(heapq.merge(
+                    first_names.search_substring(text), last_names.search_substring(text)
+                ))
+            else:
+                return []
+
+            matches = (
+                pesel for pesel in candidates
+                if (first_name is None or first_names.has_prefix(pesel, first_name))
+                and (text is None or first_names.contains(pesel, text) or last_names.contains(pesel, text))
+            )
+            if pending:
+                # Trafienia ze snapshotu mogą powtarzać się w indeksach (konto utworzone w międzyczasie)
+                matches = _unique(heapq.merge(matches, sorted(pending)))
+            pesels = list(islice(matches, limit))
+
+        accounts = (self.get_account_by_pesel(pesel) for pesel in pesels)
+        return [account for account in accounts if account is not None]
+
+    def _search_snapshot(self, first_name, last_name, text) -> List[str]:
+        """
+        PESEL-e kont podpiętego snapshotu, które jeszcze nie powstały, spełniające kryteria
+        wyszukiwania - skan kolumn snapshotu bez tworzenia kont i bez czekania na load_snapshot.
+        """
+        snapshot = self._snapshot
+        if snapshot is None or (first_name is None and last_name is None and text is None):
+            return []
+        first_name = first_name.casefold() if first_name is not None else None
+        last_name = last_name.casefold() if last_name is not None else None
+        text = text.casefold() if text is not None else None
+
+        found = []
+        for start in range(0, len(snapshot), self.SNAPSHOT_LOAD_BATCH):
+            # Paczkami pod blokadą kolejności - w tym czasie snapshot nie zostanie zamknięty
+            with self._order_lock:
+                if self._snapshot is not snapshot:
+                    break
+                seqs, order = self._order_seqs, self._order_accounts
+                i = bisect_left(seqs, start)
+                while i < len(seqs) and seqs[i] < start + self.SNAPSHOT_LOAD_BATCH:
+                    if order[i] is self._PENDING:
+                        names = snapshot.names(seqs[i])
+                        if names is not None:
+                            first, last = names[0].casefold(), names[1].casefold()
+                            if (first_name is None or first.startswith(first_name)) \
+                                    and (last_name is None or last.startswith(last_name)) \
+                                    and (text is None or text in first or text in last):
+                                found.append(snapshot.key(seqs[i])[1])
+                    i += 1
+        return found
+
+    def clear(self):
+        """Usuwa wszystkie konta z rejestru"""
+        with ExitStack() as stack:
+            self._enter_all_locks(stack)
+            for shard in self._shards:
+                shard.clear()
+            self._nip_index.clear()
+            self._first_name_index.clear()
+            self._last_name_index.clear()
+            self._order_seqs = array("q")
+            self._order_accounts = []
+            self._tombstones = 0
+            # Konta snapshotu, które jeszcze nie powstały, znikają razem z nim
+            if self._snapshot is not None:
+                self._snapshot.close()
+            self._snapshot = None
+            self._snapshot_pending = 0
+
+
+def _unique(keys: Iterator[str]) -> Iterator[str]:
+    """Klucze z posortowanego strumienia bez powtórzeń"""
+    return (key for key, _ in groupby(keys))
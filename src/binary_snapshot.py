@@ -0,0 +1,197 @@
+from src.account import Account
+from src.company_account import CompanyAccount
+from src.personal_account import PersonalAccount
+from src.transaction_history import TransactionHistory
+from array import array
+from typing import Iterable, Optional, Tuple
+import mmap
+import os
+import struct
+
+
+class BinarySnapshot:
+    """
+    Binarny snapshot rejestru czytany przez mmap.
+
+    Kolumny o stałej szerokości (typ konta, identyfikator, saldo) i bloby
+    (historia, napisy) z tablicami przesunięć - odczyt konta to kilka wycinków
+    pamięci, bez parsowania całego pliku. Otwarcie pliku nie tworzy żadnych kont;
+    konto powstaje dopiero w account(row).
+
+    Układ pliku (little-endian, sekcje wyrównane do 8 B):
+        nagłówek: MAGIC, wersja, liczba kont, przesunięcia sekcji
+        types       N x uint8     0 - konto osobiste, 1 - firmowe
+        keys        N x 11 B      PESEL albo NIP (dopełniony zerami; dłuższy klucz - błąd zapisu)
+        sorted      N x uint32    numery wierszy posortowane po (typ, identyfikator)
+        balances    N x float64
+        history_at  (N+1) x uint64  początek historii wiersza w blobie historii
+        history     float64       wpisy historii wszystkich kont
+        strings_at  (N+1) x uint64  początek napisów wiersza w blobie napisów
+        strings     UTF-8         imię, nazwisko[, kod promocyjny] albo nazwa firmy, rozdzielone \\0
+
+    Wiersze są w kolejności dodania kont, więc numer wiersza jest też ich kolejnością.
+    """
+
+    MAGIC = b"BANKSNAP"
+    VERSION = 1
+    KEY_WIDTH = 11
+    PERSONAL, COMPANY = 0, 1
+    SECTIONS = ("types", "keys", "sorted", "balances", "history_at", "history", "strings_at", "strings")
+    _HEADER = struct.Struct("<8sIQ" + "Q" * len(SECTIONS))
+
+    def __init__(self, path: str):
+        """Otwiera snapshot (mmap tylko do odczytu)"""
+        self.path = path
+        self._file = open(path, "rb")
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, *offsets = self._HEADER.unpack_from(self._mmap)
+        if magic != self.MAGIC or version != self.VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a bank snapshot (version {self.VERSION})")
+        self.count = count
+
+        view = memoryview(self._mmap)
+        ends = offsets[1:] + [len(self._mmap)]
+        sections = {name: view[start:end] for name, start, end in zip(self.SECTIONS, offsets, ends)}
+        self._types = sections["types"][:count]
+        self._keys = sections["keys"][:count * self.KEY_WIDTH]
+        self._sorted = sections["sorted"][:count * 4].cast("I")
+        self._balances = sections["balances"][:count * 8].cast("d")
+        self._history_at = sections["history_at"][:(count + 1) * 8].cast("Q")
+        self._history = sections["history"].cast("d")
+        self._strings_at = sections["strings_at"][:(count + 1) * 8].cast("Q")
+        self._strings = sections["strings"]
+
+    def __len__(self):
+        return self.count
+
+    def _raw_key(self, row: int) -> bytes:
+        return bytes(self._keys[row * self.KEY_WIDTH:(row + 1) * self.KEY_WIDTH])
+
+    def key(self, row: int) -> Tuple[str, str]:
+        """Identyfikator konta z wiersza: ("pesel", ...) albo ("nip", ...)"""
+        raw = self._raw_key(row).rstrip(b"\0").decode()
+        return ("nip", raw) if self._types[row] == self.COMPANY else ("pesel", raw)
+
+    def find(self, field: str, value: str) -> Optional[int]:
+        """Numer wiersza konta o podanym PESEL/NIP - wyszukiwanie binarne po kolumnie sorted"""
+        if not isinstance(value, str):
+            return None
+        wanted = (self.COMPANY if field == "nip" else self.PERSONAL,
+                  value.encode().ljust(self.KEY_WIDTH, b"\0"))
+        if len(wanted[1]) != self.KEY_WIDTH:
+            return None
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            row = self._sorted[middle]
+            if (self._types[row], self._raw_key(row)) < wanted:
+                low = middle + 1
+            else:
+                high = middle
+        if low < self.count:
+            row = self._sorted[low]
+            if (self._types[row], self._raw_key(row)) == wanted:
+                return row
+        return None
+
+    def names(self, row: int) -> Optional[Tuple[str, str]]:
+        """Imię i nazwisko z wiersza konta osobistego (None dla konta firmowego) - bez tworzenia konta"""
+        if self._types[row] != self.PERSONAL:
+            return None
+        fields = bytes(self._strings[self._strings_at[row]:self._strings_at[row + 1]]).decode().split("\0")
+        return fields[0], fields[1]
+
+    def account(self, row: int) -> Account:
+        """Tworzy obiekt konta z wiersza (bez konstruktora - jak from_dict)"""
+        amounts = self._history[self._history_at[row]:self._history_at[row + 1]].tolist()
+        fields = bytes(self._strings[self._strings_at[row]:self._strings_at[row + 1]]).decode().split("\0")
+        balance = self._balances[row]
+        field, value = self.key(row)
+
+        if field == "nip":
+            history = TransactionHistory.from_floats(amounts, tracked_amounts=(CompanyAccount.ZUS_PAYMENT,))
+            account = CompanyAccount._hydrate(balance, history)
+            account.company_name = fields[0]
+            account.nip = value
+            return account
+
+        account = PersonalAccount._hydrate(balance, TransactionHistory.from_floats(amounts))
+        account.first_name = fields[0]
+        account.last_name = fields[1]
+        account.pesel = value
+        account.promo_code = fields[2] if len(fields) > 2 else None
+        return account
+
+    def close(self):
+        # Widoki memoryview trzymają mmap - zwalniamy je przed zamknięciem
+        for name in ("_types", "_keys", "_sorted", "_balances", "_history_at", "_history", "_strings_at", "_strings"):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+        self._mmap.close()
+        self._file.close()
+
+    @classmethod
+    def write(cls, path: str, accounts: Iterable[Account]) -> int:
+        """
+        Zapisuje konta do pliku snapshotu (przez plik tymczasowy i os.replace).
+
+        Returns:
+            Liczba zapisanych kont
+
+        Raises:
+            ValueError: PESEL/NIP konta nie mieści się w KEY_WIDTH bajtach
+                (ucięty kolidowałby z kluczem innego konta)
+        """
+        types = bytearray()
+        keys = bytearray()
+        balances = array("d")
+        history_at = array("Q", [0])
+        history = array("d")
+        strings_at = array("Q", [0])
+        strings = bytearray()
+
+        for account in accounts:
+            with account.lock:
+                if isinstance(account, CompanyAccount):
+                    types.append(cls.COMPANY)
+                    key = account.nip
+                    fields = [account.company_name]
+                else:
+                    types.append(cls.PERSONAL)
+                    key = account.pesel
+                    fields = [account.first_name, account.last_name]
+                    if account.promo_code is not None:
+                        fields.append(account.promo_code)
+                balances.append(account.balance)
+                history.extend(account.history.last(len(account.history)))
+            raw = key.encode()
+            if len(raw) > cls.KEY_WIDTH or b"\0" in raw:
+                raise ValueError(f"Account key {key!r} does not fit in the snapshot ({cls.KEY_WIDTH} bytes)")
+            keys += raw.ljust(cls.KEY_WIDTH, b"\0")
+            history_at.append(len(history))
+            strings += "\0".join(fields).encode()
+            strings_at.append(len(strings))
+
+        count = len(types)
+        width = cls.KEY_WIDTH
+        order = sorted(range(count), key=lambda row: (types[row], keys[row * width:(row + 1) * width]))
+        sections = [types, keys, array("I", order), balances, history_at, history, strings_at, strings]
+
+        offsets = []
+        position = cls._HEADER.size
+        for section in sections:
+            position += -position % 8
+            offsets.append(position)
+            position += len(section) * getattr(section, "itemsize", 1)
+
+        with open(path + ".tmp", "wb") as f:
+            f.write(cls._HEADER.pack(cls.MAGIC, cls.VERSION, count, *offsets))
+            for offset, section in zip(offsets, sections):
+                f.write(b"\0" * (offset - f.tell()))
+                f.write(section if isinstance(section, bytearray) else section.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        return count
@@ -0,0 +1,110 @@
+from collections import deque
+from typing import Dict
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Bezpiecznik dla wywołań zewnętrznej usługi.
+
+    CLOSED - wywołania przechodzą; wyniki ostatnich window_size wywołań są liczone
+    i gdy (przy co najmniej min_calls wynikach) udział błędów przekroczy
+    failure_rate_threshold, bezpiecznik się otwiera.
+    OPEN - wywołania są od razu odrzucane (allow() zwraca False) przez open_seconds.
+    HALF_OPEN - po tym czasie przepuszczane jest do half_open_max_calls próbnych
+    wywołań: sukces zamyka bezpiecznik, błąd otwiera go ponownie.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_rate_threshold: float = 0.5, window_size: int = 20, min_calls: int = 5,
+                 open_seconds: float = 30.0, half_open_max_calls: int = 1):
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        # Wyniki ostatnich wywołań w stanie CLOSED (True = błąd)
+        self._window = deque(maxlen=window_size)
+        self._opened_at = 0.0
+        self._probes = 0
+        self._successes = 0
+        self._failures = 0
+        self._rejected = 0
+        self._opened = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> str:
+        """Stan z uwzględnieniem upływu czasu (OPEN -> HALF_OPEN), wywoływane pod _lock"""
+        if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = self.HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def allow(self) -> bool:
+        """Czy wywołanie może przejść - po True wywołujący musi zgłosić wynik (record_success/record_failure)"""
+        with self._lock:
+            state = self._current_state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            self._rejected += 1
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._successes += 1
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._window.clear()
+            elif self._state == self.CLOSED:
+                self._window.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN:
+                self._open()
+            elif self._state == self.CLOSED:
+                self._window.append(True)
+                if len(self._window) >= self.min_calls and \
+                        sum(self._window) / len(self._window) >= self.failure_rate_threshold:
+                    self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = time.monotonic()
+        self._opened += 1
+        self._window.clear()
+
+    def reset(self):
+        """Zamyka bezpiecznik i zeruje liczniki"""
+        with self._lock:
+            self._state = self.CLOSED
+            self._window.clear()
+            self._probes = 0
+            self._successes = self._failures = self._rejected = self._opened = 0
+
+    def stats(self) -> Dict:
+        """Stan bezpiecznika i liczniki: sukcesy, błędy, odrzucone wywołania, liczba otwarć"""
+        with self._lock:
+            window = len(self._window)
+            return {
+                "state": self._current_state(),
+                "successes": self._successes,
+                "failures": self._failures,
+                "rejected": self._rejected,
+                "opened": self._opened,
+                "failure_rate": sum(self._window) / window if window else 0.0,
+            }
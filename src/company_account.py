@@ -1,13 +1,19 @@
 from src.account import Account
+from src.transaction_history import TransactionHistory
+from src.nip_validator import mf_validator
 from smtp.smtp import SMTPClient
-import requests
-import os
 from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
 
 
 class CompanyAccount(Account):
+    __slots__ = ("company_name", "nip")
+
+    ZUS_PAYMENT = -1775
+
     def __init__(self, company_name, nip):
         super().__init__()
+        self.history = self._create_history()
         self.company_name = company_name
         self.nip = nip if len(nip) == 10 else "Invalid"
         
@@ -18,67 +24,71 @@ class CompanyAccount(Account):
 
     def _validate_nip_with_mf(self, nip: str) -> bool:
         """
-        Waliduje NIP poprzez API Ministerstwa Finansów
+        Waliduje NIP poprzez API Ministerstwa Finansów (wspólny walidator z cache)
         Zwraca True jeśli statusVat = "Czynny", False inaczej
         """
-        try:
-            # Pobierz URL z zmiennej środowiskowej (default: test API)
-            mf_url = os.getenv("BANK_APP_MF_URL", "https://wl-test.mf.gov.pl")
-            
-            # Przygotuj datę w formacie YYYY-MM-DD
-            today = datetime.now().strftime("%Y-%m-%d")
-            
-            # Endpoint do sprawdzenia NIPu
-            endpoint = f"{mf_url}/api/search/nip/{nip}"
-            params = {"date": today}
-            
-            # Wyślij request
-            response = requests.get(endpoint, params=params, timeout=5)
-            
-            # Wypisz response w logach
-            print(f"[MF API Response for NIP {nip}]: {response.text}")
-            
-            # Sprawdź czy response jest poprawny
-            if response.status_code == 200:
-                data = response.json()
-                # Szukamy result.subject.statusVat: "Czynny"
-                if "result" in data and data["result"]:
-                    result = data["result"]
-                    subject = result.get("subject")
-                    
-                    # Jeśli subject jest null - NIP nie istnieje
-                    if subject is None:
-                        return False
-                    
-                    # Sprawdź statusVat
-                    status_vat = subject.get("statusVat", "")
-                    return status_vat == "Czynny"
-            
-            return False
-        except Exception as e:
-            print(f"[MF API Error for NIP {nip}]: {str(e)}")
-            return False
+        return mf_validator.is_active(nip)
+
+    @classmethod
+    def create_many(cls, companies: Iterable[Tuple[str, str]]) -> List[Optional["CompanyAccount"]]:
+        """
+        Zakłada wiele kont firmowych naraz - NIP-y są sprawdzane w API MF zapytaniami
+        zbiorczymi (mf_validator.are_active) zamiast jednego zapytania na konto.
+
+        Args:
+            companies: Pary (nazwa firmy, NIP)
+
+        Returns:
+            Konta w kolejności z wejścia; None tam, gdzie konstruktor rzuciłby
+            ValueError (firma nie jest czynnym podatnikiem VAT)
+        """
+        companies = list(companies)
+        statuses = mf_validator.are_active(nip for _, nip in companies if len(nip) == 10)
+
+        accounts = []
+        for company_name, nip in companies:
+            if len(nip) != 10:
+                # Jak w konstruktorze: NIP o złej długości nie jest sprawdzany w MF
+                accounts.append(cls(company_name, nip))
+            elif statuses[nip]:
+                # NIP już sprawdzony - bez konstruktora, żeby nie pytać MF drugi raz
+                account = cls._hydrate(0.0, cls._create_history())
+                account.company_name = company_name
+                account.nip = nip
+                accounts.append(account)
+            else:
+                accounts.append(None)
+        return accounts
 
     def express_outgoing_comp(self, amount):
         fee = 5.0
         total_amount = amount + fee
-        if (amount > 0 and total_amount <= self.balance + fee):
-            self.balance -= total_amount
+        with self.lock:
+            if (amount > 0 and total_amount <= self.balance + fee):
+                self.balance -= total_amount
+                self.mark_changed()
+
+    @classmethod
+    def _create_history(cls, amounts=()) -> TransactionHistory:
+        """Historia z licznikiem wpłat do ZUS aktualizowanym przy każdym wpisie"""
+        return TransactionHistory(amounts, tracked_amounts=(cls.ZUS_PAYMENT,))
 
     def _has_sufficient_balance(self, amount: float) -> bool:
         """Sprawdza czy saldo >= 2x kwota kredytu"""
         return self.balance >= 2 * amount
 
     def _has_zus_payment(self) -> bool:
-        """Sprawdza czy w historii jest wpłata do ZUS (-1775)"""
-        return -1775 in self.history
+        """Sprawdza czy w historii jest wpłata do ZUS (-1775) - licznik historii, O(1)"""
+        return self.history.count(self.ZUS_PAYMENT) > 0
 
     def take_loan(self, amount: float) -> bool:
         """Składa wniosek o kredyt firmowy"""
-        if self._has_sufficient_balance(amount) and self._has_zus_payment():
-            self.balance += amount
-            return True
-        return False
+        with self.lock:
+            if self._has_sufficient_balance(amount) and self._has_zus_payment():
+                self.balance += amount
+                self.mark_changed()
+                return True
+            return False
     
     def send_history_via_email(self, email_address: str) -> bool:
         """
@@ -90,37 +100,39 @@ class CompanyAccount(Account):
         Returns:
             True jeśli wysłanie się powiodło, False w przeciwnym razie
         """
-        # Przygotuj datę w formacie YYYY-MM-DD
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        # Przygotuj temat i treść maila
-        subject = f"Account Transfer History {today}"
-        text = f"Company account history: {self.history}"
-        
+        subject, text = self._history_email()
+
         # Wyślij email przez SMTP client
         smtp_client = SMTPClient()
         return smtp_client.send(subject, text, email_address)
+
+    def _history_email(self, statement=None):
+        """Temat i treść maila z historią konta (z wyciągiem w załączniku treść tylko go opisuje)"""
+        # Przygotuj datę w formacie YYYY-MM-DD
+        today = datetime.now().strftime("%Y-%m-%d")
+        subject = f"Account Transfer History {today}"
+        if statement is not None:
+            return subject, f"Company account history: {len(statement)} entries in the attached {statement.filename}"
+        return subject, f"Company account history: {self.history}"
     
-    def to_dict(self):
-        """Konwertuje konto do słownika dla MongoDB"""
-        return {
+    def to_dict(self, include_history=True):
+        """Konwertuje konto do słownika (bez historii, gdy jest zapisywana osobno)"""
+        data = {
             "type": "company",
             "company_name": self.company_name,
             "nip": self.nip,
-            "balance": self.balance,
-            "history": self.history
+            "balance": self.balance
         }
+        if include_history:
+            data["history"] = self.history.tolist()
+        return data
     
     @staticmethod
     def from_dict(data):
         """Tworzy CompanyAccount ze słownika"""
-        # Tworzymy konto z wymuszonym pominięciem walidacji NIP (dane z bazy są zaufane)
-        account = object.__new__(CompanyAccount)
-        Account.__init__(account)  # Inicjalizujemy bazową klasę Account
-        
+        # Bez konstruktora - pomijamy walidację NIP w API MF (dane z bazy są zaufane)
+        history = TransactionHistory.from_floats(data["history"], tracked_amounts=(CompanyAccount.ZUS_PAYMENT,))
+        account = CompanyAccount._hydrate(data["balance"], history)
         account.company_name = data["company_name"]
         account.nip = data["nip"]
-        account.balance = data["balance"]
-        account.history = data["history"]
-        
         return account
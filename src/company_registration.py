@@ -0,0 +1,131 @@
+from src.company_account import CompanyAccount
+from collections import deque
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+import queue
+import threading
+import uuid
+
+
+class CompanyRegistrationQueue:
+    """
+    Asynchroniczne zakładanie kont firmowych.
+
+    submit() tylko zapisuje zlecenie i oddaje je do puli wątków - walidacja NIP
+    w API MF (konstruktor CompanyAccount) i dodanie konta do rejestru dzieją się
+    w tle. Stan zlecenia: pending -> running -> completed albo failed (z opisem błędu).
+
+    Pamiętanych jest najwyżej max_jobs zakończonych zleceń; przy przepełnieniu
+    usuwane są najstarsze. Zleceń w toku (czekających i walidowanych) może być
+    najwyżej max_pending - kolejne są odrzucane (queue.Full), jak w EmailDispatcher.
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(self, registry, workers: int = 4, max_jobs: int = 10_000, max_pending: int = 1000):
+        """
+        Args:
+            registry: AccountRegistry (albo AccountJournal), do którego trafiają konta
+            workers: Liczba wątków walidujących NIP
+            max_jobs: Maksymalna liczba pamiętanych zleceń
+            max_pending: Maksymalna liczba zleceń w toku (kolejka puli wątków)
+        """
+        if max_pending < 1:
+            raise ValueError("max_pending must be positive")
+        self.registry = registry
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="company-registration")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Dict] = {}
+        # Zlecenia w toku (future) - ich liczba ogranicza przyjmowanie nowych
+        self._pending = set()
+        self._in_flight = 0
+        # Zakończone zlecenia w kolejności zakończenia - kandydaci do usunięcia
+        self._finished = deque()
+
+    def submit(self, company_name: str, nip: str) -> str:
+        """
+        Przyjmuje zlecenie założenia konta firmowego; zwraca identyfikator zlecenia.
+
+        Raises:
+            queue.Full: W toku jest już max_pending zleceń
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                raise queue.Full
+            self._in_flight += 1
+            self._jobs[job_id] = {"id": job_id, "state": self.PENDING, "company_name": company_name, "nip": nip}
+            self._evict_finished()
+        try:
+            future = self._executor.submit(self._run, job_id, company_name, nip)
+        except BaseException:
+            with self._lock:
+                self._in_flight -= 1
+                self._jobs.pop(job_id, None)
+            raise
+        with self._lock:
+            self._pending.add(future)
+        future.add_done_callback(self._discard)
+        return job_id
+
+    def _discard(self, future):
+        with self._lock:
+            self._pending.discard(future)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        """Kopia stanu zlecenia albo None dla nieznanego identyfikatora"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _run(self, job_id: str, company_name: str, nip: str):
+        try:
+            self._register(job_id, company_name, nip)
+        finally:
+            # Miejsce zwalniane przed zakończeniem future - wait() widzi już wolne miejsce
+            with self._lock:
+                self._in_flight -= 1
+
+    def _register(self, job_id: str, company_name: str, nip: str):
+        self._update(job_id, state=self.RUNNING)
+        try:
+            account = CompanyAccount(company_name, nip)
+        except ValueError as e:
+            self._update(job_id, state=self.FAILED, error=str(e))
+            return
+        except Exception as e:
+            self._update(job_id, state=self.FAILED, error=f"Registration failed: {e}")
+            return
+
+        if not self.registry.try_add_account(account):
+            self._update(job_id, state=self.FAILED, error=f"Account with NIP {nip} already exists")
+            return
+        self._update(job_id, state=self.COMPLETED)
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+                if job["state"] in (self.COMPLETED, self.FAILED):
+                    self._finished.append(job_id)
+
+    def _evict_finished(self):
+        """Usuwa najstarsze zakończone zlecenia ponad max_jobs (wywoływane pod _lock)"""
+        while len(self._jobs) > self.max_jobs and self._finished:
+            self._jobs.pop(self._finished.popleft(), None)
+
+    def wait(self, timeout: Optional[float] = None):
+        """Czeka na zakończenie przyjętych zleceń (testy, zamykanie aplikacji)"""
+        with self._lock:
+            pending = list(self._pending)
+        futures.wait(pending, timeout)
+
+    def close(self):
+        self._executor.shutdown(wait=True)
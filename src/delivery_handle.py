@@ -0,0 +1,59 @@
+from typing import Dict, Iterable, Optional
+import threading
+import uuid
+
+
+class DeliveryHandle:
+    """
+    Uchwyt wysyłki wiadomości przez EmailDispatcher.
+
+    Stan: queued -> sending -> sent (dotarła do wszystkich adresatów), failed
+    (do żadnego) albo partial. Wynik jest zapisywany osobno dla każdego adresata.
+    """
+
+    QUEUED = "queued"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    PARTIAL = "partial"
+
+    def __init__(self, recipients: Iterable[str]):
+        self.id = uuid.uuid4().hex
+        self.state = self.QUEUED
+        self.attempts = 0
+        # Adresat -> "pending", "sent" albo opis błędu
+        self._results: Dict[str, str] = dict.fromkeys(recipients, "pending")
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def pending(self):
+        """Adresaci, do których wiadomość jeszcze nie dotarła"""
+        with self._lock:
+            return [recipient for recipient, result in self._results.items() if result == "pending"]
+
+    def _record(self, recipient: str, result: str):
+        with self._lock:
+            self._results[recipient] = result
+
+    def _finish(self):
+        """Ustala stan końcowy po ostatniej próbie (wywołuje dispatcher)"""
+        with self._lock:
+            sent = sum(1 for result in self._results.values() if result == "sent")
+            if sent == len(self._results):
+                self.state = self.SENT
+            elif sent == 0:
+                self.state = self.FAILED
+            else:
+                self.state = self.PARTIAL
+        self._done.set()
+
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Czeka na zakończenie wysyłki; zwraca True gdy się zakończyła"""
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {"id": self.id, "state": self.state, "attempts": self.attempts, "recipients": dict(self._results)}
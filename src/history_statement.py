@@ -0,0 +1,66 @@
+from src.transaction_history import TransactionHistory
+from typing import Iterator, Optional
+import zlib
+
+
+class HistoryStatement:
+    """
+    Wyciąg z historii konta generowany kawałkami.
+
+    Historia jest czytana po chunk_size wpisów i każdy kawałek od razu zamieniany
+    na tekst (CSV albo zwykły tekst), więc w pamięci jest naraz najwyżej jeden
+    kawałek - niezależnie od długości historii. Z compress=True wyciąg jest
+    kompresowany gzipem w trakcie generowania (do wysłania jako załącznik .gz).
+
+    Zakres [start, stop) to pozycje wpisów w historii (jak wycinek listy, także
+    ujemne). Historia nie ma dat, więc zakres dat nie jest obsługiwany.
+    """
+
+    FORMATS = {"csv": ("csv", "text/csv"), "text": ("txt", "text/plain")}
+
+    def __init__(self, history: TransactionHistory, start: int = 0, stop: Optional[int] = None,
+                 fmt: str = "csv", compress: bool = False, chunk_size: int = 10_000):
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unknown statement format: {fmt}")
+        if chunk_size <= 0:
+            raise ValueError("chunk_size must be positive")
+        self.history = history
+        # Zakres ustalony przy tworzeniu - wpisy dopisane w trakcie wysyłki nie wchodzą do wyciągu
+        self.start, self.stop, _ = slice(start, stop).indices(len(history))
+        self.fmt = fmt
+        self.compress = compress
+        self.chunk_size = chunk_size
+
+    def __len__(self):
+        return max(0, self.stop - self.start)
+
+    @property
+    def filename(self) -> str:
+        extension = self.FORMATS[self.fmt][0]
+        return f"history.{extension}.gz" if self.compress else f"history.{extension}"
+
+    @property
+    def content_type(self) -> str:
+        return "application/gzip" if self.compress else self.FORMATS[self.fmt][1]
+
+    def chunks(self) -> Iterator[str]:
+        """Wyciąg jako tekst, po jednym kawałku historii"""
+        yield "entry,amount\n" if self.fmt == "csv" else f"{'entry':>10}  {'amount':>14}\n"
+        line = "{},{:.2f}\n" if self.fmt == "csv" else "{:>10}  {:>14.2f}\n"
+        position = self.start
+        for amounts in self.history.chunks(self.start, self.stop, self.chunk_size):
+            yield "".join(line.format(position + i, amount) for i, amount in enumerate(amounts))
+            position += len(amounts)
+
+    def encoded(self) -> Iterator[bytes]:
+        """Wyciąg jako bajty UTF-8 (skompresowane gzipem dla compress=True)"""
+        # wbits=31 - nagłówek i suma kontrolna gzip, plik rozpakowuje gunzip
+        compressor = zlib.compressobj(wbits=31) if self.compress else None
+        for chunk in self.chunks():
+            data = chunk.encode()
+            if compressor is not None:
+                data = compressor.compress(data)
+            if data:
+                yield data
+        if compressor is not None:
+            yield compressor.flush()
@@ -0,0 +1,199 @@
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import threading
+import time
+
+
+class Metrics:
+    """
+    Metryki aplikacji eksportowane w formacie tekstowym Prometheusa.
+
+    Rodziny metryk deklaruje moduł, który je zapisuje (counter, gauge, histogram),
+    a wartości są trzymane osobno dla każdej krotki wartości etykiet. Gauge może
+    mieć funkcję liczoną dopiero przy eksporcie (np. liczba kont w rejestrze).
+
+    Zapis (inc/observe) jest na gorącej ścieżce każdego żądania, więc robi tylko
+    wyszukanie kubełka (bisect) i dodawanie pod jedną blokadą - bez alokacji poza
+    pierwszym użyciem serii. Histogram trzyma liczniki kubełków, a p50/p95/p99 są
+    szacowane z kubełków przy eksporcie (interpolacja jak histogram_quantile).
+    """
+
+    # Granice kubełków czasu (s) - od 0.1 ms (typowe żądanie do rejestru) do 10 s
+    DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                       0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+    QUANTILES = (0.5, 0.95, 0.99)
+
+    def __init__(self, prefix: str = "bank_"):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        # nazwa -> {"kind", "help", "labels", "buckets", "function", "series": {etykiety: wartość}}
+        self._families: Dict[str, Dict] = {}
+
+    def _declare(self, name: str, kind: str, help: str, labels: Iterable[str], **extra) -> None:
+        with self._lock:
+            family = self._families.get(name)
+            if family is not None:
+                # Ponowna deklaracja (np. drugi import modułu) - ta sama rodzina
+                if family["kind"] != kind:
+                    raise ValueError(f"Metric {name} is already declared as {family['kind']}")
+                return
+            self._families[name] = {"kind": kind, "help": help, "labels": tuple(labels), "series": {}, **extra}
+
+    def counter(self, name: str, help: str, labels: Iterable[str] = ()):
+        self._declare(name, "counter", help, labels)
+
+    def gauge(self, name: str, help: str, labels: Iterable[str] = (), function: Optional[Callable[[], float]] = None):
+        """Gauge ustawiany przez set/inc albo (function) liczony przy eksporcie"""
+        self._declare(name, "gauge", help, labels, function=function)
+
+    def histogram(self, name: str, help: str, labels: Iterable[str] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self._declare(name, "histogram", help, labels, buckets=tuple(sorted(buckets)))
+
+    def inc(self, name: str, labels: Tuple = (), amount: float = 1):
+        """Zwiększa licznik albo gauge (amount=-1 zmniejsza gauge)"""
+        series = self._families[name]["series"]
+        # acquire/release zamiast with - na gorącej ścieżce to połowa kosztu blokady
+        self._lock.acquire()
+        try:
+            series[labels] = series.get(labels, 0) + amount
+        finally:
+            self._lock.release()
+
+    def set(self, name: str, value: float, labels: Tuple = ()):
+        series = self._families[name]["series"]
+        with self._lock:
+            series[labels] = value
+
+    def observe(self, name: str, value: float, labels: Tuple = ()):
+        """Dopisuje pomiar do histogramu"""
+        family = self._families[name]
+        buckets = family["buckets"]
+        # Kubełek "le": pierwsza granica >= value (ostatni = +Inf)
+        index = bisect_left(buckets, value)
+        series = family["series"]
+        self._lock.acquire()
+        try:
+            counts = series.get(labels)
+            if counts is None:
+                # Liczniki kubełków (nieskumulowane), +Inf i na końcu suma pomiarów
+                counts = series[labels] = [0] * (len(buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+        finally:
+            self._lock.release()
+
+    @contextmanager
+    def timer(self, name: str, labels: Tuple = ()):
+        """Mierzy czas bloku with i dopisuje go do histogramu (także gdy blok rzuci wyjątek)"""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start_time, labels)
+
+    def value(self, name: str, labels: Tuple = ()) -> float:
+        """Bieżąca wartość licznika albo gauge (0 gdy seria nie istnieje)"""
+        family = self._families[name]
+        if family.get("function") is not None:
+            return family["function"]()
+        with self._lock:
+            return family["series"].get(labels, 0)
+
+    def count(self, name: str, labels: Tuple = ()) -> int:
+        """Liczba pomiarów w serii histogramu"""
+        with self._lock:
+            counts = self._families[name]["series"].get(labels)
+            return sum(counts[:-1]) if counts else 0
+
+    def total(self, name: str) -> int:
+        """Liczba pomiarów we wszystkich seriach histogramu"""
+        with self._lock:
+            return sum(sum(counts[:-1]) for counts in self._families[name]["series"].values())
+
+    def quantile(self, name: str, q: float, labels: Tuple = ()) -> Optional[float]:
+        """Szacowany kwantyl histogramu (None gdy brak pomiarów)"""
+        family = self._families[name]
+        with self._lock:
+            counts = family["series"].get(labels)
+            counts = list(counts) if counts else None
+        return self._estimate(family["buckets"], counts, q) if counts else None
+
+    @staticmethod
+    def _estimate(buckets: Tuple[float, ...], counts: List, q: float) -> Optional[float]:
+        total = sum(counts[:-1])
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, bound in enumerate(buckets):
+            if seen + counts[i] >= rank:
+                lower = buckets[i - 1] if i else 0.0
+                # Interpolacja liniowa w obrębie kubełka
+                return lower + (bound - lower) * ((rank - seen) / counts[i] if counts[i] else 0)
+            seen += counts[i]
+        # Kwantyl w kubełku +Inf - najlepsze oszacowanie to najwyższa granica
+        return buckets[-1]
+
+    def clear(self):
+        """Zeruje wszystkie serie (deklaracje rodzin zostają)"""
+        with self._lock:
+            for family in self._families.values():
+                family["series"].clear()
+
+    def render(self) -> str:
+        """Wszystkie metryki w formacie tekstowym Prometheusa (text/plain; version=0.0.4)"""
+        with self._lock:
+            families = [
+                (name, family, {labels: list(value) if isinstance(value, list) else value
+                                for labels, value in family["series"].items()})
+                for name, family in sorted(self._families.items())
+            ]
+        lines = []
+        for name, family, series in families:
+            full_name = self.prefix + name
+            lines.append(f"# HELP {full_name} {family['help']}")
+            lines.append(f"# TYPE {full_name} {family['kind']}")
+            label_names = family["labels"]
+            if family.get("function") is not None:
+                series = {(): family["function"]()}
+            if family["kind"] != "histogram":
+                for labels, value in sorted(series.items()):
+                    lines.append(f"{full_name}{_labels(label_names, labels)} {_number(value)}")
+                continue
+
+            buckets = family["buckets"]
+            quantiles = []
+            for labels, counts in sorted(series.items()):
+                cumulative = 0
+                for bound, count in zip(buckets + (float("inf"),), counts):
+                    cumulative += count
+                    le = _labels(label_names + ("le",), labels + ("+Inf" if bound == float("inf") else _number(bound),))
+                    lines.append(f"{full_name}_bucket{le} {cumulative}")
+                lines.append(f"{full_name}_sum{_labels(label_names, labels)} {_number(counts[-1])}")
+                lines.append(f"{full_name}_count{_labels(label_names, labels)} {cumulative}")
+                for q in self.QUANTILES:
+                    estimate = self._estimate(buckets, counts, q)
+                    quantiles.append(f"{full_name}_quantile{_labels(label_names + ('quantile',), labels + (str(q),))} "
+                                     f"{_number(estimate)}")
+            if quantiles:
+                # p50/p95/p99 szacowane z kubełków - osobna rodzina, histogram nie może mieć próbek z "quantile"
+                lines.append(f"# HELP {full_name}_quantile {family['help']} (estimated quantiles)")
+                lines.append(f"# TYPE {full_name}_quantile gauge")
+                lines.extend(quantiles)
+        return "\n".join(lines) + "\n"
+
+
+def _labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for value in values)
+    return "{" + ",".join(f'{name}="{value}"' for name, value in zip(names, escaped)) + "}"
+
+
+def _number(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+# Wspólne metryki procesu - zapisują je moduły aplikacji, eksportuje GET /api/metrics
+metrics = Metrics()
@@ -1,13 +1,37 @@
-from pymongo import MongoClient
+from functools import partial
+from itertools import islice
+
+from pymongo import DeleteMany, DeleteOne, MongoClient, ReplaceOne, UpdateOne
 
 
 class MongoAccountsRepository:
-    """Repository dla zarządzania kontami w MongoDB"""
-    
+    """
+    Repository dla zarządzania kontami w MongoDB.
+
+    Dokument konta nie zawiera historii - historia jest w osobnej kolekcji
+    "history_buckets", podzielona na kubełki po HISTORY_BUCKET_SIZE wpisów:
+    {"pesel"/"nip": ..., "bucket": numer, "count": liczba wpisów, "amounts": [...]}.
+    Zapis dopisuje tylko nowe wpisy ($push do ostatniego kubełka), a przy
+    ładowaniu kont osobistych wczytywany jest tylko najnowszy kubełek.
+    """
+
+    # Maksymalna liczba kont w jednej paczce bulk_write
+    BULK_BATCH_SIZE = 1000
+    # Liczba dokumentów w jednej paczce kursora przy ładowaniu
+    LOAD_BATCH_SIZE = 2000
+    # Liczba wpisów historii w jednym kubełku
+    HISTORY_BUCKET_SIZE = 500
+    # Pola potrzebne do odtworzenia kont (bez _id); "history" - dokumenty sprzed kubełków
+    LOAD_PROJECTION = {
+        "_id": False, "type": True, "balance": True, "history": True, "history_count": True,
+        "first_name": True, "last_name": True, "pesel": True, "promo_code": True,
+        "company_name": True, "nip": True,
+    }
+
     def __init__(self, connection_string="mongodb://localhost:27017/", database_name="bank_app"):
         """
         Inicjalizuje połączenie z MongoDB
-        
+
         Args:
             connection_string: String połączenia do MongoDB
             database_name: Nazwa bazy danych
@@ -15,53 +39,272 @@ class MongoAccountsRepository:
         self.client = MongoClient(connection_string)
         self.db = self.client[database_name]
         self._collection = self.db["accounts"]
-    
+        self._history = self.db["history_buckets"]
+        # Stan ostatniego zapisu: klucz dokumentu -> (konto, zapisana wersja, liczba zapisanych wpisów historii)
+        self._saved = {}
+        self._synced = False
+
     def save_all(self, accounts):
         """
-        Zapisuje wszystkie konta do bazy danych.
-        Przed zapisem czyści kolekcję (tylko aktualne konta).
-        
+        Zapisuje konta do bazy danych przyrostowo.
+
+        Wysyłane są tylko konta nowe i zmienione od ostatniego zapisu (licznik
+        Account.version) oraz usunięcia kont, których już nie ma na liście.
+        Z historii wysyłane są tylko wpisy dopisane od ostatniego zapisu.
+        Operacje idą paczkami przez bulk_write(ordered=False), więc kolekcja
+        nigdy nie jest w całości wyczyszczona. Pierwszy zapis (bez wcześniejszego
+        save_all/load_all) dodatkowo usuwa z bazy konta spoza listy.
+
         Args:
             accounts: Lista obiektów Account do zapisania
+
+        Returns:
+            Słownik z liczbą zapisanych ("upserted") i usuniętych ("deleted") kont
         """
-        # Czyścimy kolekcję przed zapisem
-        self._collection.delete_many({})
-        
-        # Zapisujemy wszystkie konta
+        current = {}
+        changes = []
         for account in accounts:
-            self._collection.update_one(
-                {"pesel": account.pesel},
-                {"$set": account.to_dict()},
+            key = self._document_key(account)
+            current[key] = account
+            saved = self._saved.get(key)
+            if saved is not None and saved[0] is account and saved[1] == account.version:
+                continue
+            # Stan konta czytamy pod jego blokadą, żeby dokument, wersja i historia były spójne
+            with account.lock:
+                document, version = account.to_dict(include_history=False), account.version
+                if saved is not None and saved[0] is account:
+                    persisted = saved[2]
+                else:
+                    # Po synchronizacji konto spoza stanu zapisu nie ma w bazie żadnych kubełków
+                    persisted = 0 if saved is None and self._synced else None
+                history_operations, history_count = self._history_operations(key, account.history, persisted)
+            document["history_count"] = history_count
+            changes.append((key, account, version, history_count,
+                            ReplaceOne({key[0]: key[1]}, document, upsert=True), history_operations))
+
+        upserted = len(changes)
+        for key in self._saved.keys() - current.keys():
+            changes.append((key, None, None, None, DeleteOne({key[0]: key[1]}), [DeleteMany({key[0]: key[1]})]))
+
+        for start in range(0, len(changes), self.BULK_BATCH_SIZE):
+            batch = changes[start:start + self.BULK_BATCH_SIZE]
+            history_operations = [operation for change in batch for operation in change[5]]
+            if history_operations:
+                self._history.bulk_write(history_operations, ordered=False)
+            self._collection.bulk_write([change[4] for change in batch], ordered=False)
+            # Stan zapamiętujemy dopiero po udanej paczce - po błędzie następny zapis ją powtórzy
+            for key, account, version, history_count, _, _ in batch:
+                if account is None:
+                    self._saved.pop(key, None)
+                else:
+                    self._saved[key] = (account, version, history_count)
+
+        if not self._synced:
+            self._delete_missing(current)
+            self._synced = True
+
+        return {"upserted": upserted, "deleted": len(changes) - upserted}
+
+    def _history_operations(self, key, history, persisted):
+        """
+        Operacje zapisu historii konta do kubełków.
+
+        Każda operacja dotyczy innego kubełka, więc mogą iść bez kolejności.
+        Dopisanie do niepełnego kubełka ma w filtrze zapisaną liczbę wpisów -
+        powtórzone po błędzie (gdy już się wykonało) niczego nie zmienia.
+
+        Args:
+            key: Klucz dokumentu konta
+            history: Historia konta
+            persisted: Liczba wpisów już zapisanych w kubełkach (None = zapis od nowa,
+                z usunięciem kubełków, które mogły zostać w bazie)
+
+        Returns:
+            Lista operacji i liczba wpisów historii po zapisie
+        """
+        field, value = key
+        size = self.HISTORY_BUCKET_SIZE
+        count = len(history)
+        operations = []
+        if persisted is None:
+            # Konto nowe albo podmienione - kubełki zapisujemy od nowa, nadmiarowe usuwamy
+            persisted = 0
+            operations.append(DeleteMany({field: value, "bucket": {"$gte": (count + size - 1) // size}}))
+        if count == persisted:
+            return operations, count
+
+        amounts = history.since(persisted)
+        bucket, offset = divmod(persisted, size)
+        if offset:
+            chunk, amounts = amounts[:size - offset], amounts[size - offset:]
+            operations.append(UpdateOne(
+                {field: value, "bucket": bucket, "count": offset},
+                {"$push": {"amounts": {"$each": chunk}}, "$inc": {"count": len(chunk)}},
+            ))
+            bucket += 1
+        for start in range(0, len(amounts), size):
+            chunk = amounts[start:start + size]
+            operations.append(ReplaceOne(
+                {field: value, "bucket": bucket},
+                {field: value, "bucket": bucket, "count": len(chunk), "amounts": chunk},
                 upsert=True,
-            )
-    
+            ))
+            bucket += 1
+        return operations, count
+
+    @staticmethod
+    def _document_key(account):
+        """Pole identyfikujące dokument konta: ("pesel", ...) albo ("nip", ...)"""
+        if hasattr(account, "nip"):
+            return ("nip", account.nip)
+        return ("pesel", account.pesel)
+
+    def _delete_missing(self, current):
+        """
+        Usuwa z kolekcji dokumenty kont (i ich historię), których nie ma w current (pełna synchronizacja).
+
+        Klucze zapisanych kont są czytane z projekcją i porównywane z current po stronie
+        aplikacji, a usunięcia idą paczkami po BULK_BATCH_SIZE - filtr z listą wszystkich
+        kluczy przy 1M kont przekroczyłby limit 16 MB dokumentu BSON.
+        """
+        projection = {"_id": True, "pesel": True, "nip": True}
+        stale_documents = []
+        stale_keys = set()
+        for document in self._collection.find({}, projection=projection, batch_size=self.LOAD_BATCH_SIZE):
+            key = ("nip", document["nip"]) if "nip" in document else ("pesel", document.get("pesel"))
+            if key not in current:
+                # Po _id - dokument bez PESEL i NIP też zostanie usunięty
+                stale_documents.append(document["_id"])
+                if key[1] is not None:
+                    stale_keys.add(key)
+        # Historia kont, których dokumentu już nie ma (każda niepusta historia ma kubełek 0)
+        for bucket in self._history.find({"bucket": 0}, projection={"_id": False, "pesel": True, "nip": True},
+                                         batch_size=self.LOAD_BATCH_SIZE):
+            key = ("nip", bucket["nip"]) if "nip" in bucket else ("pesel", bucket.get("pesel"))
+            if key not in current and key[1] is not None:
+                stale_keys.add(key)
+
+        stale_keys = list(stale_keys)
+        for start in range(0, len(stale_keys), self.BULK_BATCH_SIZE):
+            self._history.bulk_write([DeleteMany({field: value})
+                                      for field, value in stale_keys[start:start + self.BULK_BATCH_SIZE]],
+                                     ordered=False)
+        for start in range(0, len(stale_documents), self.BULK_BATCH_SIZE):
+            self._collection.bulk_write([DeleteOne({"_id": document_id})
+                                         for document_id in stale_documents[start:start + self.BULK_BATCH_SIZE]],
+                                        ordered=False)
+
     def load_all(self):
         """
         Ładuje wszystkie konta z bazy danych.
-        
+
         Returns:
             Lista obiektów Account załadowanych z bazy
         """
+        return list(self.iter_all())
+
+    def iter_all(self, batch_size=None):
+        """
+        Strumieniowo ładuje konta z bazy - kursor pobiera dokumenty paczkami,
+        a konta są zwracane na bieżąco, bez budowania listy wszystkich kont.
+
+        Historia jest pobierana jednym zapytaniem na paczkę kont: dla kont
+        osobistych tylko najnowszy kubełek (starsze doczytają się same, gdy
+        będą potrzebne), dla firmowych cała (licznik wpłat do ZUS).
+
+        Args:
+            batch_size: Liczba dokumentów pobieranych z serwera w jednej paczce
+                (domyślnie LOAD_BATCH_SIZE)
+
+        Yields:
+            Obiekty Account odtworzone z dokumentów (nieznane typy są pomijane)
+        """
         from src.personal_account import PersonalAccount
         from src.company_account import CompanyAccount
-        
-        accounts = []
-        for account_dict in self._collection.find():
-            # Usuwamy _id MongoDB (nie potrzebne w obiekcie)
-            account_dict.pop("_id", None)
-            
-            # Rekonstruujemy obiekt na podstawie typu
-            if account_dict.get("type") == "personal":
-                account = PersonalAccount.from_dict(account_dict)
-            elif account_dict.get("type") == "company":
-                account = CompanyAccount.from_dict(account_dict)
+
+        hydrators = {"personal": PersonalAccount.from_dict, "company": CompanyAccount.from_dict}
+        batch_size = batch_size or self.LOAD_BATCH_SIZE
+        cursor = iter(self._collection.find({}, projection=self.LOAD_PROJECTION, batch_size=batch_size))
+        # Załadowany stan jest stanem bazy - kolejny save_all wyśle tylko zmiany
+        saved = {}
+        while True:
+            batch = []
+            for account_dict in islice(cursor, batch_size):
+                # _id jest wyłączone w projekcji, ale usuwamy je też z dokumentów bez projekcji
+                account_dict.pop("_id", None)
+                if account_dict.get("type") in hydrators:
+                    batch.append(account_dict)
+                # Pomijamy nieznane typy
+            if not batch:
+                break
+            buckets = self._load_history_buckets(batch)
+
+            for account_dict in batch:
+                # Rekonstruujemy obiekt na podstawie typu
+                account, persisted = self._hydrate(hydrators[account_dict["type"]], account_dict, buckets)
+                saved[self._document_key(account)] = (account, account.version, persisted)
+                yield account
+
+        self._saved = saved
+        self._synced = True
+
+    def _hydrate(self, hydrate, account_dict, buckets):
+        """Odtwarza konto z dokumentu i pobranych kubełków; zwraca (konto, liczba wpisów w kubełkach)"""
+        if "history" in account_dict:
+            # Dokument sprzed kubełków - historia w dokumencie, w kubełkach jeszcze nic
+            return hydrate(account_dict), 0
+
+        key = ("pesel", account_dict["pesel"]) if account_dict["type"] == "personal" else ("nip", account_dict["nip"])
+        count = account_dict.get("history_count", 0)
+        loaded = buckets.get(key, {})
+        first_bucket = min(loaded, default=0)
+        account_dict["history"] = [amount for bucket in sorted(loaded) for amount in loaded[bucket]]
+        account = hydrate(account_dict)
+        if first_bucket:
+            account.history.set_older(
+                first_bucket * self.HISTORY_BUCKET_SIZE, partial(self._load_older_history, key, first_bucket),
+                account.lock,
+            )
+        return account, count
+
+    def _load_history_buckets(self, batch):
+        """
+        Kubełki historii dla paczki dokumentów kont - jedno zapytanie na paczkę.
+
+        Returns:
+            Słownik: klucz konta -> {numer kubełka: lista kwot}
+        """
+        size = self.HISTORY_BUCKET_SIZE
+        newest = []
+        nips = []
+        for account_dict in batch:
+            count = account_dict.get("history_count", 0)
+            if "history" in account_dict or not count:
+                continue
+            if account_dict["type"] == "company":
+                nips.append(account_dict["nip"])
             else:
-                continue  # Pomijamy nieznane typy
-            
-            accounts.append(account)
-        
-        return accounts
-    
+                newest.append({"pesel": account_dict["pesel"], "bucket": (count - 1) // size})
+        if nips:
+            newest.append({"nip": {"$in": nips}})
+        if not newest:
+            return {}
+
+        buckets = {}
+        projection = {"_id": False, "pesel": True, "nip": True, "bucket": True, "amounts": True}
+        for bucket in self._history.find({"$or": newest}, projection=projection):
+            key = ("pesel", bucket["pesel"]) if "pesel" in bucket else ("nip", bucket["nip"])
+            buckets.setdefault(key, {})[bucket["bucket"]] = bucket["amounts"]
+        return buckets
+
+    def _load_older_history(self, key, before_bucket):
+        """Starsze wpisy historii konta (kubełki przed before_bucket), najstarszy pierwszy"""
+        query = {key[0]: key[1], "bucket": {"$lt": before_bucket}}
+        amounts = []
+        for bucket in self._history.find(query, projection={"_id": False, "amounts": True}).sort("bucket", 1):
+            amounts.extend(bucket["amounts"])
+        return amounts
+
     def close(self):
         """Zamyka połączenie z MongoDB"""
         self.client.close()
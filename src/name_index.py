@@ -0,0 +1,112 @@
+from collections import defaultdict
+from typing import Dict, Iterator, List, Set
+
+
+class NameIndex:
+    """
+    Indeks trigramowy dla jednego pola tekstowego (np. imienia albo nazwiska).
+
+    Tekst jest zapisywany małymi literami i poprzedzony dwoma znacznikami początku,
+    więc "Kowal" daje trigramy "^^k", "^ko", "kow", "owa", "wal". Dzięki temu
+    ten sam indeks obsługuje wyszukiwanie po prefiksie i po fragmencie tekstu.
+
+    Wyszukiwanie zwraca klucze posortowane rosnąco - wyszukiwanie z limitem kończy
+    się po limicie trafień. Posortowane zbiory trigramów są trzymane w pamięci
+    podręcznej do następnej zmiany danego trigramu.
+    """
+
+    START = "^^"
+    MIN_FRAGMENT_LENGTH = 3
+    # Maksymalna liczba posortowanych zbiorów trigramów w pamięci podręcznej
+    SORTED_CACHE_SIZE = 1024
+
+    def __init__(self):
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)
+        self._texts: Dict[str, str] = {}
+        self._sorted: Dict[str, List[str]] = {}
+
+    @staticmethod
+    def _normalize(text) -> str:
+        # Imię/nazwisko konta nie musi być napisem (np. liczba z JSON) - indeksujemy jego tekst
+        return "" if text is None else str(text).casefold()
+
+    @staticmethod
+    def _trigrams_of(text: str) -> Set[str]:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def add(self, key: str, text: str):
+        """Indeksuje tekst pod podanym kluczem (poprzedni tekst klucza jest usuwany)"""
+        # Normalizacja przed usunięciem poprzedniego tekstu - błąd nie zostawia indeksu bez klucza
+        text = self._normalize(text)
+        self.remove(key)
+        self._texts[key] = text
+        trigrams = self._trigrams_of(self.START + text)
+        for trigram in trigrams:
+            self._trigrams[trigram].add(key)
+        if self._sorted:
+            for trigram in trigrams:
+                self._sorted.pop(trigram, None)
+
+    def remove(self, key: str):
+        text = self._texts.pop(key, None)
+        if text is None:
+            return
+        trigrams = self._trigrams_of(self.START + text)
+        for trigram in trigrams:
+            keys = self._trigrams[trigram]
+            keys.discard(key)
+            if not keys:
+                del self._trigrams[trigram]
+        if self._sorted:
+            for trigram in trigrams:
+                self._sorted.pop(trigram, None)
+
+    def clear(self):
+        self._trigrams.clear()
+        self._texts.clear()
+        self._sorted.clear()
+
+    def _candidates(self, pattern: str) -> List[str]:
+        """
+        Kandydaci dla wzorca (posortowani) - najmniejszy zbiór spośród trigramów wzorca.
+        Nie liczymy przecięcia wszystkich zbiorów: każdy kandydat i tak jest
+        sprawdzany na tekście, a wyszukiwanie z limitem kończy się wcześniej.
+        """
+        trigrams = self._trigrams_of(pattern)
+        if not trigrams:
+            return sorted(self._texts)
+        smallest = smallest_keys = None
+        for trigram in trigrams:
+            keys = self._trigrams.get(trigram)
+            if not keys:
+                return []
+            if smallest_keys is None or len(keys) < len(smallest_keys):
+                smallest, smallest_keys = trigram, keys
+        candidates = self._sorted.get(smallest)
+        if candidates is None:
+            if len(self._sorted) >= self.SORTED_CACHE_SIZE:
+                self._sorted.clear()
+            candidates = self._sorted[smallest] = sorted(smallest_keys)
+        return candidates
+
+    def has_prefix(self, key: str, prefix: str) -> bool:
+        return self._texts.get(key, "").startswith(self._normalize(prefix))
+
+    def contains(self, key: str, fragment: str) -> bool:
+        return self._normalize(fragment) in self._texts.get(key, "")
+
+    def search_prefix(self, prefix: str) -> Iterator[str]:
+        """Zwraca klucze (rosnąco), których tekst zaczyna się od prefiksu"""
+        prefix = self._normalize(prefix)
+        for key in self._candidates(self.START + prefix):
+            if self._texts[key].startswith(prefix):
+                yield key
+
+    def search_substring(self, fragment: str) -> Iterator[str]:
+        """Zwraca klucze (rosnąco), których tekst zawiera fragment (min. MIN_FRAGMENT_LENGTH znaków)"""
+        fragment = self._normalize(fragment)
+        if len(fragment) < self.MIN_FRAGMENT_LENGTH:
+            raise ValueError(f"Search fragment must have at least {self.MIN_FRAGMENT_LENGTH} characters")
+        for key in self._candidates(fragment):
+            if fragment in self._texts[key]:
+                yield key
@@ -0,0 +1,275 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterable, List, Optional
+from src.circuit_breaker import CircuitBreaker
+from src.metrics import metrics
+import contextvars
+import logging
+import os
+import threading
+import time
+import requests
+
+
+log = logging.getLogger("bank.mf")
+metrics.histogram("mf_request_duration_seconds", "MF white-list API call duration", ("endpoint", "outcome"))
+
+# Koniec budżetu czasu bieżącego żądania (wg time.monotonic), None = bez budżetu
+_request_deadline: contextvars.ContextVar = contextvars.ContextVar("mf_request_deadline", default=None)
+
+
+class NipValidator:
+    """
+    Walidacja NIP w API wykazu podatników VAT Ministerstwa Finansów (biała lista).
+
+    Wyniki są trzymane w cache kluczowanym (NIP, data) - status VAT na dany dzień
+    się nie zmienia. Cache ma ograniczony rozmiar (LRU) i czas ważności wpisów:
+    osobny dla wyniku pozytywnego (ttl) i negatywnego (negative_ttl), żeby firma
+    zarejestrowana w ciągu dnia nie czekała na wygaśnięcie długiego TTL.
+    Błędy połączenia nie trafiają do cache.
+
+    Zapytania idą przez jedną sesję requests z pulą połączeń (keep-alive).
+    Wiele NIP naraz (are_active) jest sprawdzanych przez wyszukiwanie zbiorcze
+    /api/search/nips/, paczkami po BULK_MAX_NIPS, równolegle w ograniczonej puli wątków.
+
+    Gdy API MF nie działa albo odpowiada wolno, bezpiecznik (CircuitBreaker) odrzuca
+    zapytania od razu zamiast blokować wątki na pełny timeout, a budżet czasu żądania
+    (deadline) skraca timeout każdego zapytania do czasu, który żądaniu jeszcze został.
+    """
+
+    DEFAULT_URL = "https://wl-test.mf.gov.pl"
+    # Limit NIP w jednym zapytaniu /api/search/nips/ w API MF
+    BULK_MAX_NIPS = 30
+
+    def __init__(self, base_url: Optional[str] = None, ttl: float = 12 * 3600, negative_ttl: float = 300,
+                 max_size: int = 10_000, timeout: float = 5, pool_size: int = 10, bulk_workers: int = 4,
+                 breaker: Optional[CircuitBreaker] = None):
+        """
+        Args:
+            base_url: Adres API MF (None = BANK_APP_MF_URL albo DEFAULT_URL, czytane przy każdym zapytaniu)
+            ttl: Czas ważności wyniku pozytywnego (s)
+            negative_ttl: Czas ważności wyniku negatywnego (s)
+            max_size: Maksymalna liczba wpisów w cache
+            timeout: Timeout zapytania do API (s)
+            pool_size: Maksymalna liczba otwartych połączeń w puli
+            bulk_workers: Liczba paczek NIP wysyłanych naraz przez are_active
+            breaker: Bezpiecznik zapytań do API (domyślnie CircuitBreaker z ustawieniami domyślnymi)
+        """
+        self.base_url = base_url
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_size = max_size
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._executor = ThreadPoolExecutor(max_workers=bulk_workers, thread_name_prefix="mf-bulk")
+
+        # (NIP, data) -> (wynik, czas wygaśnięcia wg time.monotonic)
+        self._cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._deadline_exceeded = 0
+
+    def is_active(self, nip: str, date: Optional[str] = None) -> bool:
+        """
+        Sprawdza czy podmiot o danym NIP jest czynnym podatnikiem VAT.
+
+        Args:
+            nip: NIP (10 cyfr)
+            date: Dzień w formacie YYYY-MM-DD (domyślnie dzisiaj)
+
+        Returns:
+            True jeśli statusVat = "Czynny", False inaczej (także przy błędzie API)
+        """
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        result = self._cached(nip, date)
+        if result is not None:
+            return result
+
+        result = self._fetch(nip, date)
+        if result is None:
+            return False
+        self._store(nip, date, result)
+        return result
+
+    def are_active(self, nips: Iterable[str], date: Optional[str] = None) -> Dict[str, bool]:
+        """
+        Sprawdza wiele NIP naraz: wyniki z cache, resztę przez wyszukiwanie zbiorcze
+        (paczki po BULK_MAX_NIPS wysyłane równolegle).
+
+        Args:
+            nips: NIP-y do sprawdzenia (powtórzenia są sprawdzane raz)
+            date: Dzień w formacie YYYY-MM-DD (domyślnie dzisiaj)
+
+        Returns:
+            Słownik NIP -> czy czynny podatnik VAT (False także dla NIP z paczki, której zapytanie się nie udało)
+        """
+        date = date or datetime.now().strftime("%Y-%m-%d")
+        results = {}
+        missing = []
+        for nip in dict.fromkeys(nips):
+            result = self._cached(nip, date)
+            if result is None:
+                missing.append(nip)
+            else:
+                results[nip] = result
+
+        batches = [missing[i:i + self.BULK_MAX_NIPS] for i in range(0, len(missing), self.BULK_MAX_NIPS)]
+        if len(batches) == 1:
+            fetched = [self._fetch_many(batches[0], date, self._timeout())]
+        else:
+            # Budżet czasu jest w kontekście bieżącego wątku - liczymy timeout przed przekazaniem do puli
+            timeout = self._timeout()
+            fetched = self._executor.map(self._fetch_many, batches, [date] * len(batches), [timeout] * len(batches))
+        for batch, statuses in zip(batches, fetched):
+            for nip in batch:
+                if statuses is None:
+                    results[nip] = False
+                else:
+                    results[nip] = statuses.get(nip, False)
+                    self._store(nip, date, results[nip])
+        return results
+
+    def _cached(self, nip: str, date: str) -> Optional[bool]:
+        """Wynik z cache (None gdy go nie ma albo wygasł) - liczy trafienia i chybienia"""
+        key = (nip, date)
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry[1] > time.monotonic():
+                self._cache.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+            self._misses += 1
+            return None
+
+    def _store(self, nip: str, date: str, result: bool):
+        key = (nip, date)
+        with self._lock:
+            self._cache[key] = (result, time.monotonic() + (self.ttl if result else self.negative_ttl))
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_size:
+                self._cache.popitem(last=False)
+                self._evictions += 1
+
+    def _fetch(self, nip: str, date: str) -> Optional[bool]:
+        """Zapytanie do API MF; None przy błędzie, odrzuceniu przez bezpiecznik albo braku budżetu czasu"""
+        data = self._request(f"/api/search/nip/{nip}", date, self._timeout(), f"NIP {nip}")
+        if data is None:
+            return None
+        # Szukamy result.subject.statusVat: "Czynny" (subject = null - NIP nie istnieje)
+        subject = (data.get("result") or {}).get("subject")
+        return subject is not None and subject.get("statusVat", "") == "Czynny"
+
+    def _fetch_many(self, nips: List[str], date: str, timeout: Optional[float]) -> Optional[Dict[str, bool]]:
+        """Zapytanie zbiorcze do API MF; słownik NIP -> czynny (brak NIP w odpowiedzi = nie istnieje), None przy błędzie"""
+        data = self._request(f"/api/search/nips/{','.join(nips)}", date, timeout, f"{len(nips)} NIPs")
+        if data is None:
+            return None
+        subjects = (data.get("result") or {}).get("subjects") or []
+        return {subject.get("nip"): subject.get("statusVat", "") == "Czynny" for subject in subjects}
+
+    def _request(self, path: str, date: str, timeout: Optional[float], label: str) -> Optional[Dict]:
+        """
+        GET do API MF przez bezpiecznik. Błędem usługi (dla bezpiecznika) jest wyjątek
+        połączenia/timeout i odpowiedź 5xx; odpowiedź 4xx to poprawna odmowa.
+
+        Returns:
+            Treść odpowiedzi 200 albo None
+        """
+        if timeout is None:
+            with self._lock:
+                self._deadline_exceeded += 1
+            log.warning("MF API call skipped: request deadline exceeded", extra={"target": label})
+            return None
+        if not self.breaker.allow():
+            log.warning("MF API call skipped: circuit breaker open", extra={"target": label})
+            return None
+
+        # "nip" albo "nips" - etykieta metryki bez samego NIP
+        endpoint = path.split("/")[3]
+        start_time = time.perf_counter()
+        try:
+            mf_url = self.base_url or os.getenv("BANK_APP_MF_URL", self.DEFAULT_URL)
+            response = self._session.get(f"{mf_url}{path}", params={"date": date}, timeout=timeout)
+        except Exception as e:
+            # Każdy wyjątek zapytania to błąd usługi - także InvalidURL/MissingSchema (podklasy ValueError);
+            # bez wyniku bezpiecznik w stanie półotwartym nie zwolniłby miejsca na próbę
+            self.breaker.record_failure()
+            metrics.observe("mf_request_duration_seconds", time.perf_counter() - start_time, (endpoint, "error"))
+            log.warning("MF API call failed", extra={"target": label, "error": str(e)})
+            return None
+
+        log.debug("MF API response", extra={"target": label, "status": response.status_code})
+        metrics.observe("mf_request_duration_seconds", time.perf_counter() - start_time,
+                        (endpoint, str(response.status_code)))
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            return None
+        self.breaker.record_success()
+        if response.status_code != 200:
+            return None
+        try:
+            return response.json()
+        except ValueError as e:
+            # Niepoprawny JSON - usługa odpowiedziała, wynik dla bezpiecznika jest już zapisany
+            log.warning("MF API returned invalid JSON", extra={"target": label, "error": str(e)})
+            return None
+
+    def _timeout(self) -> Optional[float]:
+        """Timeout następnego zapytania: nie dłuższy niż reszta budżetu żądania (None = budżet wyczerpany)"""
+        deadline = _request_deadline.get()
+        if deadline is None:
+            return self.timeout
+        remaining = deadline - time.monotonic()
+        return min(self.timeout, remaining) if remaining > 0 else None
+
+    def start_deadline(self, seconds: float) -> contextvars.Token:
+        """Ustawia budżet czasu na zapytania do MF w bieżącym żądaniu (do end_deadline)"""
+        return _request_deadline.set(time.monotonic() + seconds)
+
+    def end_deadline(self, token: contextvars.Token):
+        _request_deadline.reset(token)
+
+    @contextmanager
+    def deadline(self, seconds: float):
+        """Budżet czasu na wszystkie zapytania do MF w bloku with"""
+        token = self.start_deadline(seconds)
+        try:
+            yield
+        finally:
+            self.end_deadline(token)
+
+    def stats(self) -> Dict:
+        """Statystyki cache: trafienia, chybienia, usunięte wpisy (LRU), liczba wpisów"""
+        with self._lock:
+            return {"hits": self._hits, "misses": self._misses, "evictions": self._evictions, "size": len(self._cache)}
+
+    def breaker_stats(self) -> Dict:
+        """Stan i liczniki bezpiecznika oraz liczba zapytań pominiętych z braku budżetu czasu"""
+        stats = self.breaker.stats()
+        with self._lock:
+            stats["deadline_exceeded"] = self._deadline_exceeded
+        return stats
+
+    def clear(self):
+        """Czyści cache i statystyki"""
+        with self._lock:
+            self._cache.clear()
+            self._hits = self._misses = self._evictions = 0
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._session.close()
+
+
+# Wspólny walidator procesu - z niego korzysta CompanyAccount
+mf_validator = NipValidator()
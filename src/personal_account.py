@@ -1,9 +1,12 @@
 from src.account import Account
+from src.transaction_history import TransactionHistory
 from smtp.smtp import SMTPClient
 from datetime import datetime
 
 
 class PersonalAccount(Account):
+    __slots__ = ("first_name", "last_name", "pesel", "promo_code")
+
     def __init__(self, first_name, last_name, pesel, promo_code=None):
         super().__init__()
         self.first_name = first_name
@@ -26,38 +29,42 @@ class PersonalAccount(Account):
         if self.promo_code and self.promo_code.startswith("PROM_"):
             self.balance += 50.0
 
-    def express_outgoing_pers(self, amount: float) -> None:
+    def express_outgoing_pers(self, amount: float) -> bool:
         fee = 1.0
         total = amount + fee
 
-        # sprawdź, czy środki są wystarczające i kwota dodatnia
-        if amount <= 0 or total > self.balance:
-            return
+        with self.lock:
+            # sprawdź, czy środki są wystarczające i kwota dodatnia
+            if amount <= 0 or total > self.balance:
+                return False
 
-        # najpierw wykonaj zwykły przelew (zapisze "-50.0" w historii)
-        self.outgoing_transfer(amount)
+            # najpierw wykonaj zwykły przelew (zapisze "-50.0" w historii)
+            self.outgoing_transfer(amount)
 
-        # potem pobierz opłatę (zapisze "-1.0" w historii)
-        self.outgoing_transfer(fee)
+            # potem pobierz opłatę (zapisze "-1.0" w historii)
+            self.outgoing_transfer(fee)
+            return True
 
     def _has_last_three_deposits(self) -> bool:
         """Sprawdza czy ostatnie 3 transakcje to wpłaty."""
         if len(self.history) < 3:
             return False
-        return all(amount > 0 for amount in self.history[-3:])
+        return all(amount > 0 for amount in self.history.last(3))
     
     def _has_positive_balance_from_last_five(self, loan_amount: float) -> bool:
         """Sprawdza czy suma ostatnich 5 transakcji > kwota kredytu."""
         if len(self.history) < 5:
             return False
-        return sum(self.history[-5:]) > loan_amount
+        return sum(self.history.last(5)) > loan_amount
     
     def submit_for_loan(self, amount: float) -> bool:
         """Składa wniosek o kredyt."""
-        if self._has_last_three_deposits() or self._has_positive_balance_from_last_five(amount):
-            self.balance += amount
-            return True
-        return False
+        with self.lock:
+            if self._has_last_three_deposits() or self._has_positive_balance_from_last_five(amount):
+                self.balance += amount
+                self.mark_changed()
+                return True
+            return False
     
     def send_history_via_email(self, email_address: str) -> bool:
         """
@@ -69,39 +76,41 @@ class PersonalAccount(Account):
         Returns:
             True jeśli wysłanie się powiodło, False w przeciwnym razie
         """
-        # Przygotuj datę w formacie YYYY-MM-DD
-        today = datetime.now().strftime("%Y-%m-%d")
-        
-        # Przygotuj temat i treść maila
-        subject = f"Account Transfer History {today}"
-        text = f"Personal account history: {self.history}"
-        
+        subject, text = self._history_email()
+
         # Wyślij email przez SMTP client
         smtp_client = SMTPClient()
         return smtp_client.send(subject, text, email_address)
+
+    def _history_email(self, statement=None):
+        """Temat i treść maila z historią konta (z wyciągiem w załączniku treść tylko go opisuje)"""
+        # Przygotuj datę w formacie YYYY-MM-DD
+        today = datetime.now().strftime("%Y-%m-%d")
+        subject = f"Account Transfer History {today}"
+        if statement is not None:
+            return subject, f"Personal account history: {len(statement)} entries in the attached {statement.filename}"
+        return subject, f"Personal account history: {self.history}"
     
-    def to_dict(self):
-        """Konwertuje konto do słownika dla MongoDB"""
-        return {
+    def to_dict(self, include_history=True):
+        """Konwertuje konto do słownika (bez historii, gdy jest zapisywana osobno)"""
+        data = {
             "type": "personal",
             "first_name": self.first_name,
             "last_name": self.last_name,
             "pesel": self.pesel,
             "balance": self.balance,
-            "history": self.history,
             "promo_code": self.promo_code
         }
+        if include_history:
+            data["history"] = self.history.tolist()
+        return data
     
     @staticmethod
     def from_dict(data):
-        """Tworzy PersonalAccount z słownika"""
-        account = PersonalAccount(
-            first_name=data["first_name"],
-            last_name=data["last_name"],
-            pesel=data["pesel"],
-            promo_code=data.get("promo_code")
-        )
-        # Nadpisz balance i history (bez wywoływania apply_promo ponownie)
-        account.balance = data["balance"]
-        account.history = data["history"]
+        """Tworzy PersonalAccount ze słownika (bez konstruktora - dane z bazy są zaufane)"""
+        account = PersonalAccount._hydrate(data["balance"], TransactionHistory.from_floats(data["history"]))
+        account.first_name = data["first_name"]
+        account.last_name = data["last_name"]
+        account.pesel = data["pesel"]
+        account.promo_code = data.get("promo_code")
         return account
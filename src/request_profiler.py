@@ -0,0 +1,235 @@
+from collections import defaultdict, deque
+from typing import Callable, Dict, Iterable, List, Optional
+import cProfile
+import hmac
+import io
+import itertools
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+
+log = logging.getLogger("bank.profiler")
+
+
+class RequestProfiler:
+    """
+    Profilowanie wybranych żądań (cProfile) na żądanie administratora.
+
+    Żądanie jest profilowane, gdy ma nagłówek X-Profile z tokenem administratora
+    albo zostało wylosowane (sample_rate - odsetek żądań 0..1). Profil trafia do
+    ograniczonego bufora (ostatnie keep profili), z którego endpoint administratora
+    zwraca go jako tekst pstats albo collapsed stacks (wejście flamegraph.pl/speedscope).
+
+    Wyłączony profiler (bez tokenu i próbkowania) nie instaluje middleware - wrap
+    zwraca aplikację bez zmian, więc żądania nie płacą za niego nic. Próbkowanie
+    wymaga tokenu - bez niego zebranych profili nie dałoby się odczytać.
+    """
+
+    HEADER = "HTTP_X_PROFILE"
+    SORT_KEYS = ("cumulative", "tottime", "calls")
+    # Gałęzie stosu krótsze niż to (s) są pomijane w collapsed stacks
+    MIN_STACK_TIME = 1e-6
+
+    def __init__(self, token: Optional[str] = None, sample_rate: float = 0.0, keep: int = 20):
+        """
+        Args:
+            token: Token administratora - włącza profilowanie nagłówkiem i dostęp do profili
+            sample_rate: Odsetek losowo profilowanych żądań (0 = tylko nagłówkiem, wymaga tokenu)
+            keep: Liczba przechowywanych profili (starsze są usuwane)
+        """
+        if not 0 <= sample_rate <= 1:
+            raise ValueError("Profile sample rate must be between 0 and 1")
+        if keep < 1:
+            raise ValueError("At least one profile must be kept")
+        self.token = token or None
+        if sample_rate and self.token is None:
+            # Bez tokenu endpoint profili odrzuca każde żądanie - próbkowanie tylko by spowalniało
+            log.warning("Request sampling disabled: profiling requires an admin token")
+            sample_rate = 0.0
+        self.sample_rate = sample_rate
+        self._profiles = deque(maxlen=keep)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.token is not None or self.sample_rate > 0
+
+    def authorized(self, token: Optional[str]) -> bool:
+        """Czy token pasuje do tokenu administratora (porównanie w stałym czasie)"""
+        return self.token is not None and token is not None and hmac.compare_digest(token, self.token)
+
+    def wrap(self, wsgi_app: Callable) -> Callable:
+        """Middleware WSGI profilujące wybrane żądania (bez zmian, gdy profiler jest wyłączony)"""
+        if not self.enabled:
+            return wsgi_app
+
+        def profiled(environ, start_response):
+            header = environ.get(self.HEADER)
+            if not ((header is not None and self.authorized(header))
+                    or (self.sample_rate and random.random() < self.sample_rate)):
+                return wsgi_app(environ, start_response)
+            return self._profile_request(wsgi_app, environ, start_response)
+
+        return profiled
+
+    def _profile_request(self, wsgi_app, environ, start_response):
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Inny profiler jest już aktywny (od Pythona 3.12 jeden na proces) - żądanie bez profilu
+            return wsgi_app(environ, start_response)
+        start_time = time.perf_counter()
+        status = "500"
+
+        def capture_status(status_line, headers, exc_info=None):
+            nonlocal status
+            status = status_line[:3]
+            return start_response(status_line, headers, exc_info)
+
+        def finish():
+            self._store(profile, environ, status, time.perf_counter() - start_time)
+
+        try:
+            body = wsgi_app(environ, capture_status)
+        except BaseException:
+            profile.disable()
+            finish()
+            raise
+        profile.disable()
+        # Odpowiedź strumieniowa jest generowana przy iteracji - ją też profilujemy
+        return _ProfiledBody(body, profile, finish)
+
+    def _store(self, profile: cProfile.Profile, environ, status: str, duration: float):
+        entry = {
+            "id": next(self._ids),
+            "method": environ.get("REQUEST_METHOD", "GET"),
+            "path": environ.get("PATH_INFO", "/"),
+            "status": status,
+            "duration_ms": round(duration * 1000, 3),
+            "started": time.time() - duration,
+            "stats": pstats.Stats(profile),
+        }
+        with self._lock:
+            self._profiles.append(entry)
+
+    def profiles(self) -> List[Dict]:
+        """Przechowywane profile bez danych, od najwolniejszego"""
+        with self._lock:
+            entries = list(self._profiles)
+        return sorted(({key: value for key, value in entry.items() if key != "stats"} for entry in entries),
+                      key=lambda entry: entry["duration_ms"], reverse=True)
+
+    def _stats(self, profile_id: int) -> Optional[pstats.Stats]:
+        with self._lock:
+            for entry in self._profiles:
+                if entry["id"] == profile_id:
+                    return entry["stats"]
+        return None
+
+    def pstats_text(self, profile_id: int, sort: str = "cumulative", limit: int = 50) -> Optional[str]:
+        """Raport pstats (limit funkcji posortowanych wg sort), None gdy profilu nie ma"""
+        if sort not in self.SORT_KEYS:
+            raise ValueError(f"Sort must be one of: {', '.join(self.SORT_KEYS)}")
+        stats = self._stats(profile_id)
+        if stats is None:
+            return None
+        output = io.StringIO()
+        # Stats sortuje i drukuje w miejscu - raport na kopii, bo ten sam profil mogą czytać równolegle
+        report = pstats.Stats(stream=output)
+        report.add(stats)
+        report.sort_stats(sort).print_stats(limit)
+        return output.getvalue()
+
+    def collapsed_text(self, profile_id: int) -> Optional[str]:
+        """Profil jako collapsed stacks ("a;b;c <us>" na linię), None gdy profilu nie ma"""
+        stats = self._stats(profile_id)
+        if stats is None:
+            return None
+        lines = _collapse_stacks(stats.stats, self.MIN_STACK_TIME)
+        return "".join(f"{stack} {round(seconds * 1e6)}\n" for stack, seconds in sorted(lines.items())
+                       if round(seconds * 1e6) > 0)
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+
+class _ProfiledBody:
+    """Ciało odpowiedzi WSGI profilowane przy generowaniu każdej porcji"""
+
+    def __init__(self, body: Iterable[bytes], profile: cProfile.Profile, finish: Callable[[], None]):
+        self.body = body
+        self.profile = profile
+        self.finish = finish
+
+    def __iter__(self):
+        iterator = iter(self.body)
+        while True:
+            self.profile.enable()
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                self.profile.disable()
+            yield chunk
+        self._finish()
+
+    def _finish(self):
+        # Profil jest zapisywany raz - po ostatniej porcji albo przy close (przerwana odpowiedź)
+        if self.finish is not None:
+            finish, self.finish = self.finish, None
+            finish()
+
+    def close(self):
+        try:
+            if hasattr(self.body, "close"):
+                self.body.close()
+        finally:
+            self._finish()
+
+
+def _frame_label(function) -> str:
+    filename, line, name = function
+    if filename == "~":
+        # Funkcje wbudowane (np. "<built-in method time.sleep>")
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def _collapse_stacks(stats: Dict, min_time: float = 0.0) -> Dict[str, float]:
+    """
+    Stosy wywołań z grafu wywołań cProfile: stos -> czas własny (s).
+
+    cProfile zapisuje tylko krawędzie wywołujący -> wywoływany, więc czas funkcji
+    jest dzielony między stosy proporcjonalnie do czasu krawędzi (jak gprof) -
+    dla flamegraphu wystarcza, choć przy funkcjach wołanych z wielu miejsc jest
+    przybliżeniem. Wywołania rekurencyjne są ucinane na pierwszym powtórzeniu.
+    """
+    callees = defaultdict(dict)
+    for function, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][function] = edge[3]
+    roots = [function for function, (_, _, _, _, callers) in stats.items()
+             if not any(caller in stats for caller in callers)]
+
+    stacks = defaultdict(float)
+
+    def walk(function, stack, on_stack, seconds):
+        total_time, cumulative_time = stats[function][2], stats[function][3]
+        if cumulative_time <= 0:
+            return
+        scale = seconds / cumulative_time
+        stacks[stack] += total_time * scale
+        for callee, edge_time in callees.get(function, {}).items():
+            if callee not in on_stack and edge_time * scale >= min_time:
+                walk(callee, f"{stack};{_frame_label(callee)}", on_stack | {callee}, edge_time * scale)
+
+    for root in roots:
+        walk(root, _frame_label(root), frozenset([root]), stats[root][3])
+    return dict(stacks)
@@ -0,0 +1,185 @@
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional, TextIO, Union
+import json
+import logging
+import queue
+import random
+import sys
+import threading
+import time
+
+# Atrybuty, które ma każdy LogRecord - pozostałe to pola przekazane przez extra
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+# Jeden encoder - json.dumps z własnymi opcjami tworzy nowy przy każdym wywołaniu
+_ENCODER = json.JSONEncoder(ensure_ascii=False, default=str)
+
+
+class StructuredLogging:
+    """
+    Logi strukturalne (jeden obiekt JSON na linię) zapisywane w tle.
+
+    Logger "bank" (i jego dzieci: "bank.api", "bank.mf") dostaje QueueHandler -
+    wątek żądania tylko wstawia rekord do ograniczonej kolejki, a formatowanie
+    i zapis do strumienia robi QueueListener w osobnym wątku. Gdy kolejka jest
+    pełna (strumień nie nadąża), rekord jest odrzucany i liczony w dropped,
+    więc logowanie nigdy nie blokuje żądania.
+
+    Poziom jest sprawdzany przez logger, zanim powstanie rekord. Próbkowanie
+    (sampling: trasa -> odsetek zdarzeń 0..1) sprawdza sample(route) - też przed
+    utworzeniem rekordu; trasy spoza sampling są logowane w całości.
+
+    Na czas działania (od start do stop) wyłączone są globalne flagi modułu logging
+    zbierające plik/linię wywołania i dane procesu - dotyczy to wszystkich loggerów
+    w procesie. stop ostatniej działającej instancji przywraca poprzednie wartości.
+    """
+
+    # Poziom wyłączający logi całkowicie
+    OFF = logging.CRITICAL + 10
+    # Flagi modułu logging wyłączane na czas działania i ich wartości sprzed pierwszego start
+    _LOGGING_FLAGS = {"_srcfile": None, "logProcesses": False, "logMultiprocessing": False}
+    _flags_lock = threading.Lock()
+    _saved_flags: Optional[Dict] = None
+    _started = 0
+
+    def __init__(self, level: Union[str, int] = "INFO", sampling: Optional[Dict[str, float]] = None,
+                 stream: Optional[TextIO] = None, queue_size: int = 10_000, logger_name: str = "bank"):
+        """
+        Args:
+            level: Minimalny poziom ("DEBUG", "INFO", ..., "OFF") albo liczba
+            sampling: Odsetek zapisywanych zdarzeń dla tras, np. {"GET /api/accounts": 0.01}
+            stream: Strumień wyjściowy (domyślnie sys.stderr)
+            queue_size: Maksymalna liczba rekordów czekających na zapis
+            logger_name: Logger, do którego podłączany jest handler
+        """
+        self.level = self._parse_level(level)
+        self.sampling = dict(sampling or {})
+        for route, rate in self.sampling.items():
+            if not 0 <= rate <= 1:
+                raise ValueError(f"Sampling rate for {route} must be between 0 and 1")
+        self.stream = stream
+        self.dropped = 0
+        self.logger = logging.getLogger(logger_name)
+        self._queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=queue_size)
+        self._handler: Optional[QueueHandler] = None
+        self._listener: Optional[QueueListener] = None
+        # Sekunda i jej sformatowany czas - format() woła tylko wątek zapisujący
+        self._second = None
+        self._second_text = ""
+
+    @classmethod
+    def _parse_level(cls, level: Union[str, int]) -> int:
+        if isinstance(level, int):
+            return level
+        if level.upper() == "OFF":
+            return cls.OFF
+        value = logging.getLevelName(level.upper())
+        if not isinstance(value, int):
+            raise ValueError(f"Unknown log level: {level}")
+        return value
+
+    @staticmethod
+    def parse_sampling(spec: str) -> Dict[str, float]:
+        """Próbkowanie z tekstu (np. zmiennej środowiskowej): "GET /api/accounts=0.01,POST /api/accounts=0.1" """
+        sampling = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            route, separator, rate = item.rpartition("=")
+            if not separator or not route.strip():
+                raise ValueError(f"Invalid sampling entry: {item}")
+            sampling[route.strip()] = float(rate)
+        return sampling
+
+    def sample(self, route: str) -> bool:
+        """Czy zapisać zdarzenie z tej trasy (losowo, z odsetkiem z sampling)"""
+        rate = self.sampling.get(route)
+        return rate is None or random.random() < rate
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Rekord jako jedna linia JSON: czas, poziom, logger, komunikat i pola z extra"""
+        second = int(record.created)
+        if second != self._second:
+            self._second, self._second_text = second, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+        entry = {
+            "ts": f"{self._second_text}.{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return _ENCODER.encode(entry)
+
+    def _prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        W wątku żądania tylko składa komunikat i traceback (argumenty mogą się zmienić,
+        zanim rekord zapisze wątek w tle) - bez kopiowania rekordu jak w QueueHandler.prepare.
+        """
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def _enqueue(self, record: logging.LogRecord):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            # Licznik przybliżony (bez blokady) - wystarcza do wykrycia, że logi są gubione
+            self.dropped += 1
+
+    def start(self):
+        """Podłącza handler do loggera i uruchamia wątek zapisujący"""
+        if self._listener is not None:
+            return
+        self._disable_record_details()
+        output = logging.StreamHandler(self.stream or sys.stderr)
+        output.setFormatter(self)
+        self._handler = QueueHandler(self._queue)
+        # Wstawianie bez czekania - pełna kolejka odrzuca rekord zamiast blokować wątek żądania
+        self._handler.prepare = self._prepare
+        self._handler.enqueue = self._enqueue
+        self.logger.addHandler(self._handler)
+        self.logger.setLevel(self.level)
+        # Logi aplikacji nie trafiają dodatkowo do handlerów roota (np. synchronicznego stderr)
+        self.logger.propagate = False
+        self._listener = QueueListener(self._queue, output)
+        # Znacznik końca czeka na miejsce w kolejce - put_nowait przy pełnej kolejce rzuciłby wyjątek
+        self._listener.enqueue_sentinel = lambda: self._queue.put(QueueListener._sentinel)
+        self._listener.start()
+
+    def stop(self):
+        """Zapisuje rekordy z kolejki, zatrzymuje wątek i odłącza handler"""
+        if self._listener is None:
+            return
+        self.logger.removeHandler(self._handler)
+        self.logger.propagate = True
+        self._listener.stop()
+        self._listener = None
+        self._handler = None
+        self._restore_record_details()
+
+    @classmethod
+    def _disable_record_details(cls):
+        """
+        Rekord nie zbiera danych, których log JSON nie zapisuje: plik/linia wywołania
+        (przeglądanie stosu), proces - to większość kosztu logowania w wątku żądania.
+        """
+        with cls._flags_lock:
+            if not cls._started:
+                cls._saved_flags = {name: getattr(logging, name) for name in cls._LOGGING_FLAGS}
+                for name, value in cls._LOGGING_FLAGS.items():
+                    setattr(logging, name, value)
+            cls._started += 1
+
+    @classmethod
+    def _restore_record_details(cls):
+        """Przywraca flagi modułu logging po zatrzymaniu ostatniej działającej instancji"""
+        with cls._flags_lock:
+            cls._started -= 1
+            if not cls._started:
+                for name, value in cls._saved_flags.items():
+                    setattr(logging, name, value)
+                cls._saved_flags = None
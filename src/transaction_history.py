@@ -0,0 +1,184 @@
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Union
+import threading
+
+
+class TransactionHistory:
+    """
+    Historia transakcji konta trzymana w zwartej tablicy array('d').
+
+    Lista Pythona trzyma wskaźnik (8 B) do osobnego obiektu float (24 B) dla każdego
+    wpisu, tablica trzyma same wartości - 8 B na wpis, plus 1 B na znacznik, czy kwota
+    przyszła jako int (tylko do wypisania historii tak, jak wyglądała lista).
+    Klasa udostępnia te operacje, z których konta korzystają na liście:
+    append, wycinki, `in`, sum, iterację, len.
+
+    Dla kwot podanych w tracked_amounts historia prowadzi liczniki aktualizowane
+    przy każdym dopisaniu, więc count/`in` dla nich działa w O(1) zamiast skanu.
+
+    Historia załadowana z bazy może mieć w pamięci tylko najnowsze wpisy - starsze
+    (set_older) są doczytywane przy pierwszej operacji, która ich potrzebuje.
+    len, append i last(n) dla n w obrębie załadowanych wpisów ich nie doczytują.
+    Doczytanie podmienia tablicę pod blokadą konta (tą, pod którą konto dopisuje
+    wpisy), a liczba starszych wpisów i tablica są publikowane razem w _view -
+    len/since/chunks bez blokady konta nie zobaczą starszych wpisów policzonych dwa razy.
+    """
+
+    __slots__ = ("_amounts", "_is_int", "_tracked", "_view", "_older_loader", "_lock")
+
+    def __init__(self, amounts: Iterable[float] = (), tracked_amounts: Iterable[float] = ()):
+        self._amounts = array("d")
+        self._is_int = bytearray()
+        # Liczniki tylko gdy są potrzebne - większość kont ich nie ma i nie płaci za pusty dict
+        self._tracked: Optional[Dict[float, int]] = dict.fromkeys(tracked_amounts, 0) if tracked_amounts else None
+        # (liczba niewczytanych starszych wpisów, tablica) - czytane jednym odczytem atrybutu
+        self._view = (0, self._amounts)
+        self._older_loader: Optional[Callable[[], List[float]]] = None
+        self._lock = None
+        if amounts:
+            self.extend(amounts)
+
+    @classmethod
+    def from_floats(cls, amounts: List[float], tracked_amounts: Iterable[float] = ()) -> "TransactionHistory":
+        """
+        Historia z listy floatów zapisanej przez tolist() - szybka ścieżka przy ładowaniu
+        kont z bazy: tablica jest budowana w C, bez sprawdzania typu każdej kwoty.
+        """
+        history = cls(tracked_amounts=tracked_amounts)
+        history._amounts = array("d", amounts)
+        history._is_int = bytearray(len(amounts))
+        history._view = (0, history._amounts)
+        if history._tracked is not None:
+            for amount in history._tracked:
+                history._tracked[amount] = amounts.count(amount)
+        return history
+
+    def set_older(self, count: int, loader: Callable[[], List[float]], lock=None):
+        """
+        Oznacza, że przed wpisami w pamięci jest jeszcze count starszych wpisów,
+        które zwróci loader (najstarszy pierwszy). Historie z licznikami
+        (tracked_amounts) muszą być ładowane w całości.
+
+        Args:
+            lock: Blokada, pod którą historia jest zmieniana (blokada konta) -
+                  pod nią doczytane wpisy są łączone z dopisanymi w międzyczasie
+        """
+        if self._tracked is not None:
+            raise ValueError("History with tracked amounts must be loaded in full")
+        self._lock = lock if lock is not None else threading.RLock()
+        self._view = (count, self._amounts)
+        self._older_loader = loader if count else None
+
+    def _load_older(self):
+        loader = self._older_loader
+        if loader is None:
+            return
+        # Zapytanie do bazy i budowa tablicy poza blokadą - przelewy na koncie nie czekają na bazę.
+        # Dwa wątki mogą doczytać równolegle - opublikowany zostanie tylko pierwszy wynik.
+        older = array("d", loader())
+        with self._lock:
+            if self._older_loader is None:
+                return
+            amounts = older + self._amounts
+            self._is_int = bytearray(len(older)) + self._is_int
+            self._amounts = amounts
+            self._view = (0, amounts)
+            self._older_loader = None
+
+    def since(self, start: int) -> List[float]:
+        """Wpisy od pozycji start do końca (np. dopisane od ostatniego zapisu)"""
+        older_count, amounts = self._view
+        if start < older_count:
+            self._load_older()
+            older_count, amounts = self._view
+        return amounts[start - older_count:].tolist()
+
+    def append(self, amount: float):
+        self._amounts.append(amount)
+        self._is_int.append(isinstance(amount, int))
+        if self._tracked is not None and amount in self._tracked:
+            self._tracked[amount] += 1
+
+    def extend(self, amounts: Iterable[float]):
+        amounts = list(amounts)
+        self._amounts.fromlist(amounts)
+        self._is_int.extend(isinstance(amount, int) for amount in amounts)
+        if self._tracked is not None:
+            for amount in self._tracked:
+                self._tracked[amount] += amounts.count(amount)
+
+    def count(self, amount: float) -> int:
+        if self._tracked is not None and amount in self._tracked:
+            return self._tracked[amount]
+        if self._older_loader is not None:
+            self._load_older()
+        return self._amounts.count(amount)
+
+    def last(self, n: int) -> array:
+        """Ostatnie n wpisów (najstarszy pierwszy) - kopiuje tylko n wartości z końca tablicy"""
+        if n > len(self._amounts) and self._older_loader is not None:
+            self._load_older()
+        return self._amounts[-n:] if n > 0 else array("d")
+
+    def chunks(self, start: int = 0, stop: Optional[int] = None, size: int = 10_000) -> Iterator[array]:
+        """
+        Wpisy z zakresu [start, stop) po size na raz (jak wycinek listy, także z ujemnymi
+        indeksami) - kopiowany jest tylko bieżący kawałek, nie cały zakres.
+        Koniec zakresu jest ustalany przy wywołaniu, wpisy dopisane później są pomijane.
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        if start < self._view[0]:
+            self._load_older()
+        for position in range(start, stop, size):
+            # Przesunięcie razem z tablicą czytane co kawałek - starsze wpisy mogą zostać doczytane w trakcie
+            offset, amounts = self._view
+            yield amounts[position - offset:min(position + size, stop) - offset]
+
+    def tolist(self) -> List[float]:
+        """Lista floatów do serializacji (konwersja w C, bez pętli w Pythonie; inty zapisują się jako float)"""
+        if self._older_loader is not None:
+            self._load_older()
+        return self._amounts.tolist()
+
+    def __len__(self):
+        older_count, amounts = self._view
+        return older_count + len(amounts)
+
+    def __iter__(self) -> Iterator[float]:
+        if self._older_loader is not None:
+            self._load_older()
+        return iter(self._amounts)
+
+    def __contains__(self, amount) -> bool:
+        if self._tracked is not None and amount in self._tracked:
+            return self._tracked[amount] > 0
+        if self._older_loader is not None:
+            self._load_older()
+        return amount in self._amounts
+
+    def __getitem__(self, index) -> Union[float, List[float]]:
+        """Pojedynczy wpis albo lista wpisów dla wycinka (np. history[-5:])"""
+        if self._older_loader is not None:
+            self._load_older()
+        if isinstance(index, slice):
+            return self._amounts[index].tolist()
+        return self._amounts[index]
+
+    def __eq__(self, other):
+        if self._older_loader is not None:
+            self._load_older()
+        if isinstance(other, TransactionHistory):
+            if other._older_loader is not None:
+                other._load_older()
+            return self._amounts == other._amounts
+        if isinstance(other, (list, tuple)):
+            return self._amounts.tolist() == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        if self._older_loader is not None:
+            self._load_older()
+        # Kwoty przekazane jako int wypisujemy bez ".0" - tak jak wyglądała lista
+        return "[" + ", ".join(
+            str(int(amount)) if is_int else repr(amount) for amount, is_int in zip(self._amounts, self._is_int)
+        ) + "]"
@@ -138,6 +138,18 @@ class TestAccountCRUD:
         assert get_response.json()["name"] == "Johnny"
         assert get_response.json()["surname"] == "Smith"
 
+    def test_non_string_names(self, base_url):
+        """Imię/nazwisko spoza napisów (liczba z JSON) - konto powstaje i daje się zmienić, bez 500"""
+        response = requests.post(base_url, json={"name": 123, "surname": "Doe", "pesel": "89092909826"})
+        assert response.status_code == 201
+        assert requests.get(f"{base_url}/89092909826").json()["name"] == 123
+
+        response = requests.patch(f"{base_url}/89092909826", json={"name": 5})
+        assert response.status_code == 200
+        assert requests.get(f"{base_url}/89092909826").json()["name"] == 5
+        found = requests.get(f"{base_url}/search", params={"name": "5"}).json()
+        assert [account["pesel"] for account in found] == ["89092909826"]
+
     def test_update_account_not_found(self, base_url):
         """Test: PATCH /api/accounts/<pesel> - 404"""
         response = requests.patch(f"{base_url}/99999999999", json={"name": "Test"})
@@ -0,0 +1,95 @@
+import gzip
+import time
+
+import pytest
+import requests
+
+BASE_URL = "http://127.0.0.1:5000/api"
+PESEL = "89092909876"
+
+
+class TestAccountHistoryEmailAPI:
+    """Testy integracyjne wysyłki historii konta mailem w tle (POST /api/accounts/<pesel>/history/email)"""
+
+    @pytest.fixture(autouse=True)
+    def account(self):
+        """Fixture: Konto sprzątane po teście"""
+        requests.post(f"{BASE_URL}/accounts", json={"name": "Jan", "surname": "Kowalski", "pesel": PESEL})
+        yield
+        requests.delete(f"{BASE_URL}/accounts/{PESEL}", timeout=2)
+
+    def test_returns_delivery_handle(self):
+        start_time = time.perf_counter()
+        response = requests.post(f"{BASE_URL}/accounts/{PESEL}/history/email", json={"email": "jan@example.com"})
+        elapsed = time.perf_counter() - start_time
+
+        assert response.status_code == 202
+        body = response.json()
+        assert response.headers["Location"] == body["status_url"]
+        # Odpowiedź nie czeka na serwer SMTP
+        assert elapsed < 0.5
+
+        status = requests.get(f"http://127.0.0.1:5000{body['status_url']}")
+        assert status.status_code == 200
+        assert status.json()["id"] == body["delivery_id"]
+        assert status.json()["state"] in ("queued", "sending", "sent", "failed")
+        assert list(status.json()["recipients"]) == ["jan@example.com"]
+
+    @pytest.mark.parametrize("payload", [
+        {"email": "jan@example.com", "format": "text", "start": -10},
+        {"email": "jan@example.com", "compress": True},
+    ])
+    def test_statement_options(self, payload):
+        response = requests.post(f"{BASE_URL}/accounts/{PESEL}/history/email", json=payload)
+        assert response.status_code == 202
+
+    @pytest.mark.parametrize("payload", [
+        {},
+        {"email": "not-an-address"},
+        {"email": 5},
+        {"email": "jan@example.com", "format": "pdf"},
+        {"email": "jan@example.com", "start": "first"},
+    ])
+    def test_invalid_email(self, payload):
+        response = requests.post(f"{BASE_URL}/accounts/{PESEL}/history/email", json=payload)
+        assert response.status_code == 400
+
+    def test_unknown_account(self):
+        response = requests.post(f"{BASE_URL}/accounts/99999999999/history/email", json={"email": "jan@example.com"})
+        assert response.status_code == 404
+
+    def test_unknown_delivery(self):
+        assert requests.get(f"{BASE_URL}/emails/unknown").status_code == 404
+
+
+class TestAccountHistoryDownloadAPI:
+    """Testy integracyjne pobierania wyciągu z historii (GET /api/accounts/<pesel>/history)"""
+
+    @pytest.fixture(autouse=True)
+    def account(self):
+        """Fixture: Konto z trzema wpisami w historii"""
+        requests.post(f"{BASE_URL}/accounts", json={"name": "Jan", "surname": "Kowalski", "pesel": PESEL})
+        for transfer_type, amount in (("incoming", 100), ("incoming", 50), ("outgoing", 30)):
+            requests.post(f"{BASE_URL}/accounts/{PESEL}/transfer", json={"type": transfer_type, "amount": amount})
+        yield
+        requests.delete(f"{BASE_URL}/accounts/{PESEL}", timeout=2)
+
+    def test_csv(self):
+        response = requests.get(f"{BASE_URL}/accounts/{PESEL}/history")
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/csv")
+        assert 'filename="history.csv"' in response.headers["Content-Disposition"]
+        assert response.text == "entry,amount\n0,100.00\n1,50.00\n2,-30.00\n"
+
+    def test_range_and_compression(self):
+        response = requests.get(f"{BASE_URL}/accounts/{PESEL}/history", params={"start": 1, "stop": 2, "compress": "1"})
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "application/gzip"
+        assert gzip.decompress(response.content) == b"entry,amount\n1,50.00\n"
+
+    @pytest.mark.parametrize("params", [{"format": "pdf"}, {"start": "x"}])
+    def test_invalid_parameters(self, params):
+        assert requests.get(f"{BASE_URL}/accounts/{PESEL}/history", params=params).status_code == 400
+
+    def test_unknown_account(self):
+        assert requests.get(f"{BASE_URL}/accounts/99999999999/history").status_code == 404
@@ -0,0 +1,74 @@
+import pytest
+import requests
+
+BASE_URL = "http://127.0.0.1:5000/api/accounts"
+
+
+class TestAccountSearchAPI:
+    """Testy integracyjne API dla wyszukiwania kont (GET /api/accounts/search)"""
+
+    @pytest.fixture(autouse=True)
+    def accounts(self):
+        """Fixture: Trzy konta do wyszukiwania, sprzątane po teście"""
+        for name, surname, pesel in [
+            ("Jan", "Kowalski", "89092909876"),
+            ("Janina", "Kowalczyk", "89092909877"),
+            ("Adam", "Nowak", "89092909878"),
+        ]:
+            requests.post(BASE_URL, json={"name": name, "surname": surname, "pesel": pesel})
+        yield
+        try:
+            response = requests.get(BASE_URL, timeout=2)
+            if response.status_code == 200:
+                for account in response.json():
+                    requests.delete(f"{BASE_URL}/{account['pesel']}", timeout=2)
+        except requests.exceptions.RequestException:
+            pass
+
+    def search(self, **params):
+        return requests.get(f"{BASE_URL}/search", params=params)
+
+    def test_search_by_surname_prefix(self):
+        response = self.search(surname="kowal")
+        assert response.status_code == 200
+        assert [acc["pesel"] for acc in response.json()] == ["89092909876", "89092909877"]
+
+    def test_search_by_name_and_surname(self):
+        response = self.search(name="jan", surname="kowalc")
+        assert response.status_code == 200
+        assert response.json() == [
+            {"name": "Janina", "surname": "Kowalczyk", "pesel": "89092909877", "balance": 0.0}
+        ]
+
+    def test_search_by_fragment(self):
+        response = self.search(q="owak")
+        assert response.status_code == 200
+        assert [acc["pesel"] for acc in response.json()] == ["89092909878"]
+
+    def test_search_with_limit(self):
+        response = self.search(q="owa", limit=1)
+        assert response.status_code == 200
+        assert len(response.json()) == 1
+
+    def test_search_after_patch_uses_new_surname(self):
+        requests.patch(f"{BASE_URL}/89092909878", json={"surname": "Zieliński"})
+        assert self.search(surname="nowak").json() == []
+        assert [acc["pesel"] for acc in self.search(surname="ziel").json()] == ["89092909878"]
+
+    def test_search_after_delete(self):
+        requests.delete(f"{BASE_URL}/89092909876")
+        assert [acc["pesel"] for acc in self.search(surname="kowal").json()] == ["89092909877"]
+
+    def test_search_by_unknown_nip(self):
+        response = self.search(nip="0000000000")
+        assert response.status_code == 200
+        assert response.json() == []
+
+    def test_search_without_criteria(self):
+        response = self.search()
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("params", [{"q": "ko"}, {"name": "jan", "limit": "abc"}])
+    def test_search_invalid_params(self, params):
+        response = self.search(**params)
+        assert response.status_code == 400
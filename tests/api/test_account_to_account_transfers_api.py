@@ -0,0 +1,74 @@
+import pytest
+import requests
+
+BASE_URL = "http://127.0.0.1:5000/api"
+
+
+class TestAccountToAccountTransfersAPI:
+    """Testy integracyjne API dla przelewów między kontami (POST /api/transfers)"""
+
+    SOURCE = "12121212121"
+    TARGET = "13131313131"
+
+    @pytest.fixture(autouse=True)
+    def accounts(self):
+        """Fixture: Konto z 1000 zł i puste konto docelowe, sprzątane po teście"""
+        requests.post(f"{BASE_URL}/accounts", json={"name": "Rich", "surname": "Guy", "pesel": self.SOURCE})
+        requests.post(f"{BASE_URL}/accounts", json={"name": "Poor", "surname": "Guy", "pesel": self.TARGET})
+        requests.post(f"{BASE_URL}/accounts/{self.SOURCE}/transfer", json={"amount": 1000, "type": "incoming"})
+        yield
+        for pesel in (self.SOURCE, self.TARGET):
+            requests.delete(f"{BASE_URL}/accounts/{pesel}", timeout=2)
+
+    def balance(self, pesel):
+        return requests.get(f"{BASE_URL}/accounts/{pesel}").json()["balance"]
+
+    def test_transfer_success(self):
+        response = requests.post(f"{BASE_URL}/transfers", json={
+            "from": self.SOURCE, "to": self.TARGET, "amount": 300
+        })
+        assert response.status_code == 200
+        assert response.json()["message"] == "Zlecenie przyjęto do realizacji"
+        assert self.balance(self.SOURCE) == 700
+        assert self.balance(self.TARGET) == 300
+
+    def test_transfer_insufficient_funds(self):
+        response = requests.post(f"{BASE_URL}/transfers", json={
+            "from": self.TARGET, "to": self.SOURCE, "amount": 1
+        })
+        assert response.status_code == 422
+        assert "Insufficient funds" in response.json()["error"]
+        assert self.balance(self.SOURCE) == 1000
+
+    @pytest.mark.parametrize("source,target", [
+        ("99999999999", TARGET),
+        (SOURCE, "99999999999"),
+    ])
+    def test_transfer_account_not_found(self, source, target):
+        response = requests.post(f"{BASE_URL}/transfers", json={"from": source, "to": target, "amount": 1})
+        assert response.status_code == 404
+        assert self.balance(self.SOURCE) == 1000
+
+    def test_transfer_to_same_account(self):
+        response = requests.post(f"{BASE_URL}/transfers", json={
+            "from": self.SOURCE, "to": self.SOURCE, "amount": 1
+        })
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("body", [
+        {"from": SOURCE, "to": TARGET},
+        {"from": SOURCE, "to": TARGET, "amount": "300"},
+        {"from": SOURCE, "to": TARGET, "amount": True},
+        {"from": SOURCE, "to": TARGET, "amount": 0},
+        {"from": SOURCE, "to": TARGET, "amount": -5},
+        {"from": [SOURCE], "to": TARGET, "amount": 1},
+        {"from": SOURCE, "to": {"pesel": TARGET}, "amount": 1},
+        {"to": TARGET, "amount": 1},
+        [SOURCE, TARGET, 1],
+    ])
+    def test_transfer_invalid_body(self, body):
+        response = requests.post(f"{BASE_URL}/transfers", json=body)
+        assert response.status_code == 400
+        assert "error" in response.json()
+        assert self.balance(self.SOURCE) == 1000
+        assert self.balance(self.TARGET) == 0
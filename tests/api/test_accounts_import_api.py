@@ -0,0 +1,77 @@
+import json
+
+import pytest
+import requests
+
+BASE_URL = "http://127.0.0.1:5000/api/accounts"
+
+
+class TestAccountsImportAPI:
+    """Testy integracyjne API dla masowego importu kont (POST /api/accounts/import)"""
+
+    @pytest.fixture(autouse=True)
+    def cleanup(self):
+        requests.post(BASE_URL, json={"name": "Existing", "surname": "Account", "pesel": "89092909876"})
+        yield
+        try:
+            response = requests.get(BASE_URL, timeout=2)
+            if response.status_code == 200:
+                for account in response.json():
+                    requests.delete(f"{BASE_URL}/{account['pesel']}", timeout=2)
+        except requests.exceptions.RequestException:
+            pass
+
+    def test_import_ndjson(self):
+        rows = [
+            {"name": "Jan", "surname": "Kowalski", "pesel": "89092909877"},
+            {"name": "Anna", "surname": "Nowak", "pesel": "89092909876"},
+            {"name": "Adam", "surname": "Wójcik", "pesel": "123"},
+            {"name": "Jan", "surname": "Kowalski", "pesel": "89092909877"},
+        ]
+        body = "\n".join(json.dumps(row) for row in rows)
+        response = requests.post(f"{BASE_URL}/import", data=body.encode(),
+                                 headers={"Content-Type": "application/x-ndjson"})
+
+        assert response.status_code == 200
+        report = response.json()
+        assert report["imported"] == 1
+        assert report["rejected"] == 3
+        assert sorted(reject["row"] for reject in report["rejects"]) == [2, 3, 4]
+        assert requests.get(f"{BASE_URL}/count").json()["count"] == 2
+
+    def test_import_csv_streamed(self):
+        def body():
+            yield b"name,surname,pesel\n"
+            for i in range(500):
+                yield f"Jan,Kowalski{i},90{i:09d}\n".encode()
+
+        response = requests.post(f"{BASE_URL}/import", data=body(), params={"chunk_size": 100},
+                                 headers={"Content-Type": "text/csv"})
+
+        assert response.status_code == 200
+        assert response.json()["imported"] == 500
+        assert response.json()["rejected"] == 0
+        assert requests.get(f"{BASE_URL}/90000000499").json()["surname"] == "Kowalski499"
+
+    def test_import_unsupported_content_type(self):
+        response = requests.post(f"{BASE_URL}/import", json=[])
+        assert response.status_code == 415
+
+    @pytest.mark.parametrize("chunk_size", ["0", "abc"])
+    def test_import_invalid_chunk_size(self, chunk_size):
+        response = requests.post(f"{BASE_URL}/import", data=b"", params={"chunk_size": chunk_size},
+                                 headers={"Content-Type": "text/csv"})
+        assert response.status_code == 400
+
+    def test_import_csv_invalid_utf8(self):
+        """Linia spoza UTF-8 jest odrzucana jak inne złe wiersze; zły nagłówek to 400 (JSON, nie HTML 500)"""
+        body = b"name,surname,pesel\n\xff\xfe,Nowak,89092909877\nJan,Kowalski,89092909878\n"
+        response = requests.post(f"{BASE_URL}/import", data=body, headers={"Content-Type": "text/csv"})
+        assert response.status_code == 200
+        assert (response.json()["imported"], response.json()["rejected"]) == (1, 1)
+        assert response.json()["rejects"][0]["row"] == 1
+
+        response = requests.post(f"{BASE_URL}/import", data=b"\xff\xfename,surname,pesel\n",
+                                 headers={"Content-Type": "text/csv"})
+        assert response.status_code == 400
+        assert "UTF-8" in response.json()["error"]
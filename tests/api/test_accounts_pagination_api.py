@@ -0,0 +1,72 @@
+import json
+
+import pytest
+import requests
+
+BASE_URL = "http://127.0.0.1:5000/api/accounts"
+PESELS = [f"890929098{i:02d}" for i in range(7)]
+
+
+class TestAccountsPaginationAPI:
+    """Testy integracyjne stronicowania i strumieniowania listy kont (GET /api/accounts)"""
+
+    @pytest.fixture(autouse=True)
+    def accounts(self):
+        """Fixture: Siedem kont, sprzątane po teście"""
+        for pesel in PESELS:
+            requests.post(BASE_URL, json={"name": "Jan", "surname": "Kowalski", "pesel": pesel})
+        yield
+        try:
+            response = requests.get(BASE_URL, timeout=2)
+            if response.status_code == 200:
+                for account in response.json():
+                    requests.delete(f"{BASE_URL}/{account['pesel']}", timeout=2)
+        except requests.exceptions.RequestException:
+            pass
+
+    def test_default_returns_full_list(self):
+        response = requests.get(BASE_URL)
+        assert response.status_code == 200
+        assert [acc["pesel"] for acc in response.json()] == PESELS
+
+    def test_pages_with_cursor(self):
+        pesels, cursor = [], None
+        for _ in range(3):
+            params = {"limit": 3} if cursor is None else {"limit": 3, "cursor": cursor}
+            response = requests.get(BASE_URL, params=params)
+            assert response.status_code == 200
+            body = response.json()
+            pesels += [acc["pesel"] for acc in body["accounts"]]
+            cursor = body["next_cursor"]
+        assert cursor is None
+        assert pesels == PESELS
+
+    def test_cursor_survives_delete(self):
+        body = requests.get(BASE_URL, params={"limit": 2}).json()
+        requests.delete(f"{BASE_URL}/{PESELS[2]}")
+        body = requests.get(BASE_URL, params={"limit": 10, "cursor": body["next_cursor"]}).json()
+        assert [acc["pesel"] for acc in body["accounts"]] == PESELS[3:]
+
+    @pytest.mark.parametrize("params", [
+        {"limit": "abc"},
+        {"limit": 0},
+        {"cursor": "x"},
+        {"stream": "xml"},
+    ])
+    def test_invalid_parameters(self, params):
+        response = requests.get(BASE_URL, params=params)
+        assert response.status_code == 400
+        assert "error" in response.json()
+
+    def test_stream_json(self):
+        response = requests.get(BASE_URL, params={"stream": "json"})
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("application/json")
+        assert [acc["pesel"] for acc in response.json()] == PESELS
+
+    def test_stream_ndjson(self):
+        response = requests.get(BASE_URL, params={"stream": "ndjson"}, stream=True)
+        assert response.status_code == 200
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+        assert [acc["pesel"] for acc in lines] == PESELS
+        assert lines[0] == {"name": "Jan", "surname": "Kowalski", "pesel": PESELS[0], "balance": 0.0}
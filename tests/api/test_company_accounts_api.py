@@ -0,0 +1,52 @@
+import time
+
+import pytest
+import requests
+
+BASE_URL = "http://127.0.0.1:5000/api/company-accounts"
+# NIP bez podmiotu w wykazie MF - zlecenie zawsze kończy się odmową
+UNKNOWN_NIP = "0000000000"
+
+
+class TestCompanyAccountsAPI:
+    """Testy integracyjne asynchronicznego zakładania kont firmowych (POST /api/company-accounts)"""
+
+    def wait_for_job(self, status_url, timeout=15):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = requests.get(f"http://127.0.0.1:5000{status_url}").json()
+            if job["state"] in ("completed", "failed"):
+                return job
+            time.sleep(0.05)
+        pytest.fail("Registration job did not finish")
+
+    def test_returns_accepted_with_job(self):
+        start_time = time.perf_counter()
+        response = requests.post(BASE_URL, json={"company_name": "Firma", "nip": UNKNOWN_NIP})
+        elapsed = time.perf_counter() - start_time
+
+        assert response.status_code == 202
+        body = response.json()
+        assert response.headers["Location"] == body["status_url"]
+        # Odpowiedź nie czeka na API MF
+        assert elapsed < 0.5
+
+        job = self.wait_for_job(body["status_url"])
+        assert job["id"] == body["job_id"]
+        assert job["nip"] == UNKNOWN_NIP
+        assert job["state"] == "failed"
+        assert job["error"]
+
+    @pytest.mark.parametrize("payload", [
+        {"company_name": "Firma"},
+        {"nip": "1234567890"},
+        {"company_name": "Firma", "nip": "123"},
+        {"company_name": "Firma", "nip": "12345678ab"},
+    ])
+    def test_invalid_request(self, payload):
+        response = requests.post(BASE_URL, json=payload)
+        assert response.status_code == 400
+
+    def test_unknown_job(self):
+        response = requests.get(f"{BASE_URL}/jobs/unknown")
+        assert response.status_code == 404
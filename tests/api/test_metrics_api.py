@@ -0,0 +1,42 @@
+import requests
+
+BASE_URL = "http://127.0.0.1:5000/api"
+
+
+def read_metric(text, sample):
+    """Wartość próbki (nazwa z etykietami) z eksportu Prometheusa, 0 gdy jej nie ma"""
+    for line in text.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0.0
+
+
+class TestMetricsAPI:
+    """Testy integracyjne eksportu metryk (GET /api/metrics)"""
+
+    def test_prometheus_format(self):
+        response = requests.get(f"{BASE_URL}/metrics")
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert "# TYPE bank_http_request_duration_seconds histogram" in response.text
+        assert "# TYPE bank_accounts gauge" in response.text
+        assert "bank_http_requests_in_flight 1" in response.text
+
+    def test_counts_requests_by_status(self):
+        labels = 'method="GET",endpoint="/api/accounts/<pesel>",status="404"'
+        sample = f"bank_http_request_duration_seconds_count{{{labels}}}"
+        before = read_metric(requests.get(f"{BASE_URL}/metrics").text, sample)
+        for _ in range(3):
+            requests.get(f"{BASE_URL}/accounts/99999999999")
+
+        text = requests.get(f"{BASE_URL}/metrics").text
+        assert read_metric(text, sample) == before + 3
+        assert read_metric(text, f'bank_http_request_duration_seconds_quantile{{{labels},quantile="0.99"}}') > 0
+
+    def test_registry_size(self):
+        before = read_metric(requests.get(f"{BASE_URL}/metrics").text, "bank_accounts")
+        requests.post(f"{BASE_URL}/accounts", json={"name": "Jan", "surname": "Kowalski", "pesel": "89092909876"})
+        try:
+            assert read_metric(requests.get(f"{BASE_URL}/metrics").text, "bank_accounts") == before + 1
+        finally:
+            requests.delete(f"{BASE_URL}/accounts/89092909876")
@@ -0,0 +1,19 @@
+import pytest
+import requests
+
+BASE_URL = "http://127.0.0.1:5000/api"
+
+
+class TestProfilesAPI:
+    """Testy integracyjne endpointów profili - bez tokenu administratora dostęp jest zabroniony"""
+
+    @pytest.mark.parametrize("path", ["/profiles", "/profiles/1", "/profiles/1?format=collapsed"])
+    @pytest.mark.parametrize("headers", [{}, {"X-Admin-Token": "guess"}])
+    def test_requires_admin_token(self, path, headers):
+        response = requests.get(f"{BASE_URL}{path}", headers=headers)
+        assert response.status_code == 403
+        assert response.json()["error"] == "Admin token required"
+
+    def test_profile_header_without_token_is_ignored(self):
+        response = requests.get(f"{BASE_URL}/accounts/count", headers={"X-Profile": "guess"})
+        assert response.status_code == 200
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+import requests
+
+BASE_URL = "http://127.0.0.1:5000/api"
+
+
+class TestTransfersBatchAPI:
+    """Testy integracyjne API dla przelewów wsadowych (POST /api/transfers/batch)"""
+
+    RICH = "12121212121"
+    POOR = "13131313131"
+
+    @pytest.fixture(autouse=True)
+    def accounts(self):
+        """Fixture: Konto z 1000 zł i puste konto, sprzątane po teście"""
+        requests.post(f"{BASE_URL}/accounts", json={"name": "Rich", "surname": "Guy", "pesel": self.RICH})
+        requests.post(f"{BASE_URL}/accounts", json={"name": "Poor", "surname": "Guy", "pesel": self.POOR})
+        requests.post(f"{BASE_URL}/accounts/{self.RICH}/transfer", json={"amount": 1000, "type": "incoming"})
+        yield
+        for pesel in (self.RICH, self.POOR):
+            requests.delete(f"{BASE_URL}/accounts/{pesel}", timeout=2)
+
+    def balance(self, pesel):
+        return requests.get(f"{BASE_URL}/accounts/{pesel}").json()["balance"]
+
+    def test_batch_json_array(self):
+        response = requests.post(f"{BASE_URL}/transfers/batch", json=[
+            {"pesel": self.RICH, "amount": 300, "type": "outgoing"},
+            {"pesel": self.POOR, "amount": 50, "type": "incoming"},
+            {"pesel": self.RICH, "amount": 100, "type": "express"},
+            {"pesel": self.POOR, "amount": 500, "type": "outgoing"},
+            {"pesel": "99999999999", "amount": 10, "type": "incoming"},
+            {"pesel": self.RICH, "amount": 10, "type": "fast"},
+            {"pesel": self.RICH, "amount": "10", "type": "incoming"},
+            "not an object",
+        ])
+
+        assert response.status_code == 200
+        assert [result["status"] for result in response.json()["results"]] == [
+            200, 200, 200, 422, 404, 400, 400, 400
+        ]
+        assert "Insufficient funds" in response.json()["results"][3]["error"]
+        assert self.balance(self.RICH) == 599  # 1000 - 300 - 100 - 1
+        assert self.balance(self.POOR) == 50
+
+    def test_batch_keeps_order_within_account(self):
+        """Wypłata po wpłacie w tym samym batchu widzi już wpłacone środki"""
+        response = requests.post(f"{BASE_URL}/transfers/batch", json=[
+            {"pesel": self.POOR, "amount": 100, "type": "incoming"},
+            {"pesel": self.POOR, "amount": 80, "type": "outgoing"},
+            {"pesel": self.POOR, "amount": 80, "type": "outgoing"},
+        ])
+        assert [result["status"] for result in response.json()["results"]] == [200, 200, 422]
+        assert self.balance(self.POOR) == 20
+
+    def test_batch_ndjson_stream(self):
+        lines = [
+            json.dumps({"pesel": self.POOR, "amount": 100, "type": "incoming"}),
+            "{broken json",
+            "",
+            json.dumps({"pesel": self.POOR, "amount": 30, "type": "outgoing"}),
+        ]
+        response = requests.post(
+            f"{BASE_URL}/transfers/batch",
+            data=(line.encode() + b"\n" for line in lines),
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+        assert response.status_code == 200
+        assert [result["status"] for result in response.json()["results"]] == [200, 400, 200]
+        assert self.balance(self.POOR) == 70
+
+    def test_batch_empty(self):
+        response = requests.post(f"{BASE_URL}/transfers/batch", json=[])
+        assert response.status_code == 200
+        assert response.json()["results"] == []
+
+    def test_batch_invalid_body(self):
+        response = requests.post(f"{BASE_URL}/transfers/batch", json={"pesel": self.RICH})
+        assert response.status_code == 400
+
+    def test_batch_invalid_pesel_and_bool_amount(self):
+        """Niepoprawny PESEL (nie tekst) i kwota true to błąd 400 tylko dla tej pozycji"""
+        response = requests.post(f"{BASE_URL}/transfers/batch", json=[
+            {"pesel": ["x"], "amount": 1, "type": "incoming"},
+            {"amount": 1, "type": "incoming"},
+            {"pesel": self.POOR, "amount": True, "type": "incoming"},
+            {"pesel": self.POOR, "amount": 5, "type": "incoming"},
+        ])
+        assert response.status_code == 200
+        assert [result["status"] for result in response.json()["results"]] == [400, 400, 400, 200]
+        assert response.json()["results"][0]["error"] == "PESEL must be a string"
+        assert self.balance(self.POOR) == 5
@@ -0,0 +1,180 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import json
+import socketserver
+import threading
+import time
+import pytest
+
+
+class FakeMfServer:
+    """
+    Lokalny zastępca API białej listy MF: NIP -> statusVat (brak NIP = subject null,
+    "error" = odpowiedź 500, "invalid" = odpowiedź 200 z treścią, która nie jest JSON-em). Obsługuje /api/search/nip/{nip} i /api/search/nips/{nip,nip,...};
+    latency symuluje czas odpowiedzi na każde zapytanie.
+    """
+
+    def __init__(self, statuses, latency=0.0):
+        self.statuses = statuses
+        self.latency = latency
+        self.requests = []
+        self.connections = set()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                _, endpoint, value = url.path.rsplit("/", 2)
+                nips = value.split(",")
+                server.requests.append((value, parse_qs(url.query)["date"][0]))
+                server.connections.add(self.client_address)
+                time.sleep(server.latency)
+
+                statuses = [server.statuses.get(nip) for nip in nips]
+                if "error" in statuses:
+                    body, code = b"{}", 500
+                elif "invalid" in statuses:
+                    body, code = b"<html>maintenance</html>", 200
+                elif endpoint == "nips":
+                    subjects = [{"statusVat": status, "nip": nip} for nip, status in zip(nips, statuses) if status]
+                    body, code = json.dumps({"result": {"subjects": subjects}}).encode(), 200
+                else:
+                    subject = {"statusVat": statuses[0], "nip": nips[0]} if statuses[0] else None
+                    body, code = json.dumps({"result": {"subject": subject}}).encode(), 200
+                try:
+                    self.send_response(code)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass  # Klient nie czekał na odpowiedź (timeout)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self._httpd.server_address[1]}"
+        threading.Thread(target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def close(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture
+def mf_server():
+    """Fabryka lokalnych serwerów MF: mf_server(statuses, latency=0.0)"""
+    servers = []
+
+    def start(statuses, latency=0.0):
+        servers.append(FakeMfServer(statuses, latency))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+class FakeSmtpServer:
+    """
+    Lokalny odbiornik SMTP (sink) - przyjmuje i liczy wiadomości. temporary_failures:
+    adres -> ile razy odpowiedzieć 451 na RCPT TO przed przyjęciem; rejected: adresy
+    odrzucane na stałe (550). keep_data: zapamiętuje treść wiadomości (data).
+    """
+
+    def __init__(self, temporary_failures=None, rejected=(), keep_data=False):
+        self.temporary_failures = dict(temporary_failures or {})
+        self.rejected = set(rejected)
+        self.keep_data = keep_data
+        self.messages = []
+        self.data = []
+        self.connections = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def reply(self, line):
+                self.wfile.write(line.encode() + b"\r\n")
+
+            def handle(self):
+                with server._lock:
+                    server.connections += 1
+                self.reply("220 sink ready")
+                recipients = []
+                while True:
+                    line = self.rfile.readline()
+                    if not line:
+                        return
+                    command = line.decode().strip()
+                    verb = command[:4].upper()
+                    if verb in ("EHLO", "HELO"):
+                        self.reply("250 sink")
+                    elif verb == "MAIL":
+                        recipients = []
+                        self.reply("250 OK")
+                    elif verb == "RCPT":
+                        address = command.split(":", 1)[1].strip().strip("<>")
+                        with server._lock:
+                            failures = server.temporary_failures.get(address, 0)
+                            if failures:
+                                server.temporary_failures[address] = failures - 1
+                        if address in server.rejected:
+                            self.reply("550 mailbox unavailable")
+                        elif failures:
+                            self.reply("451 try again later")
+                        else:
+                            recipients.append(address)
+                            self.reply("250 OK")
+                    elif verb == "DATA":
+                        self.reply("354 end with .")
+                        lines = []
+                        while (data_line := self.rfile.readline()) != b".\r\n":
+                            if not data_line:
+                                # Połączenie zerwane w trakcie DATA - wiadomość nie jest przyjmowana
+                                return
+                            if server.keep_data:
+                                lines.append(data_line[1:] if data_line.startswith(b".") else data_line)
+                        with server._lock:
+                            server.messages.append(recipients)
+                            if server.keep_data:
+                                server.data.append(b"".join(lines))
+                        self.reply("250 queued")
+                    elif verb == "QUIT":
+                        self.reply("221 bye")
+                        return
+                    else:  # RSET, NOOP
+                        self.reply("250 OK")
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def delivered(self):
+        """Adresy, do których dotarła wiadomość (po jednym wpisie na wiadomość i adres)"""
+        with self._lock:
+            return [address for recipients in self.messages for address in recipients]
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def smtp_sink():
+    """Fabryka lokalnych odbiorników SMTP: smtp_sink(temporary_failures=None, rejected=(), keep_data=False)"""
+    servers = []
+
+    def start(temporary_failures=None, rejected=(), keep_data=False):
+        servers.append(FakeSmtpServer(temporary_failures, rejected, keep_data))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
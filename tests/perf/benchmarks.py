@@ -0,0 +1,311 @@
+"""
+Mikrobenchmarki operacji domenowych i rejestru (w procesie, bez serwera).
+
+Każdy benchmark mierzy czas jednej operacji (ns/op) przy skali N: N kont w rejestrze
+albo N wpisów w historii konta. Wynik to JSON, który można zapisać jako bazę
+i porównać z kolejnym uruchomieniem - wzrost czasu powyżej progu to regresja.
+
+Uruchomienie (z katalogu repozytorium):
+    python -m tests.perf.benchmarks --output baseline.json
+    python -m tests.perf.benchmarks --baseline baseline.json --output current.json
+    python -m tests.perf.benchmarks --scales 1000 --only registry. --only api.
+    python -m tests.perf.benchmarks --current current.json --baseline baseline.json
+Kod wyjścia 1 oznacza regresję względem bazy.
+"""
+from datetime import datetime, timezone
+from statistics import median
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+
+from src.account_registry import AccountRegistry
+from src.company_account import CompanyAccount
+from src.personal_account import PersonalAccount
+
+
+DEFAULT_SCALES = (1_000, 100_000, 1_000_000)
+ROUNDS = 5
+# Liczba operacji w rundzie - szybkie operacje są powtarzane, żeby pomiar nie był szumem zegara
+OPERATIONS = 10_000
+API_OPERATIONS = 500
+# Wzrost czasu (best) względem bazy uznawany za regresję: 0.25 = o 25% wolniej
+DEFAULT_THRESHOLD = 0.25
+
+# nazwa -> funkcja(scale) zwracająca (operacja, argumenty, reset przed rundą albo None)
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def _pesel(i):
+    return f"{i:011d}"
+
+
+def _spread(scale, count):
+    """count indeksów równomiernie z 0..scale-1 (lookup nie trafia tylko w najnowsze konta)"""
+    step = max(scale // count, 1)
+    return list(range(0, scale, step))[:count]
+
+
+def _registry(scale):
+    registry = AccountRegistry()
+    for i in range(scale):
+        registry.add_account(PersonalAccount("Bench", "User", _pesel(i)))
+    return registry
+
+
+def _personal_with_history(scale, amount=100.0):
+    return PersonalAccount.from_dict({
+        "first_name": "Bench", "last_name": "User", "pesel": _pesel(0),
+        "balance": amount * scale, "history": [amount] * scale,
+    })
+
+
+def _company_with_history(scale):
+    history = [1000.0] * (scale - 1) + [CompanyAccount.ZUS_PAYMENT]
+    return CompanyAccount.from_dict({
+        "company_name": "Bench", "nip": "8461627563", "balance": sum(history), "history": history,
+    })
+
+
+@benchmark("registry.lookup")
+def registry_lookup(scale):
+    registry = _registry(scale)
+    return registry.get_account_by_pesel, [_pesel(i) for i in _spread(scale, OPERATIONS)], None
+
+
+@benchmark("registry.insert")
+def registry_insert(scale):
+    registry = _registry(scale)
+    accounts = [PersonalAccount("Bench", "New", _pesel(scale + i)) for i in range(OPERATIONS)]
+
+    def reset():
+        for account in accounts:
+            registry.delete_account(account.pesel)
+    return registry.add_account, accounts, reset
+
+
+@benchmark("registry.delete")
+def registry_delete(scale):
+    registry = _registry(scale)
+    accounts = [registry.get_account_by_pesel(_pesel(i)) for i in _spread(scale, OPERATIONS)]
+
+    def reset():
+        for account in accounts:
+            registry.try_add_account(account)
+    return registry.delete_account, [account.pesel for account in accounts], reset
+
+
+@benchmark("account.incoming_transfer")
+def account_incoming_transfer(scale):
+    account = _personal_with_history(scale)
+    return account.incoming_transfer, [10.0] * OPERATIONS, None
+
+
+@benchmark("account.transfer_to")
+def account_transfer_to(scale):
+    source, target = _personal_with_history(scale), _personal_with_history(scale)
+    return (lambda amount: source.transfer_to(target, amount)), [1.0] * OPERATIONS, None
+
+
+@benchmark("loan.personal")
+def personal_loan(scale):
+    account = _personal_with_history(scale)
+    return account.submit_for_loan, [50.0] * OPERATIONS, None
+
+
+@benchmark("loan.company")
+def company_loan(scale):
+    account = _company_with_history(scale)
+    return account.take_loan, [10.0] * OPERATIONS, None
+
+
+def _serialization_operations(scale):
+    # Serializacja historii jest O(N) - przy 1M wpisów wystarczy kilka operacji na rundę
+    return max(3, min(OPERATIONS, 10_000_000 // scale))
+
+
+@benchmark("account.to_dict")
+def account_to_dict(scale):
+    account = _personal_with_history(scale)
+    return (lambda _: account.to_dict()), range(_serialization_operations(scale)), None
+
+
+@benchmark("account.from_dict")
+def account_from_dict(scale):
+    data = _personal_with_history(scale).to_dict()
+    return PersonalAccount.from_dict, [data] * _serialization_operations(scale), None
+
+
+def _api_client(scale):
+    import app.api as api
+    # Logi żądań nie są częścią pomiaru (i nie zaśmiecają wyjścia)
+    api.logs.stop()
+    api.registry.clear()
+    for i in range(scale):
+        api.registry.add_account(PersonalAccount("Bench", "User", _pesel(i)))
+    return api.app.test_client()
+
+
+@benchmark("api.get_account")
+def api_get_account(scale):
+    client = _api_client(scale)
+    urls = [f"/api/accounts/{_pesel(i)}" for i in _spread(scale, API_OPERATIONS)]
+    return client.get, urls, None
+
+
+@benchmark("api.account_count")
+def api_account_count(scale):
+    client = _api_client(scale)
+    return client.get, ["/api/accounts/count"] * API_OPERATIONS, None
+
+
+@benchmark("api.accounts_page")
+def api_accounts_page(scale):
+    client = _api_client(scale)
+    return client.get, ["/api/accounts?limit=100"] * API_OPERATIONS, None
+
+
+@benchmark("api.incoming_transfer")
+def api_incoming_transfer(scale):
+    client = _api_client(scale)
+    urls = [f"/api/accounts/{_pesel(i)}/transfer" for i in _spread(scale, API_OPERATIONS)]
+    return (lambda url: client.post(url, json={"type": "incoming", "amount": 10})), urls, None
+
+
+def measure(operation, items, reset=None, rounds=ROUNDS):
+    """Czas jednej operacji (s) w każdej rundzie - reset przed rundą, GC wyłączony jak w timeit"""
+    items = list(items)
+    # Rozgrzewka (pierwsze wywołania: importy, cache, alokacje) poza pomiarem
+    for item in items[:max(len(items) // 10, 1)]:
+        operation(item)
+    times = []
+    for _ in range(rounds):
+        if reset is not None:
+            reset()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start_time = time.perf_counter()
+            for item in items:
+                operation(item)
+            times.append((time.perf_counter() - start_time) / len(items))
+        finally:
+            if gc_enabled:
+                gc.enable()
+    return times
+
+
+def run(scales=DEFAULT_SCALES, only=(), rounds=ROUNDS, progress=None):
+    """
+    Uruchamia benchmarki (tylko te z nazwą zaczynającą się od prefiksu z only)
+    dla każdej skali i zwraca wyniki w formacie JSON (dict).
+    """
+    results = {}
+    for scale in scales:
+        for name, setup in BENCHMARKS.items():
+            if only and not name.startswith(tuple(only)):
+                continue
+            operation, items, reset = setup(scale)
+            times = measure(operation, items, reset, rounds)
+            results[f"{name}[{scale}]"] = {
+                "benchmark": name,
+                "scale": scale,
+                "operations": len(items),
+                "best_ns": round(min(times) * 1e9, 1),
+                "median_ns": round(median(times) * 1e9, 1),
+            }
+            if progress is not None:
+                progress(f"{name}[{scale}]", results[f"{name}[{scale}]"])
+            del operation, items, reset
+            gc.collect()
+    return {
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rounds": rounds,
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Porównanie wyników z bazą (czas best - najmniej zaszumiony). Status każdego benchmarku:
+    regression (wolniej o więcej niż threshold), improvement (szybciej o więcej niż threshold),
+    ok, new (brak w bazie) albo missing (brak w bieżących wynikach).
+    """
+    rows = []
+    current_results, baseline_results = current["results"], baseline["results"]
+    for key in list(current_results) + [key for key in baseline_results if key not in current_results]:
+        now, before = current_results.get(key), baseline_results.get(key)
+        if before is None or now is None:
+            status = "new" if before is None else "missing"
+            rows.append({"name": key, "status": status, "baseline_ns": before and before["best_ns"],
+                         "current_ns": now and now["best_ns"], "ratio": None})
+            continue
+        ratio = now["best_ns"] / before["best_ns"] if before["best_ns"] else float("inf")
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({"name": key, "status": status, "baseline_ns": before["best_ns"],
+                     "current_ns": now["best_ns"], "ratio": round(ratio, 3)})
+    return rows
+
+
+def _format_ns(value):
+    return "-" if value is None else f"{value:,.0f} ns"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="In-process microbenchmarks of registry, accounts and API")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="Comma separated scales (accounts in registry / history entries)")
+    parser.add_argument("--only", action="append", default=[], help="Run benchmarks with this name prefix")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--output", help="Write results JSON to this file")
+    parser.add_argument("--current", help="Compare this results file instead of running benchmarks")
+    parser.add_argument("--baseline", help="Results JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown reported as regression (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    if args.current:
+        with open(args.current) as file:
+            current = json.load(file)
+    else:
+        scales = [int(scale) for scale in args.scales.split(",")]
+        current = run(scales, args.only, args.rounds, progress=lambda key, result: print(
+            f"{key:<36} best {_format_ns(result['best_ns']):>16}  median {_format_ns(result['median_ns']):>16}",
+            flush=True))
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(current, file, indent=2)
+
+    if not args.baseline:
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    rows = compare(current, baseline, args.threshold)
+    print(f"\nCompared with {args.baseline} (threshold {args.threshold:.0%}):")
+    for row in rows:
+        ratio = "" if row["ratio"] is None else f"x{row['ratio']:.2f}"
+        print(f"{row['name']:<36} {_format_ns(row['baseline_ns']):>16} -> {_format_ns(row['current_ns']):>16}"
+              f"  {ratio:>7}  {row['status']}")
+    regressions = [row for row in rows if row["status"] == "regression"]
+    print(f"{len(regressions)} regression(s)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Benchmark pamięci kont - bajty na konto w rejestrze 100k/1M, klasy z __slots__ vs z __dict__"""
+import gc
+import threading
+import tracemalloc
+
+import pytest
+
+from src.account_registry import AccountRegistry
+from src.personal_account import PersonalAccount
+from src.transaction_history import TransactionHistory
+
+
+class DictPersonalAccount:
+    """Konto osobiste z atrybutami w __dict__ - układ pamięci sprzed przejścia na __slots__"""
+
+    def __init__(self, first_name, last_name, pesel, promo_code=None):
+        self.balance = 0.0
+        self.history = TransactionHistory()
+        self.lock = threading.RLock()
+        self.first_name = first_name
+        self.last_name = last_name
+        self.pesel = pesel
+        self.promo_code = promo_code
+
+
+def _bytes_per_account(account_class, size, registry=None):
+    """Średnia pamięć na konto: same obiekty kont albo konta razem z rejestrem (i jego indeksami)"""
+    gc.collect()
+    tracemalloc.start()
+    accounts = [account_class("Jan", "Kowalski", f"{i:011d}") for i in range(size)]
+    if registry is not None:
+        for account in accounts:
+            registry.add_account(account)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / size
+
+
+class TestAccountMemory:
+    """Bajty na konto przed (__dict__) i po (__slots__) dla 100k i 1M kont"""
+
+    @pytest.mark.parametrize("size", [100_000, 1_000_000])
+    def test_slots_reduce_account_footprint(self, size):
+        before = _bytes_per_account(DictPersonalAccount, size)
+        after = _bytes_per_account(PersonalAccount, size)
+        print(f"\n[{size} accounts] __dict__: {before:.0f} B/account, __slots__: {after:.0f} B/account "
+              f"(-{before - after:.0f} B)")
+        assert after < before
+
+    @pytest.mark.parametrize("size", [100_000])
+    def test_registry_bytes_per_account(self, size):
+        before = _bytes_per_account(DictPersonalAccount, size, AccountRegistry())
+        after = _bytes_per_account(PersonalAccount, size, AccountRegistry())
+        print(f"\n[registry {size} accounts] __dict__: {before:.0f} B/account, __slots__: {after:.0f} B/account")
+        assert after < before
@@ -0,0 +1,73 @@
+"""Benchmark pamięci listowania kont - cała lista JSON vs strony z kursorem i strumień NDJSON"""
+import time
+import tracemalloc
+
+import pytest
+
+import app.api as api
+from src.personal_account import PersonalAccount
+
+
+ACCOUNTS = 100_000
+PAGE_SIZE = 500
+# Strona/strumień trzyma w pamięci tylko kawałek odpowiedzi, a nie całą listę
+MAX_MEMORY_RATIO = 0.2
+
+
+@pytest.fixture(scope="module")
+def client():
+    api.registry.clear()
+    api.registry.try_add_accounts([
+        PersonalAccount("Jan", "Kowalski", f"{i:011d}") for i in range(ACCOUNTS)
+    ])
+    yield api.app.test_client()
+    api.registry.clear()
+
+
+def _measure(action):
+    """Zwraca (wynik, czas w sekundach, szczyt pamięci w bajtach)"""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = action()
+    duration = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, duration, peak
+
+
+def _full_list(client):
+    return len(client.get("/api/accounts").get_json())
+
+
+def _pages(client):
+    count, cursor = 0, None
+    while True:
+        query = {"limit": PAGE_SIZE} if cursor is None else {"limit": PAGE_SIZE, "cursor": cursor}
+        body = client.get("/api/accounts", query_string=query).get_json()
+        count += len(body["accounts"])
+        cursor = body["next_cursor"]
+        if cursor is None:
+            return count
+
+
+def _stream(client):
+    response = client.get("/api/accounts?stream=ndjson", buffered=False)
+    count = sum(chunk.count(b"\n") for chunk in response.response)
+    response.close()
+    return count
+
+
+class TestAccountsListingMemory:
+    """Szczyt pamięci przy listowaniu 100k kont różnymi trybami GET /api/accounts"""
+
+    def test_paged_and_streamed_listing_use_bounded_memory(self, client):
+        full_count, full_duration, full_peak = _measure(lambda: _full_list(client))
+        print(f"\n[listing {ACCOUNTS} accounts] full list: {full_duration * 1000:.0f} ms, "
+              f"peak {full_peak / 2**20:.1f} MiB")
+
+        for label, action in [("pages", _pages), ("ndjson stream", _stream)]:
+            count, duration, peak = _measure(lambda: action(client))
+            print(f"[listing {ACCOUNTS} accounts] {label}: {duration * 1000:.0f} ms, "
+                  f"peak {peak / 2**20:.1f} MiB ({peak / full_peak:.0%})")
+            assert count == full_count == ACCOUNTS
+            assert peak < full_peak * MAX_MEMORY_RATIO
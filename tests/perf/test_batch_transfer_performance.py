@@ -0,0 +1,74 @@
+"""Benchmark POST /api/transfers/batch względem pojedynczych POST /api/accounts/<pesel>/transfer"""
+import json
+import random
+import time
+
+import pytest
+
+from app.api import app, registry
+from src.personal_account import PersonalAccount
+
+
+ACCOUNTS = 1_000
+# Batch musi być co najmniej tyle razy szybszy niż te same operacje wysłane pojedynczo
+MIN_SPEEDUP = 5.0
+
+
+def _operations(count):
+    rng = random.Random(count)
+    types = ["incoming", "incoming", "outgoing", "express"]
+    return [
+        {"pesel": f"{rng.randrange(ACCOUNTS):011d}", "amount": rng.randint(1, 100), "type": rng.choice(types)}
+        for _ in range(count)
+    ]
+
+
+def _fresh_registry():
+    registry.clear()
+    for i in range(ACCOUNTS):
+        registry.add_account(PersonalAccount("Bench", "User", f"{i:011d}"))
+
+
+def _balances():
+    return [account.balance for account in registry.get_all_accounts()]
+
+
+class TestBatchTransferPerformance:
+    """Porównanie ścieżki pojedynczej i wsadowej dla 10k i 100k operacji"""
+
+    @pytest.fixture
+    def client(self):
+        yield app.test_client()
+        registry.clear()
+
+    @pytest.mark.parametrize("count", [10_000, 100_000])
+    def test_batch_vs_single_requests(self, client, count):
+        operations = _operations(count)
+
+        _fresh_registry()
+        start_time = time.perf_counter()
+        single_statuses = [
+            client.post(f"/api/accounts/{op['pesel']}/transfer", json=op).status_code for op in operations
+        ]
+        single_duration = time.perf_counter() - start_time
+        single_balances = _balances()
+
+        _fresh_registry()
+        start_time = time.perf_counter()
+        response = client.post("/api/transfers/batch", json=operations)
+        json_duration = time.perf_counter() - start_time
+        batch_statuses = [result["status"] for result in response.json["results"]]
+        assert batch_statuses == single_statuses
+        assert _balances() == single_balances
+
+        _fresh_registry()
+        body = "\n".join(json.dumps(op) for op in operations)
+        start_time = time.perf_counter()
+        response = client.post("/api/transfers/batch", data=body, content_type="application/x-ndjson")
+        ndjson_duration = time.perf_counter() - start_time
+        assert [result["status"] for result in response.json["results"]] == single_statuses
+
+        print(f"\n[{count} transfers] single: {count / single_duration:,.0f} ops/s, "
+              f"batch JSON: {count / json_duration:,.0f} ops/s, batch NDJSON: {count / ndjson_duration:,.0f} ops/s")
+        assert single_duration / json_duration > MIN_SPEEDUP
+        assert single_duration / ndjson_duration > MIN_SPEEDUP
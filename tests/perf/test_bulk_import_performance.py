@@ -0,0 +1,93 @@
+"""Benchmark POST /api/accounts/import - wiersze/s i pamięć niezależna od rozmiaru uploadu"""
+import io
+import tracemalloc
+
+import pytest
+
+from app.api import app, registry
+
+
+HEADER = b"name,surname,pesel\n"
+# Narzut pamięci importu (poza samymi kontami w rejestrze) dla 10x większego uploadu
+MAX_MEMORY_GROWTH = 1.5
+
+
+class GeneratedCsv(io.RawIOBase):
+    """Body CSV generowane w locie przy odczycie - test nie trzyma całego uploadu w pamięci"""
+
+    LINE = "Jan,Kowalski,{:011d}\n"
+
+    def __init__(self, rows, first_pesel=0):
+        self._rows = iter(range(first_pesel, first_pesel + rows))
+        self._buffer = HEADER
+        self.length = len(HEADER) + rows * len(self.LINE.format(0))
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while len(self._buffer) < len(target):
+            row = next(self._rows, None)
+            if row is None:
+                break
+            self._buffer += self.LINE.format(row).encode()
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def _post_csv(client, body):
+    response = client.post("/api/accounts/import", content_type="text/csv", environ_overrides={
+        "wsgi.input": body, "CONTENT_LENGTH": str(body.length)
+    })
+    assert response.status_code == 200
+    return response.json
+
+
+def _import_traced(client, rows, first_pesel=0):
+    """Import pod tracemalloc; zwraca (raport, narzut pamięci ponad to, co zostaje w rejestrze)"""
+    tracemalloc.start()
+    report = _post_csv(client, GeneratedCsv(rows, first_pesel))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return report, peak - current
+
+
+class TestBulkImportPerformance:
+    """Import 10k i 100k wierszy - narzut pamięci ma być stały, raportujemy wiersze/s"""
+
+    @pytest.fixture
+    def client(self):
+        registry.clear()
+        yield app.test_client()
+        registry.clear()
+
+    @pytest.mark.parametrize("rows", [10_000, 100_000])
+    def test_import_throughput(self, client, rows):
+        report = _post_csv(client, GeneratedCsv(rows))
+        assert report["imported"] == rows
+        print(f"\n[import {rows}] {report['rows_per_second']:,.0f} rows/s")
+
+    def test_import_memory_is_flat(self, client):
+        small_report, small_overhead = _import_traced(client, 10_000)
+        large_report, large_overhead = _import_traced(client, 100_000, first_pesel=10_000)
+
+        assert small_report["imported"] == 10_000
+        assert large_report["imported"] == 100_000
+        assert registry.get_account_count() == 110_000
+        print(f"\n[import 10k] overhead {small_overhead / 1024:.0f} KiB"
+              f"\n[import 100k] overhead {large_overhead / 1024:.0f} KiB")
+        assert large_overhead < small_overhead * MAX_MEMORY_GROWTH
+
+    def test_rejected_rows_memory_is_flat(self, client):
+        """Same duplikaty - nic nie zostaje w rejestrze, więc cały szczyt pamięci to narzut importu"""
+        _post_csv(client, GeneratedCsv(100_000))
+        small_report, small_overhead = _import_traced(client, 10_000)
+        large_report, large_overhead = _import_traced(client, 100_000)
+
+        assert large_report["imported"] == 0
+        assert large_report["rejected"] == 100_000
+        print(f"\n[duplicates 10k] overhead {small_overhead / 1024:.0f} KiB"
+              f"\n[duplicates 100k] overhead {large_overhead / 1024:.0f} KiB")
+        assert large_overhead < small_overhead * MAX_MEMORY_GROWTH
@@ -0,0 +1,65 @@
+"""Stress test blokad kont - 32 wątki x 100k przelewów, wynik musi się zgadzać co do grosza"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.account_registry import AccountRegistry
+from src.personal_account import PersonalAccount
+
+
+THREADS = 32
+TRANSFERS_PER_THREAD = 100_000
+SHARED_PESEL = "00000000000"
+
+
+class TestConcurrencyStress:
+    """Stress test: wspólne konto pod dużą współbieżnością + prywatne konto każdego wątku"""
+
+    def test_32_threads_x_100k_transfers(self):
+        """
+        Test: Każdy wątek na zmianę wpłaca 2.0 i wypłaca 1.0 ze wspólnego konta,
+        a co 10. operację robi przelew express ze swojego prywatnego konta.
+        Saldo i historia muszą dokładnie odpowiadać liczbie operacji.
+        """
+        registry = AccountRegistry()
+        registry.add_account(PersonalAccount("Shared", "Account", SHARED_PESEL))
+        for i in range(THREADS):
+            private = PersonalAccount("Private", f"Account{i}", f"{i + 1:011d}")
+            private.incoming_transfer(TRANSFERS_PER_THREAD)
+            registry.add_account(private)
+
+        barrier = threading.Barrier(THREADS)
+
+        def worker(i):
+            shared = registry.get_account_by_pesel(SHARED_PESEL)
+            private = registry.get_account_by_pesel(f"{i + 1:011d}")
+            barrier.wait()
+            for n in range(TRANSFERS_PER_THREAD):
+                if n % 2 == 0:
+                    assert shared.incoming_transfer(2.0)
+                else:
+                    # Każda wypłata jest poprzedzona wpłatą tego samego wątku - zawsze się udaje
+                    assert shared.outgoing_transfer(1.0)
+                if n % 10 == 0:
+                    assert private.express_outgoing_pers(9.0)
+
+        start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=THREADS) as executor:
+            list(executor.map(worker, range(THREADS)))
+        duration = time.perf_counter() - start_time
+        print(f"\n[{THREADS} threads x {TRANSFERS_PER_THREAD} transfers] {duration:.2f}s, "
+              f"{THREADS * TRANSFERS_PER_THREAD / duration:,.0f} transfers/s")
+
+        half = THREADS * TRANSFERS_PER_THREAD // 2
+        shared = registry.get_account_by_pesel(SHARED_PESEL)
+        assert shared.balance == half * 2.0 - half * 1.0
+        assert len(shared.history) == THREADS * TRANSFERS_PER_THREAD
+        assert shared.history.count(2.0) == half
+        assert shared.history.count(-1.0) == half
+        assert sum(shared.history) == shared.balance
+
+        expresses = TRANSFERS_PER_THREAD // 10
+        for i in range(THREADS):
+            private = registry.get_account_by_pesel(f"{i + 1:011d}")
+            assert private.balance == TRANSFERS_PER_THREAD - expresses * 10.0
+            assert private.history == [float(TRANSFERS_PER_THREAD)] + [-9.0, -1.0] * expresses
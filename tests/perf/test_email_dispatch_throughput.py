@@ -0,0 +1,43 @@
+"""Benchmark wysyłki maili - 10k wiadomości do lokalnego odbiornika SMTP: połączenie na wiadomość vs pula"""
+import smtplib
+import time
+
+from src.email_dispatcher import EmailDispatcher
+
+
+MESSAGES = 10_000
+WORKERS = 4
+# Pula z utrzymywanymi połączeniami ma być wyraźnie szybsza niż nowe połączenie na każdą wiadomość
+MIN_SPEEDUP = 2.0
+
+
+class TestEmailDispatchThroughput:
+    """Przepustowość EmailDispatcher na odbiorniku SMTP (tests/conftest.py)"""
+
+    def test_pool_vs_connection_per_message(self, smtp_sink):
+        sink = smtp_sink()
+        print()
+
+        # Dawna ścieżka: nowe połączenie SMTP dla każdej wiadomości, wysyłka w wątku wywołującym
+        start_time = time.perf_counter()
+        for i in range(MESSAGES):
+            with smtplib.SMTP("127.0.0.1", sink.port) as connection:
+                connection.sendmail("bank@example.com", [f"user{i}@example.com"], b"Subject: History\r\n\r\n[]")
+        sequential = time.perf_counter() - start_time
+        print(f"[email {MESSAGES} messages] connection per message: {sequential:.2f} s "
+              f"({MESSAGES / sequential:.0f} msg/s)")
+
+        dispatcher = EmailDispatcher("127.0.0.1", sink.port, workers=WORKERS, queue_size=MESSAGES)
+        start_time = time.perf_counter()
+        handles = [dispatcher.submit("History", "[]", [f"user{i}@example.com"]) for i in range(MESSAGES)]
+        submitted = time.perf_counter() - start_time
+        assert all(handle.wait(60) for handle in handles)
+        pooled = time.perf_counter() - start_time
+        dispatcher.close()
+        print(f"[email {MESSAGES} messages] pool of {WORKERS}: {pooled:.2f} s ({MESSAGES / pooled:.0f} msg/s), "
+              f"submit {submitted / MESSAGES * 1e6:.0f} us/msg, connections {dispatcher.stats()['connections']}")
+
+        assert dispatcher.stats()["sent"] == MESSAGES
+        assert len(sink.delivered()) == 2 * MESSAGES
+        assert dispatcher.stats()["connections"] == WORKERS
+        assert sequential / pooled > MIN_SPEEDUP
@@ -0,0 +1,49 @@
+"""Benchmark pamięci historii transakcji - 1M wpisów w liście vs w TransactionHistory"""
+import time
+import tracemalloc
+
+from src.transaction_history import TransactionHistory
+
+
+ENTRIES = 1_000_000
+# array('d') + znacznik int: 9 B na wpis zamiast ~32 B w liście floatów
+MAX_MEMORY_RATIO = 0.35
+
+
+def _measure(build):
+    """Zwraca (obiekt, zajęta pamięć w bajtach)"""
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def _fill(history):
+    for i in range(ENTRIES):
+        history.append(i * 0.5 if i % 2 else -i * 0.25)
+    return history
+
+
+class TestHistoryMemory:
+    """Porównanie pamięci i czasu serializacji historii 1M wpisów"""
+
+    def test_1m_entries_list_vs_transaction_history(self):
+        as_list, list_bytes = _measure(lambda: _fill([]))
+        compact, compact_bytes = _measure(lambda: _fill(TransactionHistory()))
+
+        assert compact == as_list
+        ratio = compact_bytes / list_bytes
+        print(f"\n[history {ENTRIES} entries] list: {list_bytes / ENTRIES:.1f} B/entry, "
+              f"TransactionHistory: {compact_bytes / ENTRIES:.1f} B/entry ({ratio:.0%})")
+        assert ratio < MAX_MEMORY_RATIO
+
+        start_time = time.perf_counter()
+        serialized = compact.tolist()
+        serialize_duration = time.perf_counter() - start_time
+        start_time = time.perf_counter()
+        restored = TransactionHistory(serialized)
+        restore_duration = time.perf_counter() - start_time
+        print(f"[history {ENTRIES} entries] tolist: {serialize_duration * 1000:.1f} ms, "
+              f"restore: {restore_duration * 1000:.1f} ms")
+        assert restored == compact
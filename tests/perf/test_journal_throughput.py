@@ -0,0 +1,83 @@
+"""Benchmark przelewów z dziennikiem zmian - przepustowość dla każdego trybu trwałości"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+import pytest
+
+from src.account_journal import AccountJournal
+from src.account_registry import AccountRegistry
+from src.personal_account import PersonalAccount
+
+
+ACCOUNTS = 64
+TRANSFERS = 4_000
+
+
+def _run_concurrently(threads, worker):
+    barrier = threading.Barrier(threads)
+
+    def run(i):
+        barrier.wait()
+        worker(i)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(run, range(threads)))
+    return time.perf_counter() - start_time
+
+
+class TestJournalThroughput:
+    """Przelewy incoming przez AccountJournal.transfer; po odtworzeniu stan musi się zgadzać"""
+
+    def _bench(self, directory, durability, threads):
+        registry = AccountRegistry()
+        journal = AccountJournal(registry, directory, durability=durability)
+        journal.recover()
+        accounts = [PersonalAccount("Bench", "User", f"{i:011d}") for i in range(ACCOUNTS)]
+        journal.try_add_accounts(accounts)
+
+        fsyncs = []
+        real_fsync = os.fsync
+
+        def counting_fsync(fd):
+            fsyncs.append(fd)
+            real_fsync(fd)
+
+        def worker(i):
+            for n in range(TRANSFERS // threads):
+                account = accounts[(i + n * threads) % ACCOUNTS]
+                with journal.transfer(account):
+                    account.incoming_transfer(1)
+
+        with patch("src.account_journal.os.fsync", side_effect=counting_fsync):
+            duration = _run_concurrently(threads, worker)
+            journal.close()
+        return registry, duration, len(fsyncs)
+
+    @pytest.mark.parametrize("threads", [1, 16])
+    def test_throughput_per_durability_mode(self, tmp_path, threads):
+        durations = {}
+        _, durations["off"], _ = self._bench(None, "group", threads)
+        print(f"\n[journal {threads} threads] off: {TRANSFERS / durations['off']:.0f} transfers/s")
+
+        for durability in AccountJournal.DURABILITY_MODES:
+            directory = str(tmp_path / durability)
+            registry, durations[durability], fsyncs = self._bench(directory, durability, threads)
+            print(f"[journal {threads} threads] {durability}: {TRANSFERS / durations[durability]:.0f} transfers/s, "
+                  f"{fsyncs} fsyncs")
+
+            recovered = AccountRegistry()
+            journal = AccountJournal(recovered, directory)
+            journal.recover()
+            journal.close()
+            assert sum(account.balance for account in recovered.get_all_accounts()) == TRANSFERS
+            if durability == "sync":
+                assert fsyncs >= TRANSFERS
+
+        # Group commit: wiele wątków dzieli fsync, więc nie płaci po jednym na przelew
+        if threads > 1:
+            assert durations["group"] < durations["sync"]
+        assert durations["async"] < durations["sync"]
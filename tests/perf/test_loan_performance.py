@@ -0,0 +1,49 @@
+"""Performance tests decyzji kredytowych - czas nie zależy od długości historii"""
+import time
+
+import pytest
+
+from src.company_account import CompanyAccount
+from src.personal_account import PersonalAccount
+
+
+CALLS = 10_000
+MAX_SLOWDOWN = 3.0
+
+
+def _history(length):
+    return [100.0 if i % 3 else -50.0 for i in range(length)]
+
+
+def _average_time(call):
+    start_time = time.perf_counter()
+    for _ in range(CALLS):
+        call()
+    return (time.perf_counter() - start_time) / CALLS
+
+
+class TestLoanPerformance:
+    """Decyzja kredytowa przy 10 i 1M wpisów w historii"""
+
+    @pytest.mark.parametrize("account_type", ["personal", "company"])
+    def test_loan_decision_time_is_flat(self, account_type):
+        results = {}
+        for length in (10, 1_000_000):
+            if account_type == "personal":
+                account = PersonalAccount.from_dict({
+                    "first_name": "Jan", "last_name": "Kowalski", "pesel": "89092909876",
+                    "balance": 0.0, "history": _history(length),
+                })
+                # Kwota kredytu, której reguły nie przyznają - saldo się nie zmienia między wywołaniami
+                decide = lambda: account.submit_for_loan(10 ** 9)
+            else:
+                account = CompanyAccount.from_dict({
+                    "company_name": "Firma", "nip": "1234567890", "balance": 0.0, "history": _history(length),
+                })
+                # Brak wpłaty do ZUS - dawniej pełny skan historii przy każdym wywołaniu
+                decide = lambda: account.take_loan(0)
+            results[length] = _average_time(decide)
+
+        print(f"\n[{account_type} loan] history 10: {results[10] * 1e9:.0f} ns, "
+              f"history 1M: {results[1_000_000] * 1e9:.0f} ns")
+        assert results[1_000_000] < results[10] * MAX_SLOWDOWN
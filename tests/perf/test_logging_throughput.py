@@ -0,0 +1,86 @@
+"""Benchmark logowania żądań - przepustowość gorących tras bez logów, z logami JSON w tle i z print"""
+import contextlib
+import io
+import time
+
+import app.api as api
+from src.structured_logging import StructuredLogging
+
+
+REQUESTS = 2_000
+ROUNDS = 3
+ROUTES = [
+    ("post", "/api/accounts"),
+    ("get", "/api/accounts/count"),
+    ("get", "/api/accounts?limit=10"),
+]
+# Zapis do wolnego stdout (terminal, pełny pipe) - tyle trwa jedna linia
+WRITE_LATENCY = 0.0002
+# Logi w tle mogą kosztować najwyżej tyle przepustowości (wątek zapisujący dzieli GIL
+# z wątkiem żądań, a wyniki na wspólnej maszynie wahają się o kilkanaście procent)
+MIN_THROUGHPUT_RATIO = 0.7
+
+
+class SlowStream(io.StringIO):
+    def write(self, text):
+        time.sleep(WRITE_LATENCY)
+        return len(text)
+
+
+def _requests_per_second(client):
+    start_time = time.perf_counter()
+    for i in range(REQUESTS):
+        method, url = ROUTES[i % len(ROUTES)]
+        if method == "post":
+            client.post(url, json={"name": "Jan", "surname": "Kowalski", "pesel": f"{i:011d}"})
+        else:
+            client.get(url)
+    return REQUESTS / (time.perf_counter() - start_time)
+
+
+class TestLoggingThroughput:
+    """Żądania/s na trasach z logami: wyłączone, JSON w tle (pełne i próbkowane), synchroniczny print"""
+
+    def measure(self, monkeypatch, logs, log_request=None):
+        monkeypatch.setattr(api, "logs", logs)
+        if log_request is not None:
+            monkeypatch.setattr(api, "log_request", log_request)
+        logs.start()
+        try:
+            api.registry.clear()
+            return _requests_per_second(api.app.test_client())
+        finally:
+            logs.stop()
+            api.registry.clear()
+            monkeypatch.undo()
+
+    def test_logging_enabled_vs_disabled(self, monkeypatch):
+        api.logs.stop()
+        sampling = {"GET /api/accounts": 0.01, "GET /api/accounts/count": 0.01}
+
+        def print_request(route, message, **fields):
+            # Dawny synchroniczny print na każdej trasie
+            print(message, fields, flush=True)
+
+        configs = {
+            "disabled": lambda: self.measure(monkeypatch, StructuredLogging("OFF")),
+            "background": lambda: self.measure(monkeypatch, background),
+            "sampled 1%": lambda: self.measure(monkeypatch, StructuredLogging(sampling=sampling, stream=SlowStream())),
+            "print": lambda: self.measure(monkeypatch, StructuredLogging("OFF"), print_request),
+        }
+        best = dict.fromkeys(configs, 0.0)
+        dropped = 0
+        _requests_per_second(api.app.test_client())  # rozgrzewka
+        for _ in range(ROUNDS):
+            # Konfiguracje na przemian - zmiany obciążenia maszyny rozkładają się na wszystkie
+            for name, run in configs.items():
+                background = StructuredLogging(stream=SlowStream())
+                with contextlib.redirect_stdout(SlowStream()):
+                    best[name] = max(best[name], run())
+                dropped += background.dropped if name == "background" else 0
+
+        print(f"\n[logging {REQUESTS} requests, {WRITE_LATENCY * 1e6:.0f} us per written line] "
+              + ", ".join(f"{name}: {rate:.0f} req/s" for name, rate in best.items())
+              + f" (background dropped {dropped} records)")
+        assert best["background"] > best["disabled"] * MIN_THROUGHPUT_RATIO
+        assert best["background"] > best["print"]
@@ -0,0 +1,53 @@
+"""Benchmark narzutu metryk na żądanie - middleware WSGI i koszt eksportu /api/metrics"""
+import time
+
+from werkzeug.routing import Rule
+from werkzeug.test import EnvironBuilder
+
+from app.api import app, instrument_requests
+from src.metrics import metrics
+
+
+REQUESTS = 100_000
+ROUNDS = 5
+# Narzut instrumentacji na jedno żądanie
+MAX_OVERHEAD_US = 5.0
+MAX_RENDER_MS = 50
+
+
+def _plain_app(environ, start_response):
+    """Aplikacja WSGI bez żadnej pracy - mierzony jest sam narzut middleware"""
+    start_response("200 OK", [])
+    return [b"ok"]
+
+
+def _best_time(wsgi_app, environ):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start_time = time.perf_counter()
+        for _ in range(REQUESTS):
+            wsgi_app(environ, lambda status, headers, exc_info=None: None)
+        best = min(best, time.perf_counter() - start_time)
+    return best
+
+
+class TestMetricsOverhead:
+    """Czas żądania z middleware metryk w porównaniu z aplikacją bez niego"""
+
+    def test_request_instrumentation_overhead(self):
+        environ = EnvironBuilder(path="/api/accounts/12345678901").get_environ()
+        flask_request = app.request_class(environ)
+        flask_request.url_rule = Rule("/api/accounts/<pesel>")
+
+        baseline = _best_time(_plain_app, environ)
+        instrumented = _best_time(instrument_requests(_plain_app), environ)
+        overhead_us = (instrumented - baseline) / REQUESTS * 1e6
+        print(f"\n[metrics {REQUESTS} requests] instrumentation overhead: {overhead_us:.2f} us/request")
+        assert overhead_us < MAX_OVERHEAD_US
+
+        start_time = time.perf_counter()
+        text = metrics.render()
+        render_ms = (time.perf_counter() - start_time) * 1000
+        print(f"[metrics] render: {render_ms:.2f} ms, {len(text.splitlines())} lines")
+        assert 'endpoint="/api/accounts/<pesel>"' in text
+        assert render_ms < MAX_RENDER_MS
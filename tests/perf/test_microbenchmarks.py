@@ -0,0 +1,70 @@
+"""Zestaw mikrobenchmarków (tests/perf/benchmarks.py) w małej skali - wyniki JSON i porównanie z bazą"""
+import copy
+import json
+
+import pytest
+
+import app.api as api
+from tests.perf import benchmarks
+
+
+SCALE = 1_000
+ROUNDS = 2
+
+
+@pytest.fixture(scope="module")
+def results():
+    try:
+        results = benchmarks.run([SCALE], rounds=ROUNDS)
+    finally:
+        api.registry.clear()
+        api.logs.start()
+    print(f"\n[microbenchmarks {SCALE}] " + ", ".join(
+        f"{result['benchmark']}: {result['best_ns']:.0f} ns" for result in results["results"].values()))
+    return results
+
+
+class TestMicrobenchmarks:
+    """Każdy benchmark daje wynik, a porównanie z bazą wykrywa regresje"""
+
+    def test_results_cover_all_benchmarks(self, results):
+        assert set(results["results"]) == {f"{name}[{SCALE}]" for name in benchmarks.BENCHMARKS}
+        for result in results["results"].values():
+            assert 0 < result["best_ns"] <= result["median_ns"]
+            assert result["scale"] == SCALE
+        # O(1) operacje rejestru i konta są o rzędy wielkości szybsze niż żądanie przez Flaska
+        assert results["results"][f"registry.lookup[{SCALE}]"]["best_ns"] < \
+            results["results"][f"api.get_account[{SCALE}]"]["best_ns"]
+        json.dumps(results)
+
+    def test_compare(self, results):
+        assert {row["status"] for row in benchmarks.compare(results, results)} == {"ok"}
+
+        baseline = copy.deepcopy(results)
+        baseline["results"][f"registry.lookup[{SCALE}]"]["best_ns"] /= 2
+        baseline["results"][f"loan.company[{SCALE}]"]["best_ns"] *= 2
+        baseline["results"]["registry.lookup[1]"] = baseline["results"][f"registry.lookup[{SCALE}]"]
+        del baseline["results"][f"account.to_dict[{SCALE}]"]
+        rows = {row["name"]: row for row in benchmarks.compare(results, baseline, threshold=0.25)}
+        assert rows[f"registry.lookup[{SCALE}]"]["status"] == "regression"
+        assert rows[f"registry.lookup[{SCALE}]"]["ratio"] == pytest.approx(2.0)
+        assert rows[f"loan.company[{SCALE}]"]["status"] == "improvement"
+        assert rows[f"account.to_dict[{SCALE}]"]["status"] == "new"
+        assert rows["registry.lookup[1]"]["status"] == "missing"
+
+    def test_command_line_compare(self, results, tmp_path):
+        current, baseline = tmp_path / "current.json", tmp_path / "baseline.json"
+        current.write_text(json.dumps(results))
+        baseline.write_text(json.dumps(results))
+        assert benchmarks.main(["--current", str(current), "--baseline", str(baseline)]) == 0
+
+        slower = copy.deepcopy(results)
+        slower["results"][f"registry.insert[{SCALE}]"]["best_ns"] *= 3
+        current.write_text(json.dumps(slower))
+        assert benchmarks.main(["--current", str(current), "--baseline", str(baseline)]) == 1
+
+    def test_command_line_run(self, tmp_path):
+        output = tmp_path / "results.json"
+        assert benchmarks.main(["--scales", "100", "--only", "loan.", "--rounds", "1", "--output", str(output)]) == 0
+        saved = json.loads(output.read_text())
+        assert set(saved["results"]) == {"loan.personal[100]", "loan.company[100]"}
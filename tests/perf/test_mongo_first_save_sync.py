@@ -0,0 +1,62 @@
+"""Benchmark pierwszego zapisu do MongoDB przy 1M kont w bazie - usuwanie kont spoza listy"""
+import time
+from unittest.mock import patch
+
+import bson
+
+from src.mongo_repository import MongoAccountsRepository
+
+
+STORED = 1_000_000
+# Konta z bazy, których nie ma już w rejestrze
+STALE = STORED // 10
+# Limit rozmiaru dokumentu BSON w MongoDB (także pojedynczego filtra i polecenia)
+MAX_BSON_SIZE = 16 * 1024 * 1024
+
+
+class StoredCollection:
+    """Kolekcja zastępująca MongoDB z zapisanymi dokumentami - mierzy rozmiar BSON wysłanych poleceń"""
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.batches = []
+
+    def find(self, query, projection=None, batch_size=None):
+        return iter(self.documents)
+
+    def bulk_write(self, operations, ordered=True):
+        self.batches.append(sum(len(bson.encode(operation._filter)) for operation in operations))
+
+    def delete_many(self, query):
+        raise AssertionError("delete_many with a filter of all keys would exceed the BSON limit")
+
+
+def _pesel(i):
+    return f"{i:011d}"
+
+
+class TestMongoFirstSaveSync:
+    """Pełna synchronizacja 1M kont: polecenia mieszczą się w limicie BSON"""
+
+    def test_delete_missing_at_1m_keys(self):
+        collection = StoredCollection([{"_id": i, "pesel": _pesel(i)} for i in range(STORED)])
+        history = StoredCollection([{"pesel": _pesel(i)} for i in range(STORED)])
+        collections = {"accounts": collection, "history_buckets": history}
+        with patch('src.mongo_repository.MongoClient') as mock_mongo_client:
+            mock_mongo_client.return_value.__getitem__.return_value.__getitem__.side_effect = collections.get
+            repo = MongoAccountsRepository()
+        current = dict.fromkeys(("pesel", _pesel(i)) for i in range(STALE, STORED))
+
+        start_time = time.perf_counter()
+        repo._delete_missing(current)
+        duration = time.perf_counter() - start_time
+
+        # Tak wyglądałby jeden filtr z listą wszystkich kluczy
+        single_filter = len(bson.encode({"$nor": [{"pesel": {"$in": [key[1] for key in current]}}]}))
+        print(f"\n[mongo sync {STORED} stored, {STALE} stale] {duration:.2f} s, "
+              f"{len(collection.batches)} + {len(history.batches)} batches, "
+              f"largest {max(collection.batches + history.batches) / 1024:.0f} KB "
+              f"(single $nor filter: {single_filter / 1024 / 1024:.1f} MB)")
+        assert single_filter > MAX_BSON_SIZE
+        assert len(collection.batches) == len(history.batches) == STALE // repo.BULK_BATCH_SIZE
+        assert max(collection.batches + history.batches) < MAX_BSON_SIZE
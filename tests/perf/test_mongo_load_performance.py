@@ -0,0 +1,109 @@
+"""Benchmark ładowania kont z MongoDB - 1M dokumentów: lista vs strumień, konstruktor vs szybkie odtwarzanie"""
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from src.account_registry import AccountRegistry
+from src.mongo_repository import MongoAccountsRepository
+from src.personal_account import PersonalAccount
+from src.transaction_history import TransactionHistory
+
+
+ACCOUNTS = 1_000_000
+HYDRATION_SAMPLE = 100_000
+# Pomiar pamięci pod tracemalloc jest kilka razy wolniejszy - na mniejszej próbce
+MEMORY_SAMPLE = 100_000
+
+
+def _documents(count):
+    """Dokumenty tworzone na bieżąco, jak z kursora MongoDB"""
+    for i in range(count):
+        yield {
+            "type": "personal", "first_name": "Jan", "last_name": "Kowalski", "pesel": f"{i:011d}",
+            "balance": 150.0, "history": [100.0, -20.0, 70.0], "promo_code": None,
+        }
+
+
+class GeneratedCollection:
+    def __init__(self, count):
+        self.count = count
+
+    def find(self, query=None, projection=None, batch_size=None):
+        return _documents(self.count)
+
+
+def _repo(count):
+    with patch('src.mongo_repository.MongoClient') as mock_mongo_client:
+        mock_mongo_client.return_value.__getitem__.return_value.__getitem__.return_value = \
+            GeneratedCollection(count)
+        return MongoAccountsRepository()
+
+
+def _constructor_hydrate(data):
+    """Dawna ścieżka from_dict: pełny konstruktor (walidacja PESEL, apply_promo), potem nadpisanie stanu"""
+    account = PersonalAccount(data["first_name"], data["last_name"], data["pesel"], data.get("promo_code"))
+    account.balance = data["balance"]
+    account.history = TransactionHistory(data["history"])
+    return account
+
+
+def _load_list(repo, registry):
+    """Dawny POST /api/accounts/load: cała lista kont, dopiero potem czyszczenie registry"""
+    accounts = repo.load_all()
+    registry.clear()
+    for account in accounts:
+        registry.add_account(account)
+    return registry.get_account_count()
+
+
+def _load_streamed(repo, registry):
+    """Obecny POST /api/accounts/load: czyszczenie registry i konta dodawane na bieżąco"""
+    registry.clear()
+    for account in repo.iter_all():
+        registry.add_account(account)
+    return registry.get_account_count()
+
+
+class TestMongoLoadPerformance:
+    """Czas i szczyt pamięci ładowania kont"""
+
+    def test_fast_hydration_is_faster_than_constructor(self):
+        documents = list(_documents(HYDRATION_SAMPLE))
+        durations = {}
+        print()
+        for label, hydrate in [("constructor", _constructor_hydrate), ("fast path", PersonalAccount.from_dict)]:
+            start_time = time.perf_counter()
+            for document in documents:
+                hydrate(document)
+            durations[label] = time.perf_counter() - start_time
+            print(f"[hydration {HYDRATION_SAMPLE} accounts] {label}: {durations[label] * 1000:.0f} ms")
+        assert durations["fast path"] < durations["constructor"]
+
+    def test_streaming_load_of_1m_accounts_into_registry(self):
+        registry = AccountRegistry()
+        start_time = time.perf_counter()
+        loaded = _load_streamed(_repo(ACCOUNTS), registry)
+        duration = time.perf_counter() - start_time
+        print(f"\n[load {ACCOUNTS} accounts] streamed into registry: {duration:.1f} s "
+              f"({ACCOUNTS / duration:.0f} accounts/s)")
+        assert loaded == ACCOUNTS
+
+    def test_streaming_load_does_not_keep_two_copies(self):
+        """Przy przeładowaniu registry dawna ścieżka trzymała naraz stare konta i nową listę"""
+        peaks = {}
+        print()
+        for label, load in [("list", _load_list), ("streamed", _load_streamed)]:
+            registry = AccountRegistry()
+            # Śledzimy też pierwsze ładowanie, żeby stare konta liczyły się do szczytu
+            tracemalloc.start()
+            load(_repo(MEMORY_SAMPLE), registry)
+            tracemalloc.reset_peak()
+            start_time = time.perf_counter()
+            loaded = load(_repo(MEMORY_SAMPLE), registry)
+            duration = time.perf_counter() - start_time
+            _, peaks[label] = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"[reload {MEMORY_SAMPLE} accounts] {label}: {duration:.1f} s, "
+                  f"peak {peaks[label] / 2**20:.1f} MiB")
+            assert loaded == MEMORY_SAMPLE
+        assert peaks["streamed"] < peaks["list"] * 0.85
@@ -0,0 +1,113 @@
+"""Benchmark zapisu do MongoDB - 100k kont z 1% zmienionych oraz konto z długą historią"""
+import time
+from unittest.mock import patch
+
+import pytest
+
+from src.mongo_repository import MongoAccountsRepository
+from src.personal_account import PersonalAccount
+
+
+ACCOUNTS = 100_000
+CHANGED = ACCOUNTS // 100
+# Zapis przyrostowy serializuje 1% kont, ale nadal sprawdza wersję każdego konta
+MAX_TIME_RATIO = 0.3
+# Konto z długą historią: przy historii w dokumencie każdy zapis wysyłał ją całą
+BUSY_HISTORY = 200_000
+NEW_ENTRIES = 10
+
+
+class CountingCollection:
+    """Kolekcja zastępująca MongoDB - liczy wywołania (round tripy) i wysłane operacje"""
+
+    def __init__(self):
+        self.round_trips = 0
+        self.operations = 0
+        self.history_entries = 0
+
+    def bulk_write(self, operations, ordered=True):
+        self.round_trips += 1
+        self.operations += len(operations)
+        for operation in operations:
+            document = getattr(operation, "_doc", None) or {}
+            # Wpisy historii: nowy kubełek (amounts) albo dopisanie ($push)
+            amounts = document.get("amounts") or document.get("$push", {}).get("amounts", {}).get("$each", [])
+            self.history_entries += len(amounts)
+
+    def delete_many(self, query):
+        self.round_trips += 1
+
+    def find(self, query, projection=None, batch_size=None):
+        # Pusta baza - pierwszy zapis nie ma czego usuwać
+        self.round_trips += 1
+        return []
+
+    def reset(self):
+        self.round_trips = self.operations = self.history_entries = 0
+
+
+@pytest.fixture
+def collection():
+    return CountingCollection()
+
+
+@pytest.fixture
+def history():
+    return CountingCollection()
+
+
+@pytest.fixture
+def repo(collection, history):
+    collections = {"accounts": collection, "history_buckets": history}
+    with patch('src.mongo_repository.MongoClient') as mock_mongo_client:
+        mock_mongo_client.return_value.__getitem__.return_value.__getitem__.side_effect = collections.get
+        return MongoAccountsRepository()
+
+
+def _timed(action):
+    start_time = time.perf_counter()
+    action()
+    return time.perf_counter() - start_time
+
+
+class TestMongoSavePerformance:
+    """Pełny zapis vs zapis przyrostowy po zmianie 1% kont"""
+
+    def test_incremental_save_sends_only_changed_accounts(self, repo, collection):
+        accounts = [PersonalAccount("Jan", "Kowalski", f"{i:011d}") for i in range(ACCOUNTS)]
+
+        full_duration = _timed(lambda: repo.save_all(accounts))
+        print(f"\n[mongo save {ACCOUNTS} accounts] full: {full_duration * 1000:.0f} ms, "
+              f"{collection.round_trips} round trips, {collection.operations} operations")
+        assert collection.operations == ACCOUNTS
+
+        for account in accounts[::ACCOUNTS // CHANGED]:
+            account.incoming_transfer(100)
+        collection.reset()
+        incremental_duration = _timed(lambda: repo.save_all(accounts))
+        print(f"[mongo save {ACCOUNTS} accounts] {CHANGED} changed: {incremental_duration * 1000:.0f} ms, "
+              f"{collection.round_trips} round trips, {collection.operations} operations")
+
+        # Dawniej: delete_many + update_one na każde konto, czyli ACCOUNTS + 1 round tripów
+        assert collection.operations == CHANGED
+        assert collection.round_trips == CHANGED // MongoAccountsRepository.BULK_BATCH_SIZE
+        assert incremental_duration < full_duration * MAX_TIME_RATIO
+
+    def test_busy_account_save_sends_only_new_history_entries(self, repo, history):
+        account = PersonalAccount("Jan", "Kowalski", "89092909876")
+        for i in range(BUSY_HISTORY):
+            account.incoming_transfer(i % 100 + 1)
+        repo.save_all([account])
+        print(f"\n[mongo save history {BUSY_HISTORY} entries] first save: {history.history_entries} entries, "
+              f"{history.operations} bucket operations")
+        assert history.history_entries == BUSY_HISTORY
+
+        for _ in range(NEW_ENTRIES):
+            account.incoming_transfer(10)
+        history.reset()
+        duration = _timed(lambda: repo.save_all([account]))
+        print(f"[mongo save history {BUSY_HISTORY} entries] +{NEW_ENTRIES}: {history.history_entries} entries, "
+              f"{history.operations} bucket operations, {duration * 1000:.2f} ms "
+              f"(whole history in document: {len(account.history)} entries)")
+        assert history.history_entries == NEW_ENTRIES
+        assert history.operations <= 2
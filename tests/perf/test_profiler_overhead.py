@@ -0,0 +1,53 @@
+"""Benchmark narzutu profilera żądań - wyłączony, włączony bez nagłówka i koszt profilowanego żądania"""
+import time
+
+from werkzeug.test import EnvironBuilder
+
+from src.request_profiler import RequestProfiler
+
+
+REQUESTS = 100_000
+PROFILED_REQUESTS = 1_000
+ROUNDS = 5
+# Narzut middleware na żądanie bez nagłówka X-Profile (sprawdzenie nagłówka)
+MAX_ARMED_OVERHEAD_US = 1.0
+
+
+def _plain_app(environ, start_response):
+    start_response("200 OK", [])
+    return [b"ok"]
+
+
+def _best_time(wsgi_app, environ, requests):
+    best = float("inf")
+    for _ in range(ROUNDS):
+        start_time = time.perf_counter()
+        for _ in range(requests):
+            body = wsgi_app(environ, lambda status, headers, exc_info=None: None)
+            for _ in body:
+                pass
+            if hasattr(body, "close"):
+                body.close()
+        best = min(best, time.perf_counter() - start_time)
+    return best / requests
+
+
+class TestProfilerOverhead:
+    """Czas żądania z profilerem wyłączonym, uzbrojonym (token) i aktywnym (nagłówek)"""
+
+    def test_profiler_overhead(self):
+        environ = EnvironBuilder(path="/api/accounts/count").get_environ()
+        assert RequestProfiler().wrap(_plain_app) is _plain_app
+
+        profiler = RequestProfiler(token="secret", keep=5)
+        baseline = _best_time(_plain_app, environ, REQUESTS)
+        armed = _best_time(profiler.wrap(_plain_app), environ, REQUESTS)
+        profiled = _best_time(profiler.wrap(_plain_app), {**environ, "HTTP_X_PROFILE": "secret"},
+                              PROFILED_REQUESTS)
+
+        armed_us = (armed - baseline) * 1e6
+        print(f"\n[profiler {REQUESTS} requests] disabled: 0 us/request (not installed), "
+              f"armed without header: {armed_us:.2f} us/request, "
+              f"profiled request: {(profiled - baseline) * 1e6:.0f} us/request")
+        assert armed_us < MAX_ARMED_OVERHEAD_US
+        assert len(profiler.profiles()) == 5
@@ -0,0 +1,67 @@
+"""Performance tests dla AccountRegistry - czas operacji nie zależy od liczby kont"""
+import time
+
+from src.account_registry import AccountRegistry
+from src.personal_account import PersonalAccount
+
+
+REGISTRY_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+OPERATIONS = 10_000
+# Dopuszczalny wzrost czasu operacji między 1k a 1M kont (szum pomiarowy, chybienia w cache CPU).
+# Skan liniowy przy 1000x większym rejestrze byłby ~1000x wolniejszy.
+MAX_SLOWDOWN = 10.0
+
+
+def _pesel(i):
+    return f"{i:011d}"
+
+
+def _measure(operation, pesels):
+    """Zwraca średni czas jednej operacji w sekundach"""
+    start_time = time.perf_counter()
+    for pesel in pesels:
+        operation(pesel)
+    return (time.perf_counter() - start_time) / len(pesels)
+
+
+class TestRegistryPerformance:
+    """Testy wydajnościowe rejestru - lookup, sprawdzenie istnienia i delete w O(1)"""
+
+    def test_operations_latency_is_flat_from_1k_to_1m_accounts(self):
+        """
+        Test: Rejestr rośnie od 1k do 1M kont, na każdym etapie mierzymy
+        średni czas get_account_by_pesel, account_with_pesel_exists i delete_account.
+        Czas przy 1M kont nie może być istotnie większy niż przy 1k kont.
+        """
+        registry = AccountRegistry()
+        results = {}
+
+        for size in REGISTRY_SIZES:
+            for i in range(registry.get_account_count(), size):
+                registry.add_account(PersonalAccount("Bench", "User", _pesel(i)))
+
+            step = size // OPERATIONS or 1
+            existing = [_pesel(i) for i in range(0, size, step)][:OPERATIONS]
+            missing = [_pesel(size + i) for i in range(OPERATIONS)]
+            accounts = [registry.get_account_by_pesel(pesel) for pesel in existing]
+
+            lookup = _measure(registry.get_account_by_pesel, existing)
+            exists = _measure(registry.account_with_pesel_exists, missing)
+            delete = _measure(registry.delete_account, existing)
+
+            # Przywracamy usunięte konta, żeby rejestr miał dokładnie `size` kont
+            for account in accounts:
+                registry.add_account(account)
+            assert registry.get_account_count() == size
+
+            results[size] = {"lookup": lookup, "exists": exists, "delete": delete}
+            print(f"\n[registry {size:>9} accounts] " + ", ".join(
+                f"{name}: {seconds * 1e9:.0f} ns/op" for name, seconds in results[size].items()
+            ))
+
+        smallest, largest = results[REGISTRY_SIZES[0]], results[REGISTRY_SIZES[-1]]
+        for name in smallest:
+            slowdown = largest[name] / smallest[name]
+            assert slowdown < MAX_SLOWDOWN, (
+                f"{name} is {slowdown:.1f}x slower at {REGISTRY_SIZES[-1]} accounts"
+            )
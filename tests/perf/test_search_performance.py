@@ -0,0 +1,60 @@
+"""Performance tests dla wyszukiwania kont - odpowiedź poniżej 1 ms bez skanowania rejestru"""
+import time
+
+import pytest
+
+from app.api import app, registry
+from src.personal_account import PersonalAccount
+
+
+ACCOUNTS = 100_000
+QUERIES = 1_000
+MAX_SEARCH_TIME = 0.001  # 1 ms
+
+FIRST_NAMES = ["Jan", "Anna", "Piotr", "Maria", "Tomasz", "Katarzyna", "Adam", "Zofia", "Paweł", "Ewa"]
+LAST_NAMES = ["Kowalski", "Nowak", "Wiśniewski", "Wójcik", "Kowalczyk", "Kamiński", "Lewandowski",
+              "Zieliński", "Szymański", "Woźniak"]
+
+
+class TestSearchPerformance:
+    """Testy wydajnościowe indeksów wyszukiwania przy 100k kont w rejestrze"""
+
+    @pytest.fixture(scope="class", autouse=True)
+    def populated_registry(self):
+        registry.clear()
+        for i in range(ACCOUNTS):
+            first_name = FIRST_NAMES[i % len(FIRST_NAMES)]
+            last_name = f"{LAST_NAMES[i // len(FIRST_NAMES) % len(LAST_NAMES)]}{i}"
+            registry.add_account(PersonalAccount(first_name, last_name, f"{i:011d}"))
+        yield
+        registry.clear()
+
+    @pytest.fixture
+    def client(self):
+        return app.test_client()
+
+    def _average_time(self, call):
+        start_time = time.perf_counter()
+        for _ in range(QUERIES):
+            call()
+        return (time.perf_counter() - start_time) / QUERIES
+
+    @pytest.mark.parametrize("criteria", [
+        {"last_name": "Kowalczyk4213"},
+        {"last_name": "wiśniew", "limit": 20},
+        {"first_name": "Kat", "last_name": "Zieli"},
+        {"text": "97531"},
+    ])
+    def test_registry_search_under_1ms(self, criteria):
+        duration = self._average_time(lambda: registry.search_accounts(**criteria))
+        print(f"\n[search {criteria}] {duration * 1e6:.0f} us")
+        assert duration < MAX_SEARCH_TIME, f"Search took {duration * 1000:.2f}ms (> 1ms)"
+
+    def test_search_endpoint_under_1ms(self, client):
+        def search():
+            response = client.get("/api/accounts/search?surname=kowalczyk4213")
+            assert response.status_code == 200
+
+        duration = self._average_time(search)
+        print(f"\n[GET /api/accounts/search] {duration * 1e6:.0f} us")
+        assert duration < MAX_SEARCH_TIME, f"Endpoint took {duration * 1000:.2f}ms (> 1ms)"
@@ -0,0 +1,72 @@
+"""Benchmark startu z binarnego snapshotu - 1M kont: czas do pierwszego żądania vs pełne ładowanie"""
+import time
+
+import pytest
+
+from app import api
+from src.account_registry import AccountRegistry
+from src.binary_snapshot import BinarySnapshot
+from src.personal_account import PersonalAccount
+
+
+ACCOUNTS = 1_000_000
+# Start z mmap ma być praktycznie natychmiastowy
+MAX_TIME_TO_FIRST_REQUEST = 1.0
+
+
+def _accounts(count):
+    for i in range(count):
+        yield PersonalAccount.from_dict({
+            "first_name": "Jan", "last_name": "Kowalski", "pesel": f"{i:011d}",
+            "balance": 150.0, "history": [100.0, -20.0, 70.0], "promo_code": None,
+        })
+
+
+@pytest.fixture(scope="module")
+def snapshot_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("snapshot") / "registry.snap")
+    start_time = time.perf_counter()
+    BinarySnapshot.write(path, _accounts(ACCOUNTS))
+    print(f"\n[snapshot {ACCOUNTS} accounts] write: {time.perf_counter() - start_time:.2f} s")
+    return path
+
+
+class TestSnapshotStartup:
+    """Start serwera z binarnego snapshotu"""
+
+    def test_time_to_first_request(self, snapshot_path):
+        api.registry.clear()
+        client = api.app.test_client()
+        pesel = f"{ACCOUNTS // 2:011d}"
+
+        start_time = time.perf_counter()
+        snapshot = BinarySnapshot(snapshot_path)
+        api.registry.attach_snapshot(snapshot)
+        response = client.get(f"/api/accounts/{pesel}")
+        elapsed = time.perf_counter() - start_time
+
+        try:
+            print(f"\n[snapshot {ACCOUNTS} accounts] time to first request: {elapsed * 1000:.1f} ms")
+            assert response.status_code == 200
+            assert response.get_json()["balance"] == 150.0
+            assert client.get("/api/accounts/count").get_json()["count"] == ACCOUNTS
+            assert elapsed < MAX_TIME_TO_FIRST_REQUEST
+        finally:
+            api.registry.clear()
+            snapshot.close()
+
+    def test_full_materialization(self, snapshot_path):
+        """Dla porównania: utworzenie wszystkich kont (to robi wątek w tle po starcie)"""
+        registry = AccountRegistry()
+        snapshot = BinarySnapshot(snapshot_path)
+        registry.attach_snapshot(snapshot)
+
+        start_time = time.perf_counter()
+        registry.load_snapshot()
+        elapsed = time.perf_counter() - start_time
+        print(f"\n[snapshot {ACCOUNTS} accounts] full materialization: {elapsed:.2f} s")
+
+        assert registry.get_account_count() == ACCOUNTS
+        assert registry.get_account_by_pesel(f"{ACCOUNTS - 1:011d}").balance == 150.0
+        registry.clear()
+        snapshot.close()
@@ -0,0 +1,50 @@
+"""Benchmark pamięci wyciągu z historii - cała historia w jednym napisie vs HistoryStatement kawałkami"""
+import time
+import tracemalloc
+
+from src.history_statement import HistoryStatement
+from src.transaction_history import TransactionHistory
+
+
+SIZES = (100_000, 1_000_000)
+# Szczyt pamięci wyciągu nie może rosnąć z długością historii (10x więcej wpisów)
+MAX_PEAK_GROWTH = 1.5
+# ...i dla 1M wpisów ma być dużo mniejszy niż przy składaniu całej historii w napis
+MAX_PEAK_RATIO = 0.05
+
+
+def _history(entries):
+    return TransactionHistory.from_floats([i * 0.5 if i % 2 else -i * 0.25 for i in range(entries)])
+
+
+def _peak(render):
+    """Zwraca (liczba bajtów wyniku, szczyt zajętej pamięci w bajtach, czas w s)"""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    size = render()
+    duration = time.perf_counter() - start_time
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, peak, duration
+
+
+class TestStatementMemory:
+    """Szczyt pamięci przy renderowaniu historii 100k i 1M wpisów"""
+
+    def test_peak_memory_does_not_depend_on_history_length(self):
+        peaks = {}
+        for entries in SIZES:
+            history = _history(entries)
+            _, inline_peak, inline_duration = _peak(lambda: len(f"Personal account history: {history}".encode()))
+            for compress in (False, True):
+                statement = HistoryStatement(history, compress=compress)
+                size, peak, duration = _peak(lambda: sum(len(chunk) for chunk in statement.encoded()))
+                peaks[entries, compress] = peak
+                print(f"\n[statement {entries} entries{' gzip' if compress else ''}] {size / 1e6:.1f} MB in "
+                      f"{duration:.2f} s, peak {peak / 1e6:.2f} MB (one string: peak {inline_peak / 1e6:.1f} MB "
+                      f"in {inline_duration:.2f} s)")
+                if entries == SIZES[-1]:
+                    assert peak < inline_peak * MAX_PEAK_RATIO
+
+        for compress in (False, True):
+            assert peaks[SIZES[1], compress] < peaks[SIZES[0], compress] * MAX_PEAK_GROWTH
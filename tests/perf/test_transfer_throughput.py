@@ -0,0 +1,89 @@
+"""Benchmark przelewów konto -> konto na losowych parach kont przy wielu wątkach"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.api import app, registry
+from src.personal_account import PersonalAccount
+
+
+ACCOUNTS = 1_000
+INITIAL_BALANCE = 1_000.0
+
+
+def _run_concurrently(threads, worker):
+    barrier = threading.Barrier(threads)
+
+    def run(i):
+        barrier.wait()
+        worker(i)
+
+    start_time = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(run, range(threads)))
+    return time.perf_counter() - start_time
+
+
+def _random_pair(rng):
+    source, target = rng.sample(range(ACCOUNTS), 2)
+    return f"{source:011d}", f"{target:011d}"
+
+
+class TestTransferThroughput:
+    """Przepustowość POST /api/transfers i Account.transfer_to; suma sald musi się zgadzać"""
+
+    @pytest.fixture(autouse=True)
+    def accounts(self):
+        registry.clear()
+        for i in range(ACCOUNTS):
+            account = PersonalAccount("Bench", "User", f"{i:011d}")
+            account.incoming_transfer(INITIAL_BALANCE)
+            registry.add_account(account)
+        yield
+        registry.clear()
+
+    def _assert_money_conserved(self):
+        accounts = registry.get_all_accounts()
+        assert sum(account.balance for account in accounts) == ACCOUNTS * INITIAL_BALANCE
+        assert sum(sum(account.history) for account in accounts) == ACCOUNTS * INITIAL_BALANCE
+
+    @pytest.mark.parametrize("threads", [1, 8, 32])
+    def test_domain_transfer_throughput(self, threads):
+        transfers_per_thread = 200_000 // threads
+
+        def worker(i):
+            rng = random.Random(i)
+            for _ in range(transfers_per_thread):
+                source, target = _random_pair(rng)
+                registry.get_account_by_pesel(source).transfer_to(
+                    registry.get_account_by_pesel(target), rng.randint(1, 50)
+                )
+
+        duration = _run_concurrently(threads, worker)
+        print(f"\n[transfer_to, {threads} threads] "
+              f"{threads * transfers_per_thread / duration:,.0f} transfers/s")
+        self._assert_money_conserved()
+
+    @pytest.mark.parametrize("threads", [1, 8])
+    def test_endpoint_transfer_throughput(self, threads):
+        transfers_per_thread = 8_000 // threads
+        statuses = []
+
+        def worker(i):
+            rng = random.Random(i)
+            client = app.test_client()
+            for _ in range(transfers_per_thread):
+                source, target = _random_pair(rng)
+                response = client.post("/api/transfers", json={
+                    "from": source, "to": target, "amount": rng.randint(1, 50)
+                })
+                statuses.append(response.status_code)
+
+        duration = _run_concurrently(threads, worker)
+        print(f"\n[POST /api/transfers, {threads} threads] "
+              f"{threads * transfers_per_thread / duration:,.0f} requests/s")
+        assert set(statuses) <= {200, 422}
+        self._assert_money_conserved()
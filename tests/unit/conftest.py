@@ -0,0 +1,12 @@
+from src.nip_validator import mf_validator
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def clear_mf_cache():
+    """Wyniki walidacji NIP (i stan bezpiecznika) z jednego testu nie mogą trafić do następnego"""
+    mf_validator.clear()
+    mf_validator.breaker.reset()
+    yield
+    mf_validator.clear()
+    mf_validator.breaker.reset()
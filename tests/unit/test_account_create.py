@@ -1,3 +1,5 @@
+import pytest
+from src.company_account import CompanyAccount
 from src.personal_account import PersonalAccount
 
 class TestAccount:
@@ -50,3 +52,23 @@ class TestAccount:
 
 
 
+
+
+class TestAccountSlots:
+    """Konta używają __slots__ - brak __dict__ w instancji"""
+
+    def test_personal_account_has_no_instance_dict(self):
+        account = PersonalAccount("John", "Doe", "02040722492")
+        assert not hasattr(account, "__dict__")
+        with pytest.raises(AttributeError):
+            account.nickname = "JD"
+
+    def test_company_account_from_dict_without_instance_dict(self):
+        account = CompanyAccount.from_dict({
+            "company_name": "Test Corp", "nip": "1234567890", "balance": 500.0, "history": [500.0]
+        })
+        assert not hasattr(account, "__dict__")
+        assert account.company_name == "Test Corp"
+        assert account.history == [500.0]
+        assert account.incoming_transfer(100.0) is True
+        assert account.balance == 600.0
@@ -0,0 +1,92 @@
+from src.account_import import import_accounts, parse_csv_rows, parse_ndjson_rows, validate_row
+from src.account_registry import AccountRegistry
+from src.personal_account import PersonalAccount
+import pytest
+
+
+class TestAccountImport:
+    """Testy strumieniowego importu kont (NDJSON/CSV)"""
+
+    @pytest.fixture
+    def registry(self):
+        registry = AccountRegistry()
+        registry.add_account(PersonalAccount("Existing", "Account", "89092909876"))
+        return registry
+
+    def rows(self, *pesels):
+        return [{"name": "Jan", "surname": "Kowalski", "pesel": pesel} for pesel in pesels]
+
+    def test_parse_ndjson_rows(self):
+        lines = [b'{"name": "Jan", "surname": "Kowalski", "pesel": "89092909877"}', b"", b"{broken", b"[1, 2]"]
+        assert list(parse_ndjson_rows(lines)) == [
+            {"name": "Jan", "surname": "Kowalski", "pesel": "89092909877"}, None, None
+        ]
+
+    def test_parse_csv_rows(self):
+        lines = [b"name,surname,pesel\r", "Zofia,Wójcik,89092909877\r".encode(), b""]
+        assert list(parse_csv_rows(lines)) == [{"name": "Zofia", "surname": "Wójcik", "pesel": "89092909877"}]
+
+    def test_parse_csv_rows_invalid_utf8(self):
+        lines = [b"name,surname,pesel", b"\xff\xfe,Kowalski,89092909877", b"Jan,Kowalski,89092909876"]
+        assert list(parse_csv_rows(lines)) == [None, {"name": "Jan", "surname": "Kowalski", "pesel": "89092909876"}]
+        with pytest.raises(ValueError):
+            list(parse_csv_rows([b"\xff\xfename,surname,pesel", b"Jan,Kowalski,89092909876"]))
+
+    @pytest.mark.parametrize("row,error", [
+        ({"name": "Jan", "surname": "Kowalski", "pesel": "89092909877"}, None),
+        (None, "Row could not be read (invalid JSON object or UTF-8)"),
+        ({"name": "Jan", "pesel": "89092909877"}, "Missing field: surname"),
+        ({"name": "", "surname": "Kowalski", "pesel": "89092909877"}, "Missing field: name"),
+        ({"name": "Jan", "surname": "Kowalski", "pesel": 89092909877}, "Missing field: pesel"),
+        ({"name": "Jan", "surname": "Kowalski", "pesel": "8909290987"}, "PESEL must have 11 digits"),
+        ({"name": "Jan", "surname": "Kowalski", "pesel": "8909290987x"}, "PESEL must have 11 digits"),
+        ({"name": "Jan", "surname": "Kowalski", "pesel": "²" * 11}, "PESEL must have 11 digits"),
+        ({"name": "Jan", "surname": "Kowalski", "pesel": "٨٩٠٩٢٩٠٩٨٧٧"}, "PESEL must have 11 digits"),
+    ])
+    def test_validate_row(self, row, error):
+        assert validate_row(row) == error
+
+    def test_import_accounts(self, registry):
+        report = import_accounts(registry, self.rows("89092909877", "89092909878"))
+        assert report["imported"] == 2
+        assert report["rejected"] == 0
+        assert report["rows_per_second"] > 0
+        assert registry.get_account_by_pesel("89092909878").last_name == "Kowalski"
+        assert registry.get_account_count() == 3
+
+    @pytest.mark.parametrize("chunk_size", [1, 2, 1000])
+    def test_import_rejects_duplicates_and_invalid_rows(self, registry, chunk_size):
+        rows = self.rows("89092909877", "89092909876", "123", "89092909877", "89092909878")
+        report = import_accounts(registry, rows, chunk_size=chunk_size)
+
+        assert report["imported"] == 2
+        assert report["rejected"] == 3
+        assert [(reject["row"], reject["pesel"]) for reject in sorted(report["rejects"], key=lambda r: r["row"])] == [
+            (2, "89092909876"), (3, "123"), (4, "89092909877")
+        ]
+        assert [account.pesel for account in registry.get_all_accounts()] == [
+            "89092909876", "89092909877", "89092909878"
+        ]
+
+    def test_import_rejects_non_ascii_digit_pesel(self, registry):
+        """PESEL z cyfr spoza ASCII odrzucony jako wiersz - bez błędu całego importu"""
+        rows = self.rows("89092909877") + [{"name": "Jan", "surname": "Kowalski", "pesel": "²" * 11}]
+        report = import_accounts(registry, rows + self.rows("89092909878"), chunk_size=1)
+        assert report["imported"] == 2
+        assert [(reject["row"], reject["error"]) for reject in report["rejects"]] == [
+            (2, "PESEL must have 11 digits")
+        ]
+
+    def test_import_limits_reported_rejects(self, registry):
+        report = import_accounts(registry, [None] * 10, max_reported_rejects=3)
+        assert report["rejected"] == 10
+        assert len(report["rejects"]) == 3
+
+    def test_import_invalid_chunk_size(self, registry):
+        with pytest.raises(ValueError):
+            import_accounts(registry, [], chunk_size=0)
+
+    def test_try_add_accounts(self, registry):
+        accounts = [PersonalAccount("A", "B", pesel) for pesel in ("89092909877", "89092909876")]
+        assert registry.try_add_accounts(accounts) == [True, False]
+        assert registry.get_account_by_pesel("89092909876").first_name == "Existing"
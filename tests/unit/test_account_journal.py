@@ -0,0 +1,264 @@
+from src.account_journal import AccountJournal
+from src.account_registry import AccountRegistry
+from src.binary_snapshot import BinarySnapshot
+from src.company_account import CompanyAccount
+from src.personal_account import PersonalAccount
+from unittest.mock import patch
+import json
+import os
+import subprocess
+import sys
+import threading
+import pytest
+
+
+def state(registry):
+    """Stan rejestru do porównań: lista słowników kont w kolejności dodania"""
+    return [account.to_dict() for account in registry.get_all_accounts()]
+
+
+class TestAccountJournal:
+    """Testy dziennika zmian rejestru (zapis, odtwarzanie po awarii, snapshoty)"""
+
+    @pytest.fixture(params=AccountJournal.DURABILITY_MODES)
+    def durability(self, request):
+        return request.param
+
+    @pytest.fixture
+    def registry(self):
+        return AccountRegistry()
+
+    @pytest.fixture
+    def journal(self, registry, tmp_path, durability):
+        journal = AccountJournal(registry, str(tmp_path), durability=durability)
+        journal.recover()
+        yield journal
+        journal.close()
+
+    def recovered(self, tmp_path, durability="group"):
+        """Nowy rejestr odtworzony z katalogu dziennika (jak po restarcie procesu)"""
+        registry = AccountRegistry()
+        journal = AccountJournal(registry, str(tmp_path), durability=durability)
+        report = journal.recover()
+        journal.close()
+        return registry, report
+
+    def apply_operations(self, journal, registry):
+        journal.try_add_account(PersonalAccount("Jan", "Kowalski", "89092909876"))
+        journal.try_add_account(PersonalAccount("Anna", "Nowak", "89092909877"))
+        journal.try_add_accounts([PersonalAccount("Adam", "Lis", "89092909878")])
+        jan = registry.get_account_by_pesel("89092909876")
+        anna = registry.get_account_by_pesel("89092909877")
+        with journal.transfer(jan):
+            jan.incoming_transfer(500)
+            jan.outgoing_transfer(100)
+        with journal.transfer(jan, anna):
+            jan.transfer_to(anna, 150)
+        with journal.transfer(anna):
+            anna.express_outgoing_pers(20)
+        journal.update_account_names("89092909877", last_name="Kowalska")
+        journal.delete_account("89092909878")
+
+    def test_recover_restores_registry(self, journal, registry, tmp_path, durability):
+        self.apply_operations(journal, registry)
+        journal.close()
+
+        recovered, report = self.recovered(tmp_path, durability)
+        assert state(recovered) == state(registry)
+        assert report["replayed"] == 8
+        assert recovered.get_account_by_pesel("89092909877").history == [150.0, -20.0, -1.0]
+
+    def test_recover_continues_numbering(self, journal, registry, tmp_path):
+        self.apply_operations(journal, registry)
+        journal.close()
+        recovered, _ = self.recovered(tmp_path)
+        journal = AccountJournal(recovered, str(tmp_path))
+        journal.recover()
+        jan = recovered.get_account_by_pesel("89092909876")
+        with journal.transfer(jan):
+            jan.incoming_transfer(1)
+        journal.close()
+        assert state(self.recovered(tmp_path)[0]) == state(recovered)
+
+    def test_failed_operation_is_not_journaled(self, journal, registry):
+        journal.try_add_account(PersonalAccount("Jan", "Kowalski", "89092909876"))
+        jan = registry.get_account_by_pesel("89092909876")
+        with journal.transfer(jan):
+            assert jan.outgoing_transfer(100) is False
+        assert journal.try_add_account(PersonalAccount("Jan", "Kowalski", "89092909876")) is False
+        assert journal.delete_account("00000000000") is False
+        journal.flush()
+        assert journal._next_seq == 2
+
+    def test_torn_last_record_is_ignored(self, journal, registry, tmp_path):
+        self.apply_operations(journal, registry)
+        journal.close()
+        segment = sorted(tmp_path.glob("journal-*.log"))[-1]
+        with open(segment, "ab") as f:
+            f.write(b'{"op":"transfer","changes":[{"pesel":"8909')
+
+        recovered, _ = self.recovered(tmp_path)
+        assert state(recovered) == state(registry)
+
+    def test_snapshot_truncates_journal(self, journal, registry, tmp_path):
+        self.apply_operations(journal, registry)
+        assert journal.snapshot() == 2
+        jan = registry.get_account_by_pesel("89092909876")
+        with journal.transfer(jan):
+            jan.incoming_transfer(10)
+        journal.close()
+
+        assert len(list(tmp_path.glob("journal-*.log"))) == 1
+        assert len(list(tmp_path.glob("snapshot-*.ndjson"))) == 1
+        recovered, report = self.recovered(tmp_path)
+        assert state(recovered) == state(registry)
+        assert report == {"snapshot_accounts": 2, "replayed": 1, "duration": report["duration"]}
+
+    def test_snapshot_requires_empty_registry(self, journal, registry, tmp_path):
+        """Snapshot dziennika to cały stan rejestru - recover nie nadpisuje po cichu kont już w rejestrze"""
+        assert not journal.has_snapshot()
+        self.apply_operations(journal, registry)
+        journal.snapshot()
+        journal.close()
+        assert journal.has_snapshot()
+
+        other = AccountRegistry()
+        other.add_account(PersonalAccount("Ewa", "Lis", "90010112345"))
+        with pytest.raises(ValueError):
+            AccountJournal(other, str(tmp_path)).recover()
+        assert [account.pesel for account in other.get_all_accounts()] == ["90010112345"]
+
+    def test_periodic_snapshot(self, registry, tmp_path):
+        journal = AccountJournal(registry, str(tmp_path), snapshot_every=5)
+        journal.recover()
+        for i in range(12):
+            journal.try_add_account(PersonalAccount("Jan", "Kowalski", f"890929098{i:02d}"))
+        journal.close()
+        assert list(tmp_path.glob("snapshot-*.ndjson"))
+        assert state(self.recovered(tmp_path)[0]) == state(registry)
+
+    def test_replay_of_change_already_in_snapshot_is_idempotent(self, journal, registry):
+        journal.try_add_account(PersonalAccount("Jan", "Kowalski", "89092909876"))
+        jan = registry.get_account_by_pesel("89092909876")
+        jan.incoming_transfer(100)
+        jan.incoming_transfer(50)
+        record = {"op": "transfer", "changes": [{"pesel": "89092909876", "from": 0, "amounts": [100.0], "balance": 100.0}]}
+        journal._replay(record)
+        assert jan.history == [100.0, 50.0]
+
+    def test_changes_of_deleted_account_are_not_journaled(self, journal, registry, tmp_path):
+        journal.try_add_account(PersonalAccount("Jan", "Kowalski", "89092909876"))
+        jan = registry.get_account_by_pesel("89092909876")
+        journal.delete_account("89092909876")
+        journal.try_add_account(PersonalAccount("Jan", "Nowy", "89092909876"))
+        with journal.transfer(jan):
+            jan.incoming_transfer(100)
+        journal.close()
+        recovered, _ = self.recovered(tmp_path)
+        assert recovered.get_account_by_pesel("89092909876").balance == 0.0
+
+    def test_company_account_is_keyed_by_nip(self, journal, registry, tmp_path):
+        with patch('src.company_account.CompanyAccount._validate_nip_with_mf', return_value=True):
+            company = CompanyAccount("Test Corp", "1234567890")
+        journal.try_add_account(company)
+        with journal.transfer(company):
+            company.incoming_transfer(5000)
+            company.outgoing_transfer(1775)
+        journal.close()
+        recovered = self.recovered(tmp_path)[0].get_account_by_nip("1234567890")
+        assert recovered.balance == 3225.0
+        assert recovered.take_loan(100) is True
+
+    def test_group_commit_batches_fsync(self, registry, tmp_path):
+        journal = AccountJournal(registry, str(tmp_path), durability="group")
+        journal.recover()
+        accounts = [PersonalAccount("Jan", "Kowalski", f"890929098{i:02d}") for i in range(8)]
+        journal.try_add_accounts(accounts)
+
+        fsyncs = []
+        real_fsync = os.fsync
+        def counting_fsync(fd):
+            fsyncs.append(fd)
+            real_fsync(fd)
+
+        def worker(account):
+            for _ in range(50):
+                with journal.transfer(account):
+                    account.incoming_transfer(1)
+
+        with patch("src.account_journal.os.fsync", side_effect=counting_fsync):
+            threads = [threading.Thread(target=worker, args=(account,)) for account in accounts]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        journal.close()
+        assert len(fsyncs) < 8 * 50
+        assert all(account.balance == 50 for account in self.recovered(tmp_path)[0].get_all_accounts())
+
+    def test_records_are_json_lines(self, journal, registry, tmp_path):
+        journal.try_add_account(PersonalAccount("Jan", "Kowalski", "89092909876"))
+        journal.close()
+        lines = sorted(tmp_path.glob("journal-*.log"))[-1].read_bytes().splitlines()
+        assert [json.loads(line)["op"] for line in lines] == ["create"]
+
+    def test_invalid_durability(self, registry):
+        with pytest.raises(ValueError):
+            AccountJournal(registry, "/tmp", durability="fast")
+
+    def test_append_before_recover(self, registry, tmp_path):
+        journal = AccountJournal(registry, str(tmp_path))
+        with pytest.raises(RuntimeError):
+            journal.try_add_account(PersonalAccount("Jan", "Kowalski", "89092909876"))
+
+    def test_disabled_journal_passes_through(self, registry):
+        journal = AccountJournal(registry)
+        assert not journal.has_snapshot()
+        assert journal.recover()["replayed"] == 0
+        assert journal.try_add_account(PersonalAccount("Jan", "Kowalski", "89092909876")) is True
+        jan = registry.get_account_by_pesel("89092909876")
+        with journal.transfer(jan):
+            jan.incoming_transfer(100)
+        assert journal.update_account_names("89092909876", first_name="Janek") is True
+        assert jan.first_name == "Janek"
+        assert journal.delete_account("89092909876") is True
+        assert journal.snapshot() == 0
+
+
+class TestJournalAndBinarySnapshotAtStartup:
+    """Start serwera z dziennikiem i snapshotem binarnym - snapshot dziennika ma pierwszeństwo"""
+
+    def start_server(self, journal_dir, snapshot_path):
+        """PESEL-e kont w rejestrze po imporcie app.api (start serwera w osobnym procesie)"""
+        env = dict(os.environ, BANK_JOURNAL_DIR=str(journal_dir), BANK_SNAPSHOT_PATH=str(snapshot_path),
+                   BANK_LOG_LEVEL="OFF")
+        code = "import app.api as api; print(' '.join(a.pesel for a in api.registry.get_all_accounts()))"
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        result = subprocess.run([sys.executable, "-c", code], cwd=root, env=env,
+                                capture_output=True, text=True, timeout=60)
+        assert result.returncode == 0, result.stderr
+        # Ostatnia linia - moduły aplikacji mogą wypisywać coś przy imporcie
+        return result.stdout.splitlines()[-1].split()
+
+    @pytest.fixture
+    def snapshot_path(self, tmp_path):
+        path = tmp_path / "registry.snap"
+        BinarySnapshot.write(str(path), [PersonalAccount("Ewa", "Lis", "90010112345")])
+        return path
+
+    def journal_with_account(self, journal_dir, with_snapshot):
+        registry = AccountRegistry()
+        journal = AccountJournal(registry, str(journal_dir))
+        journal.recover()
+        journal.try_add_account(PersonalAccount("Jan", "Kowalski", "89092909876"))
+        if with_snapshot:
+            journal.snapshot()
+        journal.close()
+
+    def test_journal_snapshot_wins_over_binary_snapshot(self, tmp_path, snapshot_path):
+        self.journal_with_account(tmp_path / "journal", with_snapshot=True)
+        assert self.start_server(tmp_path / "journal", snapshot_path) == ["89092909876"]
+
+    def test_journal_without_snapshot_is_replayed_on_binary_snapshot(self, tmp_path, snapshot_path):
+        self.journal_with_account(tmp_path / "journal", with_snapshot=False)
+        assert self.start_server(tmp_path / "journal", snapshot_path) == ["90010112345", "89092909876"]
@@ -1,8 +1,17 @@
 from src.account_registry import AccountRegistry
 from src.personal_account import PersonalAccount
+from src.company_account import CompanyAccount
+from unittest.mock import patch
 import pytest
 
 
+class BadName:
+    """Nazwa, której nie da się zamienić na tekst"""
+
+    def __str__(self):
+        raise ValueError("name cannot be converted to text")
+
+
 class TestAccountRegistry:
     """Testy dla AccountRegistry z użyciem fixtures i parametryzacji"""
 
@@ -118,3 +127,205 @@ class TestAccountRegistry:
         assert registry.get_account_count() == 1
         assert registry.get_account_by_pesel("89092909877") is None
         assert registry.get_account_by_pesel("89092909876") == account1
+
+    def test_clear_removes_all_accounts(self, registry_with_accounts):
+        registry_with_accounts.clear()
+        assert registry_with_accounts.get_account_count() == 0
+        assert registry_with_accounts.get_all_accounts() == []
+
+    def test_get_all_accounts_keeps_insertion_order_after_delete(self, registry, account1, account2):
+        """Lista kont zachowuje kolejność dodawania także po usunięciu i ponownym dodaniu"""
+        registry.add_account(account1)
+        registry.add_account(account2)
+        registry.delete_account("89092909876")
+        registry.add_account(account1)
+        assert registry.get_all_accounts() == [account2, account1]
+
+    @pytest.mark.parametrize("pesel", ["89092909876", "123"])
+    def test_add_duplicate_pesel_keeps_first_account(self, registry, pesel):
+        """Jak przy liście wyszukanie zwraca pierwsze konto; duplikat (także "Invalid") nie jest dodawany"""
+        first = PersonalAccount("John", "Doe", pesel)
+        second = PersonalAccount("Jane", "Other", pesel)
+        registry.add_account(first)
+        registry.add_account(second)
+        assert registry.get_account_by_pesel(first.pesel) is first
+        assert registry.get_all_accounts() == [first]
+        assert registry.search_accounts(first_name="Jane") == []
+
+
+class TestAccountRegistryPagination:
+    """Testy stronicowania rejestru kursorem (get_accounts_page / iter_accounts)"""
+
+    @pytest.fixture
+    def registry(self):
+        registry = AccountRegistry()
+        for i in range(10):
+            registry.add_account(PersonalAccount("Jan", "Kowalski", f"890929098{i:02d}"))
+        return registry
+
+    def pesels(self, accounts):
+        return [account.pesel for account in accounts]
+
+    def all_pages(self, registry, limit):
+        pages, cursor = [], None
+        while True:
+            accounts, cursor = registry.get_accounts_page(cursor, limit)
+            pages.append(self.pesels(accounts))
+            if cursor is None:
+                return pages
+
+    @pytest.mark.parametrize("limit,sizes", [
+        (3, [3, 3, 3, 1]),
+        (5, [5, 5]),
+        (10, [10]),
+        (20, [10]),
+    ])
+    def test_pages_cover_all_accounts_in_order(self, registry, limit, sizes):
+        pages = self.all_pages(registry, limit)
+        assert [len(page) for page in pages] == sizes
+        assert sum(pages, []) == self.pesels(registry.get_all_accounts())
+
+    def test_empty_registry_page(self):
+        assert AccountRegistry().get_accounts_page(None, 10) == ([], None)
+
+    def test_invalid_limit(self, registry):
+        with pytest.raises(ValueError):
+            registry.get_accounts_page(None, 0)
+
+    def test_cursor_is_stable_across_inserts_and_deletes(self, registry):
+        first, cursor = registry.get_accounts_page(None, 4)
+        registry.delete_account("89092909801")
+        registry.delete_account("89092909805")
+        registry.add_account(PersonalAccount("Adam", "Nowak", "89092909899"))
+        rest, cursor = registry.get_accounts_page(cursor, 100)
+        assert cursor is None
+        assert self.pesels(rest) == [
+            "89092909804", "89092909806", "89092909807", "89092909808", "89092909809", "89092909899"
+        ]
+
+    def test_page_includes_company_accounts(self, registry):
+        with patch('src.company_account.CompanyAccount._validate_nip_with_mf', return_value=True):
+            company = CompanyAccount("Test Corp", "1234567890")
+        registry.add_account(company)
+        accounts, cursor = registry.get_accounts_page(None, 11)
+        assert accounts[-1] is company and cursor is None
+        registry.delete_company_account("1234567890")
+        assert company not in registry.get_all_accounts()
+
+    def test_iter_accounts_after_compaction(self, registry):
+        registry.COMPACT_MIN_TOMBSTONES = 2
+        for i in range(7):
+            registry.delete_account(f"890929098{i:02d}")
+        assert self.pesels(registry.iter_accounts(page_size=2)) == ["89092909807", "89092909808", "89092909809"]
+        assert len(registry._order_seqs) < 10
+
+
+class TestAccountRegistryIndexes:
+    """Testy indeksów pomocniczych rejestru - NIP oraz imię/nazwisko"""
+
+    @pytest.fixture
+    def registry(self):
+        registry = AccountRegistry()
+        registry.add_account(PersonalAccount("Jan", "Kowalski", "89092909876"))
+        registry.add_account(PersonalAccount("Janina", "Kowalczyk", "89092909877"))
+        registry.add_account(PersonalAccount("Adam", "Nowak", "89092909878"))
+        return registry
+
+    @pytest.fixture
+    def company(self):
+        with patch('src.company_account.CompanyAccount._validate_nip_with_mf', return_value=True):
+            return CompanyAccount("Test Corp", "1234567890")
+
+    def pesels(self, accounts):
+        return [account.pesel for account in accounts]
+
+    def test_get_account_by_nip(self, registry, company):
+        registry.add_account(company)
+        assert registry.get_account_by_nip("1234567890") is company
+        assert registry.get_account_by_pesel("1234567890") is None
+        assert registry.get_account_count() == 4
+        assert registry.get_all_accounts()[-1] is company
+
+    def test_get_account_by_nip_not_found(self, registry):
+        assert registry.get_account_by_nip("0000000000") is None
+
+    def test_delete_company_account(self, registry, company):
+        registry.add_account(company)
+        assert registry.delete_company_account("1234567890") is True
+        assert registry.get_account_by_nip("1234567890") is None
+        assert registry.delete_company_account("1234567890") is False
+
+    @pytest.mark.parametrize("first_name,last_name,text,expected", [
+        ("Jan", None, None, ["89092909876", "89092909877"]),
+        ("jani", None, None, ["89092909877"]),
+        (None, "kowal", None, ["89092909876", "89092909877"]),
+        ("Jan", "Kowals", None, ["89092909876"]),
+        (None, None, "owa", ["89092909876", "89092909877", "89092909878"]),
+        (None, None, "dam", ["89092909878"]),
+        ("Adam", None, "kowal", []),
+    ])
+    def test_search_accounts(self, registry, first_name, last_name, text, expected):
+        assert self.pesels(registry.search_accounts(first_name, last_name, text)) == expected
+
+    def test_search_accounts_without_criteria(self, registry):
+        assert registry.search_accounts() == []
+
+    def test_search_accounts_limit(self, registry):
+        assert len(registry.search_accounts(text="owa", limit=2)) == 2
+
+    def test_search_accounts_limit_returns_lowest_pesels(self):
+        """Przy większej liczbie trafień niż limit wynik to najmniejsze PESEL-e, nie dowolny podzbiór"""
+        registry = AccountRegistry()
+        pesels = [f"{i:011d}" for i in range(200)]
+        for pesel in reversed(pesels):
+            registry.add_account(PersonalAccount("Jan", "Nowak", pesel))
+        assert self.pesels(registry.search_accounts(last_name="Nowak", limit=5)) == pesels[:5]
+        assert self.pesels(registry.search_accounts(text="owa", limit=5)) == pesels[:5]
+
+    def test_search_skips_deleted_account(self, registry):
+        registry.delete_account("89092909876")
+        assert self.pesels(registry.search_accounts(last_name="kowal")) == ["89092909877"]
+
+    def test_update_account_names_reindexes(self, registry):
+        assert registry.update_account_names("89092909878", last_name="Zieliński") is True
+        account = registry.get_account_by_pesel("89092909878")
+        assert account.first_name == "Adam"
+        assert account.last_name == "Zieliński"
+        assert registry.search_accounts(last_name="nowak") == []
+        assert self.pesels(registry.search_accounts(last_name="ziel")) == ["89092909878"]
+
+    def test_non_string_names_are_indexed_as_text(self, registry):
+        registry.add_account(PersonalAccount(123, None, "89092909879"))
+        assert self.pesels(registry.search_accounts(first_name="12")) == ["89092909879"]
+        assert registry.update_account_names("89092909879", first_name=5) is True
+        assert registry.get_account_by_pesel("89092909879").first_name == 5
+        assert self.pesels(registry.search_accounts(first_name="5")) == ["89092909879"]
+        assert registry.search_accounts(first_name="12") == []
+
+    def test_failed_name_indexing_does_not_add_account(self, registry):
+        """Błąd indeksowania nazwy - konto nie zostaje dodane częściowo (shard, kolejność, indeksy)"""
+        account = PersonalAccount("Ewa", BadName(), "89092909879")
+        with pytest.raises(ValueError):
+            registry.add_account(account)
+        with pytest.raises(ValueError):
+            registry.try_add_accounts([account])
+        assert registry.get_account_by_pesel("89092909879") is None
+        assert registry.get_account_count() == 3
+        assert len(registry.get_all_accounts()) == 3
+        assert registry.search_accounts(first_name="Ewa") == []
+        assert registry.try_add_account(PersonalAccount("Ewa", "Lis", "89092909879")) is True
+
+    def test_failed_name_update_keeps_old_name(self, registry):
+        with pytest.raises(ValueError):
+            registry.update_account_names("89092909878", first_name=BadName())
+        assert registry.get_account_by_pesel("89092909878").first_name == "Adam"
+        assert self.pesels(registry.search_accounts(first_name="Adam")) == ["89092909878"]
+
+    def test_update_account_names_not_found(self, registry):
+        assert registry.update_account_names("00000000000", first_name="X") is False
+
+    def test_clear_resets_indexes(self, registry, company):
+        registry.add_account(company)
+        registry.clear()
+        assert registry.get_account_by_nip("1234567890") is None
+        assert registry.search_accounts(first_name="") == []
@@ -0,0 +1,183 @@
+from src.account_registry import AccountRegistry
+from src.binary_snapshot import BinarySnapshot
+from src.company_account import CompanyAccount
+from src.personal_account import PersonalAccount
+from unittest.mock import patch
+import pytest
+
+
+def state(registry):
+    """Stan rejestru do porównań: lista słowników kont w kolejności dodania"""
+    return [account.to_dict() for account in registry.get_all_accounts()]
+
+
+class TestBinarySnapshot:
+    """Testy binarnego snapshotu rejestru i leniwego tworzenia kont"""
+
+    @pytest.fixture
+    def source(self):
+        registry = AccountRegistry()
+        jan = PersonalAccount("Jan", "Kowalski", "89092909876", "PROM_ABC")
+        jan.incoming_transfer(500)
+        jan.outgoing_transfer(100)
+        registry.add_account(jan)
+        registry.add_account(PersonalAccount("Żaneta", "Łęcka", "89092909877"))
+        with patch("src.company_account.CompanyAccount._validate_nip_with_mf", return_value=True):
+            company = CompanyAccount("Firma", "1234567890")
+        company.incoming_transfer(2000)
+        company.outgoing_transfer(1775)
+        registry.add_account(company)
+        registry.add_account(PersonalAccount("Adam", "Lis", "01010112345"))
+        return registry
+
+    @pytest.fixture
+    def snapshot(self, source, tmp_path):
+        path = str(tmp_path / "registry.snap")
+        assert BinarySnapshot.write(path, source.iter_accounts()) == 4
+        snapshot = BinarySnapshot(path)
+        yield snapshot
+        snapshot.close()
+
+    @pytest.fixture
+    def registry(self, snapshot):
+        registry = AccountRegistry()
+        registry.attach_snapshot(snapshot)
+        return registry
+
+    def test_snapshot_roundtrip(self, source, registry):
+        assert registry.get_account_count() == 4
+        assert state(registry) == state(source)
+        company = registry.get_account_by_nip("1234567890")
+        assert isinstance(company, CompanyAccount)
+        assert company.history.count(CompanyAccount.ZUS_PAYMENT) == 1
+
+    @pytest.mark.parametrize("field,value,expected", [
+        ("pesel", "89092909876", 0),
+        ("pesel", "01010112345", 3),
+        ("nip", "1234567890", 2),
+        ("pesel", "1234567890", None),
+        ("pesel", "00000000000", None),
+        ("pesel", "123", None),
+        ("pesel", None, None),
+        ("nip", 1234567890, None),
+    ])
+    def test_find(self, snapshot, field, value, expected):
+        assert snapshot.find(field, value) == expected
+
+    def test_accounts_created_on_first_access(self, registry):
+        with patch.object(BinarySnapshot, "account", wraps=registry._snapshot.account) as account:
+            jan = registry.get_account_by_pesel("89092909876")
+            assert registry.get_account_by_pesel("89092909876") is jan
+            assert registry.account_with_pesel_exists("89092909876")
+            assert not registry.account_with_pesel_exists("00000000000")
+        assert account.call_count == 1
+        assert jan.balance == 450.0
+        assert jan.promo_code == "PROM_ABC"
+        assert list(jan.history) == [500.0, -100.0]
+        assert registry.get_account_count() == 4
+
+    def test_listing_keeps_snapshot_order(self, registry):
+        registry.get_account_by_pesel("01010112345")
+        registry.add_account(PersonalAccount("Ewa", "Nowak", "90010112345"))
+        pesels = [getattr(account, "pesel", None) for account in registry.get_all_accounts()]
+        assert pesels == ["89092909876", "89092909877", None, "01010112345", "90010112345"]
+
+    def test_page_creates_only_its_accounts(self, registry):
+        """Strona tworzy tylko konta snapshotu, które na niej są - bez czekania na cały snapshot"""
+        registry.get_account_by_pesel("89092909877")
+        accounts, cursor = registry.get_accounts_page(limit=2)
+        assert [account.pesel for account in accounts] == ["89092909876", "89092909877"]
+        assert registry._snapshot_pending == 2
+        assert registry.get_account_by_pesel("89092909876") is accounts[0]
+
+        accounts, cursor = registry.get_accounts_page(cursor, limit=1)
+        assert [account.nip for account in accounts] == ["1234567890"]
+        assert registry._snapshot_pending == 1
+        assert registry.delete_account("01010112345")
+        assert registry.get_accounts_page(cursor, limit=1) == ([], None)
+        assert registry._snapshot is None
+
+    def test_iter_accounts_matches_source(self, source, registry):
+        assert [account.to_dict() for account in registry.iter_accounts(page_size=1)] == \
+               [account.to_dict() for account in source.iter_accounts()]
+        assert registry._snapshot is None
+
+    def test_snapshot_account_cannot_be_added_twice(self, registry):
+        assert not registry.try_add_account(PersonalAccount("Jan", "Inny", "89092909876"))
+        assert registry.try_add_accounts([PersonalAccount("Jan", "Inny", "89092909877")]) == [False]
+        assert registry.get_account_by_pesel("89092909876").last_name == "Kowalski"
+
+    def test_deleted_snapshot_account_is_not_restored(self, registry):
+        assert registry.delete_account("89092909877")
+        assert registry.delete_company_account("1234567890")
+        assert registry.get_account_by_pesel("89092909877") is None
+        assert registry.get_account_by_nip("1234567890") is None
+        assert registry.get_account_count() == 2
+
+    def test_search_and_update_names(self, registry):
+        assert registry.update_account_names("89092909877", last_name="Nowak")
+        assert [account.pesel for account in registry.search_accounts(last_name="Now")] == ["89092909877"]
+
+    @pytest.mark.parametrize("criteria,expected", [
+        ({"last_name": "kow"}, ["89092909876"]),
+        ({"first_name": "żan"}, ["89092909877"]),
+        ({"text": "ŁĘC"}, ["89092909877"]),
+        ({"first_name": "Jan", "text": "ski"}, ["89092909876"]),
+        ({"text": "irm"}, []),
+    ])
+    def test_search_does_not_load_snapshot(self, registry, criteria, expected):
+        """Wyszukiwanie przegląda kolumny snapshotu - tworzy tylko znalezione konta"""
+        registry.get_account_by_pesel("01010112345")
+        assert [account.pesel for account in registry.search_accounts(**criteria)] == expected
+        assert registry._snapshot_pending == 3 - len(expected)
+
+    def test_get_account_with_non_string_key(self, registry):
+        assert registry.get_account_by_pesel(None) is None
+        assert registry.get_account_by_nip(1234567890) is None
+        assert not registry.account_with_pesel_exists(None)
+
+    def test_load_snapshot_creates_all_accounts(self, registry):
+        registry.get_account_by_pesel("89092909877")
+        snapshot = registry._snapshot
+        registry.load_snapshot()
+        assert registry._snapshot is None
+        assert snapshot._mmap.closed
+        assert registry.get_account_count() == 4
+        assert len(state(registry)) == 4
+
+    def test_clear_drops_snapshot(self, registry, snapshot):
+        registry.clear()
+        assert snapshot._mmap.closed
+        assert registry.get_account_count() == 0
+        assert registry.get_account_by_pesel("89092909876") is None
+
+    def test_attach_requires_empty_registry(self, source, snapshot):
+        with pytest.raises(ValueError):
+            source.attach_snapshot(snapshot)
+
+    def test_rejects_other_files(self, tmp_path):
+        path = tmp_path / "other.snap"
+        path.write_bytes(b"not a snapshot" * 10)
+        with pytest.raises(ValueError):
+            BinarySnapshot(str(path))
+
+    def test_empty_snapshot(self, tmp_path):
+        path = str(tmp_path / "empty.snap")
+        assert BinarySnapshot.write(path, []) == 0
+        snapshot = BinarySnapshot(path)
+        registry = AccountRegistry()
+        registry.attach_snapshot(snapshot)
+        assert registry.get_account_by_pesel("89092909876") is None
+        assert registry.get_all_accounts() == []
+        assert snapshot._mmap.closed
+
+    @pytest.mark.parametrize("pesel", ["890929098761234", "8909290987ą"])
+    def test_write_rejects_key_that_does_not_fit(self, source, tmp_path, pesel):
+        """Ucięty klucz kolidowałby z innym kontem ("89092909876") - zapis kończy się błędem"""
+        source.add_account(PersonalAccount.from_dict({
+            "first_name": "Jan", "last_name": "Długi", "pesel": pesel, "balance": 0.0, "history": [],
+        }))
+        path = tmp_path / "registry.snap"
+        with pytest.raises(ValueError):
+            BinarySnapshot.write(str(path), source.iter_accounts())
+        assert not path.exists()
@@ -0,0 +1,71 @@
+from unittest.mock import patch
+from src.circuit_breaker import CircuitBreaker
+import pytest
+
+
+class TestCircuitBreaker:
+    """Testy przejść stanów bezpiecznika (CLOSED -> OPEN -> HALF_OPEN -> CLOSED/OPEN)"""
+
+    @pytest.fixture
+    def clock(self):
+        with patch("src.circuit_breaker.time.monotonic", return_value=100.0) as clock:
+            yield clock
+
+    @pytest.fixture
+    def breaker(self, clock):
+        return CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4, open_seconds=10)
+
+    def record(self, breaker, results):
+        for failed in results:
+            assert breaker.allow()
+            breaker.record_failure() if failed else breaker.record_success()
+
+    @pytest.mark.parametrize("results,expected", [
+        ([True, True, True], CircuitBreaker.CLOSED),  # za mało wywołań
+        ([False, False, False, True], CircuitBreaker.CLOSED),
+        ([False, False, True, True], CircuitBreaker.OPEN),
+        ([True, True, False, False, False, False], CircuitBreaker.CLOSED),  # stare błędy wypadły z okna
+    ])
+    def test_failure_rate_threshold(self, breaker, results, expected):
+        self.record(breaker, results)
+        assert breaker.state == expected
+
+    def test_open_rejects_calls(self, breaker):
+        self.record(breaker, [True] * 4)
+        assert not breaker.allow()
+        assert not breaker.allow()
+        stats = breaker.stats()
+        assert stats["rejected"] == 2
+        assert stats["opened"] == 1
+        assert stats["failures"] == 4
+
+    def test_half_open_allows_single_probe(self, breaker, clock):
+        self.record(breaker, [True] * 4)
+        clock.return_value = 110.0
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow()
+        assert not breaker.allow()
+
+    def test_successful_probe_closes(self, breaker, clock):
+        self.record(breaker, [True] * 4)
+        clock.return_value = 110.0
+        assert breaker.allow()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+        assert breaker.stats()["failure_rate"] == 0.0
+
+    def test_failed_probe_reopens(self, breaker, clock):
+        self.record(breaker, [True] * 4)
+        clock.return_value = 110.0
+        assert breaker.allow()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        clock.return_value = 115.0
+        assert not breaker.allow()
+        assert breaker.stats()["opened"] == 2
+
+    def test_reset(self, breaker):
+        self.record(breaker, [True] * 4)
+        breaker.reset()
+        assert breaker.allow()
+        assert breaker.stats()["failures"] == 0
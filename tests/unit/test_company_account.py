@@ -5,7 +5,7 @@ from src.company_account import CompanyAccount
 
 class TestCompanyAccount:
 
-    @patch('src.company_account.requests.get')
+    @patch('src.nip_validator.requests.Session.get')
     def test_company_account_creation_valid_nip(self, mock_get):
         """Test: Tworzenie konta z ważnym NIPem (Feature 18 - mock API MF)"""
         # Mock odpowiedzi MF API - prawdziwy format z subject.statusVat: Czynny
@@ -29,7 +29,7 @@ class TestCompanyAccount:
         # Sprawdź że API został wysłany
         mock_get.assert_called_once()
 
-    @patch('src.company_account.requests.get')
+    @patch('src.nip_validator.requests.Session.get')
     def test_company_account_invalid_nip_inactive(self, mock_get):
         """Test: Tworzenie konta z NIPem nieaktywnym (statusVat != Czynny)"""
         # Mock odpowiedzi MF API - subject.statusVat: Wznowiony (nie Czynny)
@@ -50,7 +50,7 @@ class TestCompanyAccount:
         with pytest.raises(ValueError, match="Company not registered!!"):
             CompanyAccount("Firma", "1234567890")
 
-    @patch('src.company_account.requests.get')
+    @patch('src.nip_validator.requests.Session.get')
     def test_company_account_invalid_nip_not_found(self, mock_get):
         """Test: Tworzenie konta z NIPem który nie istnieje w MF"""
         # Mock odpowiedzi MF API - subject: null (NIP nie istnieje)
@@ -75,7 +75,7 @@ class TestCompanyAccount:
         assert account.nip == "Invalid"
         # Nie rzuca błędu, bo NIP za krótki
 
-    @patch('src.company_account.requests.get')
+    @patch('src.nip_validator.requests.Session.get')
     def test_company_account_api_timeout(self, mock_get):
         """Test: Timeout przy połączeniu z API MF"""
         mock_get.side_effect = Exception("Connection timeout")
@@ -0,0 +1,108 @@
+from src.account_registry import AccountRegistry
+from src.company_account import CompanyAccount
+from src.company_registration import CompanyRegistrationQueue
+from queue import Full
+from unittest.mock import patch
+import threading
+import time
+import pytest
+
+
+class TestCompanyRegistrationQueue:
+    """Testy zakładania kont firmowych w tle"""
+
+    @pytest.fixture
+    def registry(self):
+        return AccountRegistry()
+
+    @pytest.fixture
+    def queue(self, registry):
+        queue = CompanyRegistrationQueue(registry, workers=2, max_jobs=3)
+        yield queue
+        queue.close()
+
+    def test_registers_account(self, queue, registry):
+        with patch.object(CompanyAccount, "_validate_nip_with_mf", return_value=True):
+            job_id = queue.submit("Firma", "1234567890")
+            queue.wait()
+        assert queue.status(job_id)["state"] == CompanyRegistrationQueue.COMPLETED
+        assert registry.get_account_by_nip("1234567890").company_name == "Firma"
+
+    @pytest.mark.parametrize("active,existing,error", [
+        (False, False, "Company not registered!!"),
+        (True, True, "Account with NIP 1234567890 already exists"),
+    ])
+    def test_failed_registration(self, queue, registry, active, existing, error):
+        with patch.object(CompanyAccount, "_validate_nip_with_mf", return_value=active):
+            if existing:
+                registry.add_account(CompanyAccount("Inna", "1234567890"))
+            job_id = queue.submit("Firma", "1234567890")
+            queue.wait()
+        job = queue.status(job_id)
+        assert job["state"] == CompanyRegistrationQueue.FAILED
+        assert job["error"] == error
+
+    def test_submit_does_not_wait_for_validation(self, queue):
+        release = threading.Event()
+
+        def slow_validation(self, nip):
+            release.wait(5)
+            return True
+
+        with patch.object(CompanyAccount, "_validate_nip_with_mf", slow_validation):
+            start_time = time.perf_counter()
+            job_id = queue.submit("Firma", "1234567890")
+            elapsed = time.perf_counter() - start_time
+            assert elapsed < 0.05
+            assert queue.status(job_id)["state"] in (CompanyRegistrationQueue.PENDING, CompanyRegistrationQueue.RUNNING)
+            release.set()
+            queue.wait()
+        assert queue.status(job_id)["state"] == CompanyRegistrationQueue.COMPLETED
+
+    def test_unknown_job(self, queue):
+        assert queue.status("unknown") is None
+
+    def test_old_finished_jobs_are_dropped(self, queue):
+        with patch.object(CompanyAccount, "_validate_nip_with_mf", return_value=False):
+            job_ids = []
+            for i in range(5):
+                job_ids.append(queue.submit("Firma", f"{i:010d}"))
+                queue.wait()
+        assert [queue.status(job_id) is not None for job_id in job_ids] == [False, False, True, True, True]
+
+    def test_pending_jobs_are_limited(self, registry):
+        """Zleceń w toku jest najwyżej max_pending - kolejne są odrzucane, dopóki któreś się nie skończy"""
+        queue = CompanyRegistrationQueue(registry, workers=1, max_pending=2)
+        release = threading.Event()
+
+        def slow_validation(self, nip):
+            release.wait(5)
+            return True
+
+        try:
+            with patch.object(CompanyAccount, "_validate_nip_with_mf", slow_validation):
+                queue.submit("Firma", "1234567890")
+                queue.submit("Firma", "1234567891")
+                with pytest.raises(Full):
+                    queue.submit("Firma", "1234567892")
+                release.set()
+                queue.wait()
+                job_id = queue.submit("Firma", "1234567892")
+                queue.wait()
+            assert queue.status(job_id)["state"] == CompanyRegistrationQueue.COMPLETED
+            assert registry.get_account_count() == 3
+        finally:
+            release.set()
+            queue.close()
+
+    def test_invalid_max_pending(self, registry):
+        with pytest.raises(ValueError):
+            CompanyRegistrationQueue(registry, max_pending=0)
+
+    def test_endpoint_returns_503_with_retry_after_when_full(self):
+        import app.api as api
+        with patch.object(api.company_registrations, "submit", side_effect=Full):
+            response = api.app.test_client().post(
+                "/api/company-accounts", json={"company_name": "Firma", "nip": "1234567890"})
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == str(api.COMPANY_RETRY_AFTER)
@@ -0,0 +1,88 @@
+from src.account_registry import AccountRegistry
+from src.personal_account import PersonalAccount
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import pytest
+
+
+THREADS = 8
+OPERATIONS = 1000
+
+
+def run_in_threads(target, threads=THREADS):
+    """Uruchamia target(i) w wielu wątkach naraz i zwraca wyniki"""
+    barrier = threading.Barrier(threads)
+
+    def worker(i):
+        barrier.wait()
+        return target(i)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(worker, range(threads)))
+
+
+class TestAccountConcurrency:
+    """Testy blokad kont - równoległe przelewy na tym samym koncie"""
+
+    @pytest.fixture
+    def account(self):
+        return PersonalAccount("John", "Doe", "89092909876")
+
+    def test_concurrent_incoming_transfers_are_not_lost(self, account):
+        run_in_threads(lambda _: [account.incoming_transfer(1.0) for _ in range(OPERATIONS)])
+        assert account.balance == THREADS * OPERATIONS
+        assert len(account.history) == THREADS * OPERATIONS
+
+    def test_concurrent_outgoing_transfers_never_overdraw(self, account):
+        account.incoming_transfer(1000.0)
+        results = run_in_threads(lambda _: sum(account.outgoing_transfer(1.0) for _ in range(500)))
+        assert sum(results) == 1000
+        assert account.balance == 0
+        assert sum(account.history) == 0
+
+    def test_concurrent_express_transfers_keep_fee_next_to_amount(self, account):
+        account.incoming_transfer(1000.0)
+        results = run_in_threads(lambda _: sum(account.express_outgoing_pers(9.0) for _ in range(50)))
+        assert sum(results) == 100  # 100 * (9 + 1) = 1000
+        assert account.balance == 0
+        # Każdy przelew express to para wpisów (-9, -1) bez przeplotu z innymi wątkami
+        assert account.history[1:] == [-9.0, -1.0] * 100
+
+    def test_transfer_on_other_account_is_not_blocked(self, account):
+        other = PersonalAccount("Jane", "Doe", "89092909877")
+        done = threading.Event()
+        with account.lock:
+            thread = threading.Thread(target=lambda: other.incoming_transfer(100.0) and done.set())
+            thread.start()
+            assert done.wait(timeout=1)
+        thread.join()
+        assert other.balance == 100.0
+
+    @pytest.mark.parametrize("method", ["outgoing_transfer", "incoming_transfer", "express_outgoing_pers"])
+    def test_transfer_returns_false_when_rejected(self, account, method):
+        assert getattr(account, method)(-1.0) is False
+
+
+class TestRegistryConcurrency:
+    """Testy rejestru z shardami - równoległe dodawanie i usuwanie kont"""
+
+    def test_concurrent_add_and_delete(self):
+        registry = AccountRegistry(shard_count=4)
+
+        def add_and_delete(i):
+            pesels = [f"{i:02d}{n:09d}" for n in range(OPERATIONS)]
+            for pesel in pesels:
+                registry.add_account(PersonalAccount("Test", f"User{i}", pesel))
+            for pesel in pesels[::2]:
+                assert registry.delete_account(pesel) is True
+
+        run_in_threads(add_and_delete)
+        assert registry.get_account_count() == THREADS * OPERATIONS // 2
+        assert len(registry.get_all_accounts()) == THREADS * OPERATIONS // 2
+        assert len(registry.search_accounts(last_name="User3", limit=OPERATIONS)) == OPERATIONS // 2
+
+    def test_try_add_account_only_one_thread_wins(self):
+        registry = AccountRegistry()
+        results = run_in_threads(lambda i: registry.try_add_account(PersonalAccount(f"T{i}", "Doe", "89092909876")))
+        assert results.count(True) == 1
+        assert registry.get_account_count() == 1
@@ -0,0 +1,195 @@
+from src.delivery_handle import DeliveryHandle
+from src.email_dispatcher import EmailDispatcher
+from src.metrics import metrics
+from src.personal_account import PersonalAccount
+from unittest.mock import patch
+import email
+import gzip
+import queue
+import time
+import pytest
+
+
+class TestEmailDispatcher:
+    """Testy wysyłki maili w tle na lokalnym odbiorniku SMTP"""
+
+    @pytest.fixture
+    def dispatcher_for(self):
+        dispatchers = []
+
+        def create(sink, **kwargs):
+            kwargs.setdefault("backoff", 0.01)
+            dispatchers.append(EmailDispatcher("127.0.0.1", sink.port, **kwargs))
+            return dispatchers[-1]
+
+        yield create
+        for dispatcher in dispatchers:
+            dispatcher.close()
+
+    def test_sends_message(self, smtp_sink, dispatcher_for):
+        sink = smtp_sink()
+        dispatcher = dispatcher_for(sink)
+        handle = dispatcher.submit("Temat", "Treść", ["jan@example.com"])
+        assert handle.wait(5)
+        assert handle.state == DeliveryHandle.SENT
+        assert handle.to_dict()["recipients"] == {"jan@example.com": "sent"}
+        assert sink.delivered() == ["jan@example.com"]
+        assert dispatcher.get(handle.id) is handle
+
+    def test_send_metrics(self, smtp_sink, dispatcher_for):
+        sink = smtp_sink(rejected=("busy@example.com",))
+        dispatcher = dispatcher_for(sink)
+        sent_before = metrics.count("smtp_send_duration_seconds", ("sent",))
+        refused_before = metrics.count("smtp_send_duration_seconds", ("refused",))
+        assert dispatcher.submit("Temat", "Treść", ["jan@example.com"]).wait(5)
+        assert dispatcher.submit("Temat", "Treść", ["busy@example.com"]).wait(5)
+        assert metrics.count("smtp_send_duration_seconds", ("sent",)) == sent_before + 1
+        assert metrics.count("smtp_send_duration_seconds", ("refused",)) == refused_before + 1
+
+    def test_reuses_connections(self, smtp_sink, dispatcher_for):
+        sink = smtp_sink()
+        dispatcher = dispatcher_for(sink, workers=2)
+        handles = [dispatcher.submit("Temat", "Treść", [f"user{i}@example.com"]) for i in range(50)]
+        assert all(handle.wait(5) for handle in handles)
+        assert len(sink.delivered()) == 50
+        assert sink.connections <= 2
+        assert dispatcher.stats()["sent"] == 50
+
+    def test_temporary_failure_is_retried_per_recipient(self, smtp_sink, dispatcher_for):
+        sink = smtp_sink(temporary_failures={"busy@example.com": 2})
+        dispatcher = dispatcher_for(sink)
+        handle = dispatcher.submit("Temat", "Treść", ["jan@example.com", "busy@example.com"])
+        assert handle.wait(5)
+        assert handle.state == DeliveryHandle.SENT
+        assert handle.attempts == 3
+        # Adresat przyjęty za pierwszym razem nie dostaje wiadomości ponownie
+        assert sorted(sink.delivered()) == ["busy@example.com", "jan@example.com"]
+
+    @pytest.mark.parametrize("temporary_failures,rejected,expected", [
+        ({"busy@example.com": 10}, (), "451"),
+        ({}, ("busy@example.com",), "550"),
+    ])
+    def test_failed_recipient(self, smtp_sink, dispatcher_for, temporary_failures, rejected, expected):
+        sink = smtp_sink(temporary_failures=temporary_failures, rejected=rejected)
+        dispatcher = dispatcher_for(sink, max_retries=2)
+        handle = dispatcher.submit("Temat", "Treść", ["jan@example.com", "busy@example.com"])
+        assert handle.wait(5)
+        assert handle.state == DeliveryHandle.PARTIAL
+        assert handle.to_dict()["recipients"]["busy@example.com"].startswith(expected)
+        assert dispatcher.stats()["failed"] == 1
+
+    def test_unreachable_server(self, dispatcher_for, smtp_sink):
+        sink = smtp_sink()
+        sink.close()
+        dispatcher = dispatcher_for(sink, max_retries=1)
+        handle = dispatcher.submit("Temat", "Treść", ["jan@example.com"])
+        assert handle.wait(5)
+        assert handle.state == DeliveryHandle.FAILED
+        assert handle.attempts == 2
+
+    def test_close_cancels_pending_retries(self, smtp_sink, dispatcher_for):
+        """Ponowienie czekające na backoff przy close() - uchwyt kończy się błędem zamiast wisieć"""
+        sink = smtp_sink(temporary_failures={"busy@example.com": 1})
+        dispatcher = dispatcher_for(sink, backoff=60)
+        handle = dispatcher.submit("Temat", "Treść", ["jan@example.com", "busy@example.com"])
+        deadline = time.monotonic() + 5
+        while dispatcher.stats()["retried"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not handle.done()
+
+        dispatcher.close()
+        assert handle.wait(1)
+        assert handle.state == DeliveryHandle.PARTIAL
+        assert handle.to_dict()["recipients"] == {
+            "jan@example.com": "sent", "busy@example.com": "Dispatcher closed before retry"
+        }
+        assert dispatcher.stats()["failed"] == 1
+        assert sink.delivered() == ["jan@example.com"]
+
+    def test_full_queue(self, smtp_sink, dispatcher_for):
+        sink = smtp_sink()
+        dispatcher = dispatcher_for(sink, workers=1, queue_size=1)
+        with patch.object(EmailDispatcher, "_start_workers"):
+            dispatcher.submit("Temat", "Treść", ["jan@example.com"])
+            with pytest.raises(queue.Full):
+                dispatcher.submit("Temat", "Treść", ["jan@example.com"])
+
+    @pytest.mark.parametrize("subject,recipients", [
+        ("Temat", []),
+        ("Temat\r\nBcc: x@example.com", ["jan@example.com"]),
+        ("Temat", ["jan@example.com\nBcc: x@example.com"]),
+    ])
+    def test_invalid_message(self, smtp_sink, dispatcher_for, subject, recipients):
+        dispatcher = dispatcher_for(smtp_sink())
+        with pytest.raises(ValueError):
+            dispatcher.submit(subject, "Treść", recipients)
+
+    def test_message_format(self, smtp_sink, dispatcher_for):
+        dispatcher = dispatcher_for(smtp_sink())
+        raw = dispatcher._format_message("Historia konta", "Wpłata: 100 zł", ["jan@example.com"])
+        message = email.message_from_bytes(raw)
+        assert message["Subject"] == "Historia konta"
+        assert message["To"] == "jan@example.com"
+        assert message.get_payload(decode=True).decode() == "Wpłata: 100 zł"
+
+    def test_streamed_attachment(self, smtp_sink, dispatcher_for):
+        sink = smtp_sink(keep_data=True)
+        dispatcher = dispatcher_for(sink)
+        # Kawałki o długościach niepodzielnych przez 57 i linie zaczynające się od kropki
+        content = [b".a\r\n" * 7, b"x" * 100, b"\r\n.b" * 30]
+        handle = dispatcher.submit("Temat", "Treść", ["jan@example.com"],
+                                   attachment=("plik.txt", "text/plain", lambda: iter(content)))
+        assert handle.wait(5)
+        assert handle.state == DeliveryHandle.SENT
+
+        message = email.message_from_bytes(sink.data[0])
+        text, attachment = message.get_payload()
+        assert text.get_payload(decode=True).decode() == "Treść"
+        assert attachment.get_filename() == "plik.txt"
+        assert attachment.get_payload(decode=True) == b"".join(content)
+
+    def test_attachment_is_regenerated_on_retry(self, smtp_sink, dispatcher_for):
+        sink = smtp_sink(temporary_failures={"jan@example.com": 1})
+        dispatcher = dispatcher_for(sink)
+        calls = []
+
+        def content():
+            calls.append(1)
+            yield b"data"
+
+        handle = dispatcher.submit("Temat", "Treść", ["jan@example.com"], attachment=("plik.txt", "text/plain", content))
+        assert handle.wait(5)
+        assert handle.state == DeliveryHandle.SENT
+        # Pierwsza próba odpada na RCPT TO, treść jest generowana dopiero przy DATA
+        assert len(calls) == 1
+
+    def test_attachment_generation_error(self, smtp_sink, dispatcher_for):
+        sink = smtp_sink()
+        dispatcher = dispatcher_for(sink, max_retries=1)
+
+        def content():
+            yield b"data"
+            raise RuntimeError("broken")
+
+        handle = dispatcher.submit("Temat", "Treść", ["jan@example.com"], attachment=("plik.txt", "text/plain", content))
+        assert handle.wait(5)
+        assert handle.state == DeliveryHandle.FAILED
+        assert "broken" in handle.to_dict()["recipients"]["jan@example.com"]
+        assert sink.delivered() == []
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_queue_history_email(self, smtp_sink, dispatcher_for, compress):
+        sink = smtp_sink(keep_data=True)
+        dispatcher = dispatcher_for(sink)
+        account = PersonalAccount("Jan", "Kowalski", "89092909876")
+        account.incoming_transfer(100)
+        account.outgoing_transfer(40)
+        handle = account.queue_history_email(dispatcher, "jan@example.com", start=1, compress=compress)
+        assert handle.wait(5)
+        assert handle.state == DeliveryHandle.SENT
+
+        text, attachment = email.message_from_bytes(sink.data[0]).get_payload()
+        assert text.get_payload(decode=True).decode() == "Personal account history: 1 entries in the attached " + (
+            "history.csv.gz" if compress else "history.csv")
+        content = attachment.get_payload(decode=True)
+        assert (gzip.decompress(content) if compress else content) == b"entry,amount\n1,-40.00\n"
@@ -7,7 +7,7 @@ from src.company_account import CompanyAccount
 @pytest.fixture
 def mock_mf_api():
     """Fixture: Mock API Ministerstwa Finansów"""
-    with patch('src.company_account.requests.get') as mock_get:
+    with patch('src.nip_validator.requests.Session.get') as mock_get:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -0,0 +1,55 @@
+from src.history_statement import HistoryStatement
+from src.transaction_history import TransactionHistory
+import gzip
+import pytest
+
+
+class TestHistoryStatement:
+    """Testy wyciągu z historii konta generowanego kawałkami"""
+
+    @pytest.fixture
+    def history(self):
+        return TransactionHistory([100, -50, 25.5, -1.0])
+
+    def test_csv(self, history):
+        statement = HistoryStatement(history, chunk_size=3)
+        assert list(statement.chunks()) == [
+            "entry,amount\n",
+            "0,100.00\n1,-50.00\n2,25.50\n",
+            "3,-1.00\n",
+        ]
+        assert (statement.filename, statement.content_type) == ("history.csv", "text/csv")
+
+    def test_text(self, history):
+        statement = HistoryStatement(history, fmt="text")
+        lines = "".join(statement.chunks()).splitlines()
+        assert lines[0].split() == ["entry", "amount"]
+        assert lines[1].split() == ["0", "100.00"]
+        assert len(lines) == 5
+        assert statement.filename == "history.txt"
+
+    @pytest.mark.parametrize("start,stop,expected", [
+        (1, 3, ["1,-50.00", "2,25.50"]),
+        (-1, None, ["3,-1.00"]),
+        (10, None, []),
+    ])
+    def test_range(self, history, start, stop, expected):
+        statement = HistoryStatement(history, start, stop)
+        assert "".join(statement.chunks()).splitlines()[1:] == expected
+        assert len(statement) == len(expected)
+
+    def test_range_is_fixed_at_creation(self, history):
+        statement = HistoryStatement(history)
+        history.append(10)
+        assert len(statement) == 4
+        assert "4,10.00" not in "".join(statement.chunks())
+
+    def test_compressed(self, history):
+        statement = HistoryStatement(history, compress=True, chunk_size=1)
+        assert gzip.decompress(b"".join(statement.encoded())) == "".join(HistoryStatement(history).chunks()).encode()
+        assert (statement.filename, statement.content_type) == ("history.csv.gz", "application/gzip")
+
+    @pytest.mark.parametrize("kwargs", [{"fmt": "pdf"}, {"chunk_size": 0}])
+    def test_invalid_options(self, history, kwargs):
+        with pytest.raises(ValueError):
+            HistoryStatement(history, **kwargs)
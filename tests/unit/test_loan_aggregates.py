@@ -0,0 +1,84 @@
+from src.personal_account import PersonalAccount
+from src.company_account import CompanyAccount
+from src.transaction_history import TransactionHistory
+import random
+import pytest
+
+
+def reference_personal_decision(history, amount):
+    """Reguły kredytu konta osobistego liczone na liście - jak przed wprowadzeniem agregatów"""
+    last_three = len(history) >= 3 and all(a > 0 for a in history[-3:])
+    last_five = len(history) >= 5 and sum(history[-5:]) > amount
+    return last_three or last_five
+
+
+def reference_company_decision(balance, history, amount):
+    return balance >= 2 * amount and -1775 in history
+
+
+def random_history(rng):
+    amounts = [rng.choice([100, 250.5, 1775, 30, 0.1, 999.99]) for _ in range(rng.randint(0, 12))]
+    return [amount if rng.random() < 0.5 else -amount for amount in amounts]
+
+
+def replay(account, history):
+    """Odtwarza historię przez przelewy (ścieżka append) przy nieograniczonym saldzie"""
+    account.balance = 10 ** 9
+    for amount in history:
+        if amount > 0:
+            account.incoming_transfer(amount)
+        else:
+            account.outgoing_transfer(-amount)
+
+
+class TestLoanAggregates:
+    """Decyzje kredytowe na agregatach historii są identyczne z liczonymi na liście"""
+
+    @pytest.fixture
+    def company(self):
+        return CompanyAccount.from_dict({"company_name": "Firma", "nip": "1234567890", "balance": 0.0, "history": []})
+
+    @pytest.mark.parametrize("seed", range(200))
+    def test_personal_decisions_match_reference(self, seed):
+        rng = random.Random(seed)
+        history = random_history(rng)
+        amount = rng.choice([0, 50, 100, 500, 1000])
+
+        replayed = PersonalAccount("Jan", "Kowalski", "89092909876")
+        replay(replayed, history)
+        loaded = PersonalAccount.from_dict({
+            "first_name": "Jan", "last_name": "Kowalski", "pesel": "89092909876",
+            "balance": 0.0, "history": history,
+        })
+
+        expected = reference_personal_decision(history, amount)
+        assert replayed.submit_for_loan(amount) is expected
+        assert loaded.submit_for_loan(amount) is expected
+
+    @pytest.mark.parametrize("seed", range(200))
+    def test_company_decisions_match_reference(self, company, seed):
+        rng = random.Random(seed)
+        history = random_history(rng)
+        amount = rng.choice([100, 1000, 10 ** 8, 10 ** 9])
+
+        replay(company, history)
+        loaded = CompanyAccount.from_dict({
+            "company_name": "Firma", "nip": "1234567890", "balance": company.balance, "history": history,
+        })
+
+        expected = reference_company_decision(company.balance, history, amount)
+        assert loaded.take_loan(amount) is expected
+        assert company.take_loan(amount) is expected
+
+    def test_tracked_amount_counter(self):
+        history = TransactionHistory([-1775, 10], tracked_amounts=(-1775,))
+        assert history.count(-1775) == 1
+        history.append(-1775.0)
+        history.append(-1775)
+        assert history.count(-1775) == 3
+        assert -1775 in history
+        assert -1776 not in history
+
+    @pytest.mark.parametrize("n,expected", [(0, []), (2, [3.0, 4.0]), (10, [1.0, 2.0, 3.0, 4.0])])
+    def test_last(self, n, expected):
+        assert TransactionHistory([1, 2, 3, 4]).last(n).tolist() == expected
@@ -0,0 +1,74 @@
+from src.metrics import Metrics
+import pytest
+
+
+class TestMetrics:
+    """Testy metryk i eksportu w formacie Prometheusa"""
+
+    @pytest.fixture
+    def metrics(self):
+        metrics = Metrics(prefix="test_")
+        metrics.counter("requests_total", "Requests", ("status",))
+        metrics.gauge("in_flight", "In flight")
+        metrics.histogram("duration_seconds", "Duration", ("endpoint",), buckets=(0.1, 0.2, 0.5))
+        return metrics
+
+    def test_counter_and_gauge(self, metrics):
+        metrics.inc("requests_total", ("200",))
+        metrics.inc("requests_total", ("200",))
+        metrics.inc("requests_total", ("404",))
+        metrics.inc("in_flight")
+        metrics.inc("in_flight", amount=-1)
+        metrics.set("in_flight", 3)
+        assert metrics.value("requests_total", ("200",)) == 2
+        assert metrics.value("requests_total", ("500",)) == 0
+        assert metrics.value("in_flight") == 3
+
+    def test_gauge_function(self, metrics):
+        metrics.gauge("accounts", "Accounts", function=lambda: 42)
+        assert metrics.value("accounts") == 42
+        assert "test_accounts 42\n" in metrics.render()
+
+    @pytest.mark.parametrize("q,expected", [(0.25, 0.05), (0.5, 0.1), (0.75, 0.35), (1.0, 0.5)])
+    def test_quantile(self, metrics, q, expected):
+        for value in (0.05, 0.1, 0.3, 0.4):
+            metrics.observe("duration_seconds", value, ("/a",))
+        assert metrics.quantile("duration_seconds", q, ("/a",)) == pytest.approx(expected)
+        assert metrics.count("duration_seconds", ("/a",)) == 4
+
+    def test_quantile_in_overflow_bucket(self, metrics):
+        metrics.observe("duration_seconds", 7.0)
+        assert metrics.quantile("duration_seconds", 0.99) == 0.5
+        assert metrics.quantile("duration_seconds", 0.5, ("/other",)) is None
+
+    def test_timer(self, metrics):
+        with pytest.raises(RuntimeError):
+            with metrics.timer("duration_seconds", ("/a",)):
+                raise RuntimeError
+        assert metrics.count("duration_seconds", ("/a",)) == 1
+
+    def test_render(self, metrics):
+        metrics.inc("requests_total", ('say "hi"',))
+        metrics.observe("duration_seconds", 0.15, ("/a",))
+        metrics.observe("duration_seconds", 1.0, ("/a",))
+        text = metrics.render()
+        assert "# TYPE test_duration_seconds histogram" in text
+        assert 'test_duration_seconds_bucket{endpoint="/a",le="0.1"} 0' in text
+        assert 'test_duration_seconds_bucket{endpoint="/a",le="0.2"} 1' in text
+        assert 'test_duration_seconds_bucket{endpoint="/a",le="+Inf"} 2' in text
+        assert 'test_duration_seconds_sum{endpoint="/a"} 1.15' in text
+        assert 'test_duration_seconds_count{endpoint="/a"} 2' in text
+        assert 'test_duration_seconds_quantile{endpoint="/a",quantile="0.5"} 0.2' in text
+        assert 'test_requests_total{status="say \\"hi\\""} 1' in text
+        assert text.endswith("\n")
+
+    def test_redeclaration(self, metrics):
+        metrics.counter("requests_total", "Requests", ("status",))
+        with pytest.raises(ValueError):
+            metrics.gauge("requests_total", "Requests")
+
+    def test_clear(self, metrics):
+        metrics.inc("requests_total", ("200",))
+        metrics.clear()
+        assert metrics.value("requests_total", ("200",)) == 0
+        assert "# TYPE test_requests_total counter" in metrics.render()
@@ -1,10 +1,23 @@
+import threading
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+from pymongo import DeleteMany, DeleteOne, ReplaceOne, UpdateOne
+from src.history_statement import HistoryStatement
 from src.mongo_repository import MongoAccountsRepository
 from src.personal_account import PersonalAccount
 from src.company_account import CompanyAccount
 
 
+def collection_mock():
+    """Mock kolekcji - find bez ustawionego wyniku zwraca pustą kolekcję"""
+    return Mock(**{"find.return_value": []})
+
+
+def account_document(account):
+    """Dokument konta w kolekcji accounts - bez historii, z liczbą jej wpisów"""
+    return dict(account.to_dict(include_history=False), history_count=len(account.history))
+
+
 class TestMongoAccountsRepository:
     """Unit testy dla MongoAccountsRepository z użyciem mocków"""
     
@@ -17,15 +30,15 @@ class TestMongoAccountsRepository:
         self.account2.incoming_transfer(200)
     
     @patch('src.mongo_repository.MongoClient')
-    def test_save_all_clears_collection_before_saving(self, mock_mongo_client):
-        """Test: save_all() czyści kolekcję przed zapisem"""
+    def test_save_all_does_not_clear_collection(self, mock_mongo_client):
+        """Test: save_all() nie czyści kolekcji - usuwa tylko konta spoza listy"""
         # Mockujemy całą strukturę MongoDB
-        mock_collection = Mock()
+        mock_collection = collection_mock()
         mock_db = Mock()
         mock_client_instance = Mock()
         
         mock_client_instance.__getitem__ = lambda self, key: mock_db
-        mock_db.__getitem__ = lambda self, key: mock_collection
+        mock_db.__getitem__ = lambda self, key: mock_collection if key == "accounts" else collection_mock()
         mock_mongo_client.return_value = mock_client_instance
         
         # Tworzymy repository
@@ -35,19 +48,22 @@ class TestMongoAccountsRepository:
         accounts = [self.account1, self.account2]
         repo.save_all(accounts)
         
-        # Sprawdzamy czy delete_many zostało wywołane
-        mock_collection.delete_many.assert_called_once_with({})
+        # Pierwszy zapis nie czyści kolekcji - usuwa tylko dokumenty kont spoza listy
+        mock_collection.delete_many.assert_not_called()
+        mock_collection.find.assert_called_once_with(
+            {}, projection={"_id": True, "pesel": True, "nip": True}, batch_size=repo.LOAD_BATCH_SIZE
+        )
     
     @patch('src.mongo_repository.MongoClient')
     def test_save_all_saves_all_accounts(self, mock_mongo_client):
-        """Test: save_all() zapisuje wszystkie konta"""
+        """Test: save_all() zapisuje wszystkie konta jednym bulk_write"""
         # Mockujemy strukturę MongoDB
-        mock_collection = Mock()
+        mock_collection = collection_mock()
         mock_db = Mock()
         mock_client_instance = Mock()
         
         mock_client_instance.__getitem__ = lambda self, key: mock_db
-        mock_db.__getitem__ = lambda self, key: mock_collection
+        mock_db.__getitem__ = lambda self, key: mock_collection if key == "accounts" else collection_mock()
         mock_mongo_client.return_value = mock_client_instance
         
         # Tworzymy repository
@@ -55,21 +71,22 @@ class TestMongoAccountsRepository:
         
         # Zapisujemy konta
         accounts = [self.account1, self.account2]
-        repo.save_all(accounts)
-        
-        # Sprawdzamy czy update_one wywołano 2 razy (dla każdego konta)
-        assert mock_collection.update_one.call_count == 2
-        
-        # Sprawdzamy argumenty pierwszego wywołania
-        first_call = mock_collection.update_one.call_args_list[0]
-        assert first_call[0][0] == {"pesel": "90010112345"}
-        assert first_call[1]["upsert"] is True
+        result = repo.save_all(accounts)
+        
+        # Jedno wywołanie bulk_write z dwiema operacjami, bez kolejności
+        mock_collection.bulk_write.assert_called_once()
+        operations = mock_collection.bulk_write.call_args[0][0]
+        assert len(operations) == 2
+        assert mock_collection.bulk_write.call_args[1]["ordered"] is False
+        assert operations[0] == ReplaceOne({"pesel": "90010112345"}, account_document(self.account1), upsert=True)
+        assert result == {"upserted": 2, "deleted": 0}
+        mock_collection.update_one.assert_not_called()
     
     @patch('src.mongo_repository.MongoClient')
     def test_load_all_returns_personal_accounts(self, mock_mongo_client):
         """Test: load_all() zwraca PersonalAccount z bazy"""
         # Mockujemy kolekcję z danymi
-        mock_collection = Mock()
+        mock_collection = collection_mock()
         mock_collection.find.return_value = [
             self.account1.to_dict(),
             self.account2.to_dict()
@@ -79,7 +96,7 @@ class TestMongoAccountsRepository:
         mock_client_instance = Mock()
         
         mock_client_instance.__getitem__ = lambda self, key: mock_db
-        mock_db.__getitem__ = lambda self, key: mock_collection
+        mock_db.__getitem__ = lambda self, key: mock_collection if key == "accounts" else collection_mock()
         mock_mongo_client.return_value = mock_client_instance
         
         # Tworzymy repository
@@ -112,7 +129,7 @@ class TestMongoAccountsRepository:
         company.incoming_transfer(500)
         
         # Mockujemy kolekcję z danymi
-        mock_collection = Mock()
+        mock_collection = collection_mock()
         mock_collection.find.return_value = [
             company.to_dict()
         ]
@@ -121,7 +138,7 @@ class TestMongoAccountsRepository:
         mock_client_instance = Mock()
         
         mock_client_instance.__getitem__ = lambda self, key: mock_db
-        mock_db.__getitem__ = lambda self, key: mock_collection
+        mock_db.__getitem__ = lambda self, key: mock_collection if key == "accounts" else collection_mock()
         mock_mongo_client.return_value = mock_client_instance
         
         # Tworzymy repository
@@ -145,7 +162,7 @@ class TestMongoAccountsRepository:
     def test_load_all_skips_unknown_account_types(self, mock_mongo_client):
         """Test: load_all() pomija nieznane typy kont"""
         # Mockujemy kolekcję z danymi (w tym nieznany typ)
-        mock_collection = Mock()
+        mock_collection = collection_mock()
         mock_collection.find.return_value = [
             self.account1.to_dict(),
             {"type": "unknown", "data": "test"},  # Nieznany typ
@@ -156,7 +173,7 @@ class TestMongoAccountsRepository:
         mock_client_instance = Mock()
         
         mock_client_instance.__getitem__ = lambda self, key: mock_db
-        mock_db.__getitem__ = lambda self, key: mock_collection
+        mock_db.__getitem__ = lambda self, key: mock_collection if key == "accounts" else collection_mock()
         mock_mongo_client.return_value = mock_client_instance
         
         # Tworzymy repository
@@ -174,12 +191,12 @@ class TestMongoAccountsRepository:
     def test_save_all_uses_upsert(self, mock_mongo_client):
         """Test: save_all() używa upsert=True"""
         # Mockujemy strukturę MongoDB
-        mock_collection = Mock()
+        mock_collection = collection_mock()
         mock_db = Mock()
         mock_client_instance = Mock()
         
         mock_client_instance.__getitem__ = lambda self, key: mock_db
-        mock_db.__getitem__ = lambda self, key: mock_collection
+        mock_db.__getitem__ = lambda self, key: mock_collection if key == "accounts" else collection_mock()
         mock_mongo_client.return_value = mock_client_instance
         
         # Tworzymy repository
@@ -188,9 +205,9 @@ class TestMongoAccountsRepository:
         # Zapisujemy jedno konto
         repo.save_all([self.account1])
         
-        # Sprawdzamy czy update_one zostało wywołane z upsert=True
-        call_args = mock_collection.update_one.call_args
-        assert call_args[1]["upsert"] is True
+        # Sprawdzamy czy operacja zapisu ma upsert=True
+        operation = mock_collection.bulk_write.call_args[0][0][0]
+        assert operation == ReplaceOne({"pesel": "90010112345"}, account_document(self.account1), upsert=True)
     
     @patch('src.mongo_repository.MongoClient')
     def test_load_all_removes_mongodb_id(self, mock_mongo_client):
@@ -199,14 +216,14 @@ class TestMongoAccountsRepository:
         account_dict = self.account1.to_dict()
         account_dict["_id"] = "mongodb_object_id_12345"
         
-        mock_collection = Mock()
+        mock_collection = collection_mock()
         mock_collection.find.return_value = [account_dict]
         
         mock_db = Mock()
         mock_client_instance = Mock()
         
         mock_client_instance.__getitem__ = lambda self, key: mock_db
-        mock_db.__getitem__ = lambda self, key: mock_collection
+        mock_db.__getitem__ = lambda self, key: mock_collection if key == "accounts" else collection_mock()
         mock_mongo_client.return_value = mock_client_instance
         
         # Tworzymy repository
@@ -223,12 +240,12 @@ class TestMongoAccountsRepository:
     def test_close_connection(self, mock_mongo_client):
         """Test: close() zamyka połączenie z MongoDB"""
         # Mockujemy strukturę MongoDB
-        mock_collection = Mock()
+        mock_collection = collection_mock()
         mock_db = Mock()
         mock_client_instance = Mock()
         
         mock_client_instance.__getitem__ = lambda self, key: mock_db
-        mock_db.__getitem__ = lambda self, key: mock_collection
+        mock_db.__getitem__ = lambda self, key: mock_collection if key == "accounts" else collection_mock()
         mock_mongo_client.return_value = mock_client_instance
         
         # Tworzymy repository
@@ -239,3 +256,402 @@ class TestMongoAccountsRepository:
         
         # Sprawdzamy czy close zostało wywołane na kliencie
         mock_client_instance.close.assert_called_once()
+
+
+class TestMongoAccountsRepositoryIncrementalSave:
+    """Unit testy przyrostowego zapisu - wysyłane są tylko zmiany od ostatniego zapisu"""
+
+    BULK_BATCH_SIZE = 3
+
+    @pytest.fixture
+    def collection(self):
+        return collection_mock()
+
+    @pytest.fixture
+    def history(self):
+        return collection_mock()
+
+    @pytest.fixture
+    def repo(self, collection, history):
+        with patch('src.mongo_repository.MongoClient') as mock_mongo_client:
+            mock_db = Mock()
+            mock_client_instance = Mock()
+            mock_client_instance.__getitem__ = lambda self, key: mock_db
+            mock_db.__getitem__ = lambda self, key: collection if key == "accounts" else history
+            mock_mongo_client.return_value = mock_client_instance
+            return MongoAccountsRepository()
+
+    @pytest.fixture
+    def accounts(self):
+        return [PersonalAccount("Jan", "Kowalski", f"890929098{i:02d}") for i in range(5)]
+
+    def operations(self, collection):
+        return [operation for call in collection.bulk_write.call_args_list for operation in call[0][0]]
+
+    def test_unchanged_accounts_are_not_sent_again(self, repo, collection, accounts):
+        repo.save_all(accounts)
+        collection.reset_mock()
+        assert repo.save_all(accounts) == {"upserted": 0, "deleted": 0}
+        collection.bulk_write.assert_not_called()
+        collection.delete_many.assert_not_called()
+
+    def test_only_changed_new_and_deleted_accounts_are_sent(self, repo, collection, accounts):
+        repo.save_all(accounts)
+        collection.reset_mock()
+
+        accounts[1].incoming_transfer(100)
+        deleted = accounts.pop(3)
+        new_account = PersonalAccount("Adam", "Nowak", "89092909899")
+        accounts.append(new_account)
+
+        assert repo.save_all(accounts) == {"upserted": 2, "deleted": 1}
+        assert self.operations(collection) == [
+            ReplaceOne({"pesel": accounts[1].pesel}, account_document(accounts[1]), upsert=True),
+            ReplaceOne({"pesel": "89092909899"}, account_document(new_account), upsert=True),
+            DeleteOne({"pesel": deleted.pesel}),
+        ]
+
+    @pytest.mark.parametrize("change", [
+        lambda account: account.incoming_transfer(10),
+        lambda account: account.submit_for_loan(1),
+        lambda account: account.mark_changed(),
+    ])
+    def test_mutations_mark_account_dirty(self, repo, collection, accounts, change):
+        for _ in range(3):
+            accounts[0].incoming_transfer(100)
+        repo.save_all(accounts)
+        collection.reset_mock()
+        change(accounts[0])
+        assert repo.save_all(accounts)["upserted"] == 1
+
+    def test_replaced_account_object_is_saved(self, repo, collection, accounts):
+        """Nowy obiekt z tym samym PESEL (np. po ponownym dodaniu) ma wersję 0, ale i tak jest zapisywany"""
+        repo.save_all(accounts)
+        accounts[0] = PersonalAccount("Jan", "Nowak", accounts[0].pesel)
+        assert repo.save_all(accounts)["upserted"] == 1
+
+    def test_operations_are_sent_in_batches(self, repo, collection, accounts):
+        repo.BULK_BATCH_SIZE = self.BULK_BATCH_SIZE
+        repo.save_all(accounts)
+        assert [len(call[0][0]) for call in collection.bulk_write.call_args_list] == [3, 2]
+
+    def test_failed_batch_is_retried_on_next_save(self, repo, collection, accounts):
+        collection.bulk_write.side_effect = Exception("connection lost")
+        with pytest.raises(Exception):
+            repo.save_all(accounts)
+        collection.bulk_write.side_effect = None
+        assert repo.save_all(accounts)["upserted"] == 5
+
+    def test_company_accounts_are_keyed_by_nip(self, repo, collection):
+        with patch('src.company_account.CompanyAccount._validate_nip_with_mf', return_value=True):
+            company = CompanyAccount("Test Corp", "1234567890")
+        repo.save_all([company])
+        assert self.operations(collection)[0] == ReplaceOne({"nip": "1234567890"}, account_document(company), upsert=True)
+
+    def test_first_save_deletes_accounts_missing_from_list(self, repo, collection, history, accounts):
+        """Klucze z bazy są porównywane z listą kont po stronie aplikacji, usunięcia idą paczkami"""
+        repo.BULK_BATCH_SIZE = self.BULK_BATCH_SIZE
+        collection.find.return_value = [{"_id": i, "pesel": account.pesel} for i, account in enumerate(accounts)] + [
+            {"_id": 10, "pesel": "11111111111"}, {"_id": 11, "nip": "1234567890"},
+            {"_id": 12, "pesel": "22222222222"}, {"_id": 13},
+        ]
+        history.find.return_value = [{"pesel": accounts[0].pesel}, {"pesel": "11111111111"}, {"pesel": "33333333333"}]
+
+        repo.save_all(accounts)
+        deletes = [call[0][0] for call in collection.bulk_write.call_args_list][-2:]
+        assert deletes == [[DeleteOne({"_id": 10}), DeleteOne({"_id": 11}), DeleteOne({"_id": 12})],
+                           [DeleteOne({"_id": 13})]]
+        history_deletes = [operation for operation in self.operations(history) if operation._filter.keys() < {
+            "pesel", "nip"}]
+        assert sorted(map(str, history_deletes)) == sorted(map(str, [
+            DeleteMany({"pesel": "11111111111"}), DeleteMany({"nip": "1234567890"}),
+            DeleteMany({"pesel": "22222222222"}), DeleteMany({"pesel": "33333333333"}),
+        ]))
+        collection.delete_many.assert_not_called()
+        history.delete_many.assert_not_called()
+
+    def test_load_all_sets_saved_state(self, repo, collection, accounts):
+        collection.find.return_value = [account.to_dict() for account in accounts]
+        loaded = repo.load_all()
+        assert repo.save_all(loaded) == {"upserted": 0, "deleted": 0}
+        collection.delete_many.assert_not_called()
+        loaded[2].incoming_transfer(1)
+        assert repo.save_all(loaded) == {"upserted": 1, "deleted": 0}
+
+
+class TestMongoAccountsRepositoryStreamingLoad:
+    """Unit testy strumieniowego ładowania kont (iter_all) i szybkiego odtwarzania kont"""
+
+    @pytest.fixture
+    def collection(self):
+        return collection_mock()
+
+    @pytest.fixture
+    def history(self):
+        return collection_mock()
+
+    @pytest.fixture
+    def repo(self, collection, history):
+        with patch('src.mongo_repository.MongoClient') as mock_mongo_client:
+            mock_db = Mock()
+            mock_client_instance = Mock()
+            mock_client_instance.__getitem__ = lambda self, key: mock_db
+            mock_db.__getitem__ = lambda self, key: collection if key == "accounts" else history
+            mock_mongo_client.return_value = mock_client_instance
+            return MongoAccountsRepository()
+
+    @pytest.fixture
+    def documents(self):
+        account = PersonalAccount("Jan", "Kowalski", "89092909876", promo_code="PROM_XYZ")
+        account.incoming_transfer(100)
+        return [account.to_dict(), PersonalAccount("Adam", "Nowak", "89092909877").to_dict()]
+
+    def test_iter_all_uses_batch_size_and_projection(self, repo, collection, documents):
+        collection.find.return_value = iter(documents)
+        list(repo.iter_all(batch_size=500))
+        collection.find.assert_called_once_with(
+            {}, projection=MongoAccountsRepository.LOAD_PROJECTION, batch_size=500
+        )
+        assert MongoAccountsRepository.LOAD_PROJECTION["_id"] is False
+
+    def test_iter_all_is_lazy(self, repo, collection, documents):
+        """Dokumenty są pobierane z kursora paczkami, dopiero przy pobieraniu kolejnych kont"""
+        cursor = iter(documents)
+        collection.find.return_value = cursor
+        accounts = repo.iter_all(batch_size=1)
+        first = next(accounts)
+        assert first.pesel == "89092909876"
+        assert next(cursor)["pesel"] == "89092909877"
+
+    def test_hydration_skips_constructor(self, documents):
+        with patch.object(PersonalAccount, "__init__") as constructor, \
+                patch.object(PersonalAccount, "apply_promo") as apply_promo:
+            account = PersonalAccount.from_dict(documents[0])
+        constructor.assert_not_called()
+        apply_promo.assert_not_called()
+        assert account.balance == 150.0
+        assert account.history == [100]
+        assert account.promo_code == "PROM_XYZ"
+        assert account.version == 0
+
+    def test_hydrated_account_works_like_constructed(self, documents):
+        account = PersonalAccount.from_dict(documents[0])
+        assert account.outgoing_transfer(50) is True
+        assert account.balance == 100.0
+        assert account.history == [100, -50]
+        assert account.version == 1
+
+    def test_company_hydration_skips_nip_validation(self):
+        with patch('src.company_account.CompanyAccount._validate_nip_with_mf', return_value=True):
+            company = CompanyAccount("Test Corp", "1234567890")
+        company.incoming_transfer(2000)
+        company.outgoing_transfer(1775)
+        with patch('src.company_account.CompanyAccount._validate_nip_with_mf') as validate:
+            account = CompanyAccount.from_dict(company.to_dict())
+        validate.assert_not_called()
+        assert account.nip == "1234567890"
+        assert account.take_loan(100) is True
+
+
+class TestMongoAccountsRepositoryHistoryBuckets:
+    """Unit testy zapisu historii w kubełkach (kolekcja history_buckets)"""
+
+    @pytest.fixture
+    def collection(self):
+        return collection_mock()
+
+    @pytest.fixture
+    def history(self):
+        return collection_mock()
+
+    @pytest.fixture
+    def repo(self, collection, history):
+        with patch('src.mongo_repository.MongoClient') as mock_mongo_client:
+            mock_db = Mock()
+            mock_client_instance = Mock()
+            mock_client_instance.__getitem__ = lambda self, key: mock_db
+            mock_db.__getitem__ = lambda self, key: collection if key == "accounts" else history
+            mock_mongo_client.return_value = mock_client_instance
+            repo = MongoAccountsRepository()
+        repo.HISTORY_BUCKET_SIZE = 3
+        return repo
+
+    @pytest.fixture
+    def account(self):
+        account = PersonalAccount("Jan", "Kowalski", "89092909876")
+        for amount in range(1, 8):
+            account.incoming_transfer(amount)
+        return account
+
+    def history_operations(self, history):
+        return [operation for call in history.bulk_write.call_args_list for operation in call[0][0]]
+
+    def test_account_document_has_no_history(self, repo, collection, account):
+        repo.save_all([account])
+        document = {"type": "personal", "first_name": "Jan", "last_name": "Kowalski", "pesel": "89092909876",
+                    "balance": 28.0, "promo_code": None, "history_count": 7}
+        assert collection.bulk_write.call_args[0][0] == [
+            ReplaceOne({"pesel": "89092909876"}, document, upsert=True)
+        ]
+
+    def test_first_save_writes_all_buckets(self, repo, history, account):
+        repo.save_all([account])
+        assert self.history_operations(history) == [
+            DeleteMany({"pesel": "89092909876", "bucket": {"$gte": 3}}),
+            ReplaceOne({"pesel": "89092909876", "bucket": 0},
+                       {"pesel": "89092909876", "bucket": 0, "count": 3, "amounts": [1.0, 2.0, 3.0]}, upsert=True),
+            ReplaceOne({"pesel": "89092909876", "bucket": 1},
+                       {"pesel": "89092909876", "bucket": 1, "count": 3, "amounts": [4.0, 5.0, 6.0]}, upsert=True),
+            ReplaceOne({"pesel": "89092909876", "bucket": 2},
+                       {"pesel": "89092909876", "bucket": 2, "count": 1, "amounts": [7.0]}, upsert=True),
+        ]
+
+    def test_new_account_after_sync_does_not_delete_buckets(self, repo, history, account):
+        repo.save_all([])
+        repo.save_all([account])
+        assert not any(isinstance(operation, DeleteMany) for operation in self.history_operations(history))
+        assert len(self.history_operations(history)) == 3
+
+    def test_next_save_pushes_only_new_entries(self, repo, history, account):
+        repo.save_all([account])
+        history.reset_mock()
+        for amount in (8, 9, 10, 11):
+            account.incoming_transfer(amount)
+        repo.save_all([account])
+        assert self.history_operations(history) == [
+            UpdateOne({"pesel": "89092909876", "bucket": 2, "count": 1},
+                      {"$push": {"amounts": {"$each": [8.0, 9.0]}}, "$inc": {"count": 2}}),
+            ReplaceOne({"pesel": "89092909876", "bucket": 3},
+                       {"pesel": "89092909876", "bucket": 3, "count": 2, "amounts": [10.0, 11.0]}, upsert=True),
+        ]
+
+    def test_change_without_new_entries_skips_history(self, repo, collection, history, account):
+        repo.save_all([account])
+        history.reset_mock()
+        account.submit_for_loan(100)
+        assert repo.save_all([account]) == {"upserted": 1, "deleted": 0}
+        history.bulk_write.assert_not_called()
+        collection.bulk_write.assert_called()
+
+    def test_deleted_account_removes_its_buckets(self, repo, history, account):
+        repo.save_all([account])
+        history.reset_mock()
+        repo.save_all([])
+        assert self.history_operations(history) == [DeleteMany({"pesel": "89092909876"})]
+
+    def test_load_reads_only_newest_bucket(self, repo, collection, history, account):
+        document = dict(account.to_dict(include_history=False), history_count=7)
+        collection.find.return_value = [document]
+        history.find.return_value = [{"pesel": "89092909876", "bucket": 2, "amounts": [7.0]}]
+
+        loaded = repo.load_all()[0]
+        history.find.assert_called_once_with(
+            {"$or": [{"pesel": "89092909876", "bucket": 2}]},
+            projection={"_id": False, "pesel": True, "nip": True, "bucket": True, "amounts": True},
+        )
+        assert len(loaded.history) == 7
+        assert loaded.history.last(1).tolist() == [7.0]
+
+        history.find.return_value = Mock()
+        history.find.return_value.sort.return_value = [
+            {"amounts": [1.0, 2.0, 3.0]}, {"amounts": [4.0, 5.0, 6.0]}
+        ]
+        assert loaded.history.tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0]
+        history.find.assert_called_with(
+            {"pesel": "89092909876", "bucket": {"$lt": 2}}, projection={"_id": False, "amounts": True}
+        )
+
+    def test_loaded_account_saves_only_new_entries(self, repo, collection, history, account):
+        collection.find.return_value = [dict(account.to_dict(include_history=False), history_count=7)]
+        history.find.return_value = [{"pesel": "89092909876", "bucket": 2, "amounts": [7.0]}]
+        loaded = repo.load_all()[0]
+        loaded.incoming_transfer(8)
+        repo.save_all([loaded])
+        assert self.history_operations(history) == [
+            UpdateOne({"pesel": "89092909876", "bucket": 2, "count": 1},
+                      {"$push": {"amounts": {"$each": [8.0]}}, "$inc": {"count": 1}}),
+        ]
+
+    def test_statement_while_transfers_and_save(self, repo, collection, history, account):
+        """Wyciąg doczytuje starsze wpisy w trakcie przelewów i zapisu - kubełki i długość historii się zgadzają"""
+        collection.find.return_value = [dict(account.to_dict(include_history=False), history_count=7)]
+        history.find.return_value = [{"pesel": "89092909876", "bucket": 2, "amounts": [7.0]}]
+        loaded = repo.load_all()[0]
+
+        buckets = {0: [1.0, 2.0, 3.0], 1: [4.0, 5.0, 6.0], 2: [7.0]}
+        loading = threading.Event()
+
+        def older_buckets(*args):
+            loading.set()
+            return [{"amounts": list(buckets[0])}, {"amounts": list(buckets[1])}]
+
+        def bulk_write(operations, ordered):
+            for operation in operations:
+                bucket = operation._filter["bucket"]
+                if isinstance(operation, UpdateOne):
+                    assert len(buckets[bucket]) == operation._filter["count"]
+                    buckets[bucket].extend(operation._doc["$push"]["amounts"]["$each"])
+                else:
+                    buckets[bucket] = list(operation._doc["amounts"])
+
+        history.find.return_value = Mock()
+        history.find.return_value.sort.side_effect = older_buckets
+        history.bulk_write.side_effect = bulk_write
+
+        def transfer_all():
+            for amount in range(108, 508):
+                loaded.incoming_transfer(amount)
+                # len czytane bez blokady konta nie może liczyć doczytanych wpisów dwa razy
+                lengths.append(len(loaded.history))
+
+        statement = HistoryStatement(loaded.history, chunk_size=2)
+        streamed, lengths = [], []
+        stream = threading.Thread(target=lambda: streamed.extend(statement.chunks()))
+        transfers = threading.Thread(target=transfer_all)
+        with loaded.lock:
+            stream.start()
+            assert loading.wait(5)
+            # Doczytane wpisy czekają na blokadę konta - przelewy i zapis w tym czasie widzą spójną historię
+            stream.join(0.05)
+            assert stream.is_alive()
+            for amount in range(8, 108):
+                loaded.incoming_transfer(amount)
+            repo.save_all([loaded])
+            assert len(loaded.history) == 107
+        transfers.start()
+        while transfers.is_alive():
+            repo.save_all([loaded])
+        transfers.join()
+        stream.join()
+        repo.save_all([loaded])
+
+        expected = [float(amount) for amount in range(1, 508)]
+        assert len(loaded.history) == len(expected)
+        assert max(lengths) == len(expected)
+        assert loaded.history.tolist() == expected
+        assert [amount for bucket in sorted(buckets) for amount in buckets[bucket]] == expected
+        assert "".join(streamed) == "entry,amount\n" + "".join(f"{i},{i + 1}.00\n" for i in range(7))
+
+    def test_load_reads_all_company_buckets(self, repo, collection, history):
+        with patch('src.company_account.CompanyAccount._validate_nip_with_mf', return_value=True):
+            company = CompanyAccount("Test Corp", "1234567890")
+        company.balance = 3325.0
+        collection.find.return_value = [dict(company.to_dict(include_history=False), history_count=4)]
+        history.find.return_value = [
+            {"nip": "1234567890", "bucket": 1, "amounts": [-1775.0]},
+            {"nip": "1234567890", "bucket": 0, "amounts": [5000.0, 100.0, 200.0]},
+        ]
+        loaded = repo.load_all()[0]
+        assert history.find.call_args[0][0] == {"$or": [{"nip": {"$in": ["1234567890"]}}]}
+        assert loaded.history == [5000.0, 100.0, 200.0, -1775.0]
+        assert loaded.take_loan(100) is True
+
+    def test_legacy_document_with_inline_history(self, repo, collection, history, account):
+        collection.find.return_value = [account.to_dict()]
+        loaded = repo.load_all()[0]
+        history.find.assert_not_called()
+        assert loaded.history == account.history
+
+        loaded.incoming_transfer(8)
+        repo.save_all([loaded])
+        assert len(self.history_operations(history)) == 3
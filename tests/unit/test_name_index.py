@@ -0,0 +1,65 @@
+from src.name_index import NameIndex
+import pytest
+
+
+class TestNameIndex:
+    """Testy indeksu trigramowego po imieniu/nazwisku"""
+
+    @pytest.fixture
+    def index(self):
+        index = NameIndex()
+        index.add("1", "Kowalski")
+        index.add("2", "Kowalczyk")
+        index.add("3", "Nowak")
+        return index
+
+    @pytest.mark.parametrize("prefix,expected", [
+        ("k", {"1", "2"}),
+        ("Kowal", {"1", "2"}),
+        ("KOWALS", {"1"}),
+        ("nowak", {"3"}),
+        ("owak", set()),
+        ("Kowalskiego", set()),
+        ("", {"1", "2", "3"}),
+    ])
+    def test_search_prefix(self, index, prefix, expected):
+        assert set(index.search_prefix(prefix)) == expected
+
+    @pytest.mark.parametrize("fragment,expected", [
+        ("owa", {"1", "2", "3"}),
+        ("ALC", {"2"}),
+        ("ski", {"1"}),
+        ("xyz", set()),
+    ])
+    def test_search_substring(self, index, fragment, expected):
+        assert set(index.search_substring(fragment)) == expected
+
+    def test_search_substring_too_short(self, index):
+        with pytest.raises(ValueError):
+            list(index.search_substring("ko"))
+
+    def test_remove(self, index):
+        index.remove("1")
+        assert set(index.search_prefix("kowal")) == {"2"}
+        assert set(index.search_substring("ski")) == set()
+
+    def test_remove_unknown_key_does_nothing(self, index):
+        index.remove("999")
+        assert set(index.search_prefix("k")) == {"1", "2"}
+
+    def test_add_existing_key_replaces_text(self, index):
+        index.add("3", "Zielińska")
+        assert set(index.search_prefix("nowak")) == set()
+        assert set(index.search_prefix("zieli")) == {"3"}
+
+    def test_results_are_sorted_after_changes(self, index):
+        """Klucze wychodzą rosnąco - także po zmianach indeksu (pamięć podręczna posortowanych zbiorów)"""
+        assert list(index.search_prefix("kowal")) == ["1", "2"]
+        index.add("0", "Kowalewski")
+        index.remove("2")
+        assert list(index.search_prefix("kowal")) == ["0", "1"]
+        assert list(index.search_substring("owa")) == ["0", "1", "3"]
+
+    def test_clear(self, index):
+        index.clear()
+        assert set(index.search_prefix("")) == set()
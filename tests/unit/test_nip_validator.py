@@ -0,0 +1,248 @@
+from unittest.mock import patch
+from src.company_account import CompanyAccount
+from src.circuit_breaker import CircuitBreaker
+from src.metrics import metrics
+from src.nip_validator import NipValidator
+import time
+import pytest
+
+
+class TestNipValidator:
+    """Testy walidacji NIP z cache (TTL, LRU) na lokalnym serwerze MF"""
+
+    @pytest.fixture
+    def server(self, mf_server):
+        return mf_server({"1234567890": "Czynny", "1111111111": "Zwolniony", "2222222222": "error"})
+
+    @pytest.fixture
+    def validator(self, server):
+        validator = NipValidator(base_url=server.url, ttl=60, negative_ttl=5, max_size=3)
+        yield validator
+        validator.close()
+
+    @pytest.mark.parametrize("nip,expected", [
+        ("1234567890", True),
+        ("1111111111", False),
+        ("9999999999", False),
+        ("2222222222", False),
+    ])
+    def test_status(self, validator, nip, expected):
+        assert validator.is_active(nip, "2026-01-01") is expected
+
+    def test_cached_result(self, validator, server):
+        assert validator.is_active("1234567890", "2026-01-01")
+        assert validator.is_active("1234567890", "2026-01-01")
+        assert server.requests == [("1234567890", "2026-01-01")]
+        assert validator.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+    def test_date_is_part_of_key(self, validator, server):
+        validator.is_active("1234567890", "2026-01-01")
+        validator.is_active("1234567890", "2026-01-02")
+        assert len(server.requests) == 2
+
+    def test_errors_are_not_cached(self, validator, server):
+        validator.is_active("2222222222", "2026-01-01")
+        validator.is_active("2222222222", "2026-01-01")
+        assert len(server.requests) == 2
+        assert validator.stats()["size"] == 0
+
+    def test_negative_result_expires_sooner(self, validator, server):
+        with patch("src.nip_validator.time.monotonic", return_value=1000.0):
+            validator.is_active("1234567890", "2026-01-01")
+            validator.is_active("1111111111", "2026-01-01")
+        with patch("src.nip_validator.time.monotonic", return_value=1010.0):
+            validator.is_active("1234567890", "2026-01-01")
+            validator.is_active("1111111111", "2026-01-01")
+        assert server.requests.count(("1234567890", "2026-01-01")) == 1
+        assert server.requests.count(("1111111111", "2026-01-01")) == 2
+
+    def test_lru_eviction(self, validator, server):
+        for nip in ["1234567890", "1111111111", "9999999999"]:
+            validator.is_active(nip, "2026-01-01")
+        validator.is_active("1234567890", "2026-01-01")  # najświeższy - zostaje
+        validator.is_active("3333333333", "2026-01-01")  # wypycha 1111111111
+        validator.is_active("1234567890", "2026-01-01")
+        validator.is_active("1111111111", "2026-01-01")
+        assert server.requests.count(("1234567890", "2026-01-01")) == 1
+        assert server.requests.count(("1111111111", "2026-01-01")) == 2
+        assert validator.stats()["evictions"] == 2
+
+    def test_connection_reused(self, validator, server):
+        for day in range(1, 6):
+            validator.is_active("1234567890", f"2026-01-0{day}")
+        assert len(server.requests) == 5
+        assert len(server.connections) == 1
+
+    def test_request_metrics(self, validator):
+        calls_before = metrics.count("mf_request_duration_seconds", ("nip", "200"))
+        validator.is_active("1234567890", "2026-01-01")
+        validator.is_active("1234567890", "2026-01-01")
+        assert metrics.count("mf_request_duration_seconds", ("nip", "200")) == calls_before + 1
+
+    def test_clear(self, validator):
+        validator.is_active("1234567890", "2026-01-01")
+        validator.clear()
+        assert validator.stats() == {"hits": 0, "misses": 0, "evictions": 0, "size": 0}
+
+
+class TestNipValidatorBulk:
+    """Testy zbiorczej walidacji NIP (/api/search/nips/) i zakładania wielu kont firmowych"""
+
+    ACTIVE = [f"{i:010d}" for i in range(1_000_000_000, 1_000_000_070)]
+
+    @pytest.fixture
+    def statuses(self):
+        statuses = dict.fromkeys(self.ACTIVE, "Czynny")
+        statuses["1111111111"] = "Zwolniony"
+        return statuses
+
+    @pytest.fixture
+    def validator(self):
+        validators = []
+
+        def create(server, **kwargs):
+            validators.append(NipValidator(base_url=server.url, **kwargs))
+            return validators[-1]
+
+        yield create
+        for validator in validators:
+            validator.close()
+
+    def test_batches_respect_limit(self, mf_server, statuses, validator):
+        server = mf_server(statuses)
+        results = validator(server).are_active(self.ACTIVE + ["1111111111", "9999999999"], "2026-01-01")
+        assert all(results[nip] for nip in self.ACTIVE)
+        assert not results["1111111111"] and not results["9999999999"]
+        sizes = sorted(len(nips.split(",")) for nips, _ in server.requests)
+        assert sizes == [12, 30, 30]
+
+    def test_cached_nips_are_not_sent(self, mf_server, statuses, validator):
+        server = mf_server(statuses)
+        mf = validator(server)
+        mf.is_active(self.ACTIVE[0], "2026-01-01")
+        mf.are_active(self.ACTIVE[:3] + self.ACTIVE[:1], "2026-01-01")
+        assert server.requests[1] == (",".join(self.ACTIVE[1:3]), "2026-01-01")
+        mf.are_active(self.ACTIVE[:3], "2026-01-01")
+        assert len(server.requests) == 2
+        assert mf.stats()["size"] == 3
+
+    def test_failed_batch_is_not_cached(self, mf_server, statuses, validator):
+        statuses["2222222222"] = "error"
+        server = mf_server(statuses)
+        mf = validator(server)
+        assert mf.are_active(["2222222222", self.ACTIVE[0]], "2026-01-01") == {
+            "2222222222": False, self.ACTIVE[0]: False
+        }
+        assert mf.stats()["size"] == 0
+
+    def test_batches_are_sent_concurrently(self, mf_server, statuses, validator):
+        latency = 0.2
+        server = mf_server(statuses, latency=latency)
+        mf = validator(server, bulk_workers=3)
+        start_time = time.perf_counter()
+        mf.are_active(self.ACTIVE, "2026-01-01")
+        elapsed = time.perf_counter() - start_time
+        assert len(server.requests) == 3
+        assert elapsed < 2 * latency
+
+    def test_create_many(self, mf_server, statuses, validator):
+        server = mf_server(statuses, latency=0.05)
+        with patch("src.company_account.mf_validator", validator(server)):
+            accounts = CompanyAccount.create_many(
+                [(f"Firma {nip}", nip) for nip in self.ACTIVE] + [("Zwolniona", "1111111111"), ("Krótki", "123")]
+            )
+        assert [account.nip for account in accounts[:70]] == self.ACTIVE
+        assert accounts[0].company_name == f"Firma {self.ACTIVE[0]}"
+        assert accounts[0].balance == 0.0
+        assert accounts[0].history.count(CompanyAccount.ZUS_PAYMENT) == 0
+        assert accounts[70] is None
+        assert accounts[71].nip == "Invalid"
+        assert len(server.requests) == 3
+
+
+class TestNipValidatorResilience:
+    """Bezpiecznik i budżet czasu zapytań na serwerze MF z opóźnieniami i błędami"""
+
+    @pytest.fixture
+    def server(self, mf_server):
+        return mf_server({"1234567890": "Czynny", "2222222222": "error", "3333333333": "Czynny",
+                          "4444444444": "invalid"})
+
+    @pytest.fixture
+    def validator(self, server):
+        breaker = CircuitBreaker(failure_rate_threshold=0.5, window_size=4, min_calls=4, open_seconds=0.2)
+        validator = NipValidator(base_url=server.url, timeout=1, breaker=breaker)
+        yield validator
+        validator.close()
+
+    def test_errors_open_breaker(self, validator, server):
+        for day in range(1, 5):
+            assert not validator.is_active("2222222222", f"2026-01-0{day}")
+        assert validator.breaker.state == CircuitBreaker.OPEN
+
+        # Otwarty bezpiecznik - zapytanie nie dociera do serwera, także dla poprawnego NIP
+        assert not validator.is_active("1234567890", "2026-01-01")
+        assert len(server.requests) == 4
+        stats = validator.breaker_stats()
+        assert stats["state"] == CircuitBreaker.OPEN
+        assert stats["failures"] == 4
+        assert stats["rejected"] == 1
+
+    def test_half_open_probe_closes_breaker(self, validator, server):
+        for day in range(1, 5):
+            validator.is_active("2222222222", f"2026-01-0{day}")
+        time.sleep(0.25)
+        assert validator.is_active("1234567890", "2026-01-01")
+        assert validator.breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.parametrize("base_url", ["not-a-url", "ftp://127.0.0.1", "http://"])
+    def test_invalid_url_fails_half_open_probe(self, validator, server, base_url):
+        """Błąd budowy zapytania (podklasy ValueError w requests) zamyka próbę bezpiecznika jako porażkę"""
+        for day in range(1, 5):
+            validator.is_active("2222222222", f"2026-01-0{day}")
+        time.sleep(0.25)
+        validator.base_url = base_url
+        assert not validator.is_active("1234567890", "2026-01-01")
+        assert validator.breaker.state == CircuitBreaker.OPEN
+
+        validator.base_url = server.url
+        time.sleep(0.25)
+        assert validator.is_active("1234567890", "2026-01-02")
+        assert validator.breaker.state == CircuitBreaker.CLOSED
+
+    def test_invalid_json_counts_as_response(self, validator):
+        """Niepoprawny JSON w odpowiedzi 200 to odpowiedź usługi - sukces dla bezpiecznika, z metryką"""
+        before = metrics.count("mf_request_duration_seconds", ("nip", "200"))
+        for day in range(1, 5):
+            assert not validator.is_active("4444444444", f"2026-01-0{day}")
+        assert validator.breaker.state == CircuitBreaker.CLOSED
+        assert validator.breaker_stats()["failures"] == 0
+        assert metrics.count("mf_request_duration_seconds", ("nip", "200")) == before + 4
+
+    def test_timeouts_count_as_failures(self, validator, server):
+        server.latency = 0.3
+        validator.timeout = 0.05
+        for day in range(1, 5):
+            start_time = time.perf_counter()
+            assert not validator.is_active("1234567890", f"2026-01-0{day}")
+            assert time.perf_counter() - start_time < 0.25
+        assert validator.breaker.state == CircuitBreaker.OPEN
+
+    def test_deadline_limits_request_time(self, validator, server):
+        server.latency = 0.5
+        start_time = time.perf_counter()
+        with validator.deadline(0.1):
+            assert not validator.is_active("1234567890", "2026-01-01")
+            # Budżet wyczerpany - kolejne zapytania w tym żądaniu nie są wysyłane
+            assert not validator.is_active("3333333333", "2026-01-01")
+            assert validator.are_active(["1234567890", "3333333333"], "2026-01-01") == {
+                "1234567890": False, "3333333333": False
+            }
+        assert time.perf_counter() - start_time < 0.4
+        assert len(server.requests) == 1
+        assert validator.breaker_stats()["deadline_exceeded"] == 2
+
+    def test_deadline_leaves_fast_requests(self, validator, server):
+        with validator.deadline(1.0):
+            assert validator.is_active("1234567890", "2026-01-01")
+        assert validator.breaker_stats()["deadline_exceeded"] == 0
@@ -0,0 +1,138 @@
+from src.request_profiler import RequestProfiler
+from unittest.mock import patch
+from werkzeug.test import EnvironBuilder
+import time
+import pytest
+
+
+def slow_inner():
+    time.sleep(0.002)
+
+
+def slow_outer():
+    slow_inner()
+
+
+def work_app(environ, start_response):
+    """Aplikacja WSGI z rozpoznawalnym stosem wywołań: slow_outer -> slow_inner -> sleep"""
+    slow_outer()
+    start_response("201 CREATED", [])
+    return [b"ok"]
+
+
+def streaming_app(environ, start_response):
+    start_response("200 OK", [])
+
+    def body():
+        for _ in range(2):
+            slow_outer()
+            yield b"chunk"
+    return body()
+
+
+class TestRequestProfiler:
+    """Testy profilowania żądań na żądanie (nagłówek z tokenem albo próbkowanie)"""
+
+    def call(self, wsgi_app, headers=None):
+        environ = EnvironBuilder(path="/api/accounts", method="POST", headers=headers or {}).get_environ()
+        body = wsgi_app(environ, lambda status, headers, exc_info=None: None)
+        chunks = list(body)
+        if hasattr(body, "close"):
+            body.close()
+        return chunks
+
+    def test_disabled_profiler_does_not_wrap(self):
+        profiler = RequestProfiler()
+        assert not profiler.enabled
+        assert profiler.wrap(work_app) is work_app
+
+    def test_profile_with_admin_header(self):
+        profiler = RequestProfiler(token="secret")
+        app = profiler.wrap(work_app)
+        assert self.call(app, {"X-Profile": "secret"}) == [b"ok"]
+        profile, = profiler.profiles()
+        assert (profile["method"], profile["path"], profile["status"]) == ("POST", "/api/accounts", "201")
+        assert profile["duration_ms"] >= 2
+        assert "stats" not in profile
+
+    @pytest.mark.parametrize("headers", [{}, {"X-Profile": "wrong"}])
+    def test_no_profile_without_valid_header(self, headers):
+        profiler = RequestProfiler(token="secret")
+        self.call(profiler.wrap(work_app), headers)
+        assert profiler.profiles() == []
+
+    def test_sampling(self):
+        profiler = RequestProfiler(token="secret", sample_rate=0.5)
+        app = profiler.wrap(work_app)
+        with patch("src.request_profiler.random.random", side_effect=[0.4, 0.6, 0.1]):
+            for _ in range(3):
+                self.call(app)
+        assert len(profiler.profiles()) == 2
+
+    def test_sampling_without_token_is_disabled(self):
+        """Profili z próbkowania bez tokenu nie dałoby się odczytać - próbkowanie jest wyłączane"""
+        with patch("src.request_profiler.log") as log:
+            profiler = RequestProfiler(sample_rate=0.5)
+        log.warning.assert_called_once()
+        assert profiler.sample_rate == 0
+        assert not profiler.enabled
+        assert profiler.wrap(work_app) is work_app
+
+    def test_keeps_last_profiles_slowest_first(self):
+        profiler = RequestProfiler(token="secret", keep=3)
+        app = profiler.wrap(work_app)
+        for _ in range(5):
+            self.call(app, {"X-Profile": "secret"})
+        profiles = profiler.profiles()
+        assert sorted(profile["id"] for profile in profiles) == [3, 4, 5]
+        assert [profile["duration_ms"] for profile in profiles] == sorted(
+            (profile["duration_ms"] for profile in profiles), reverse=True)
+
+    def test_pstats_text(self):
+        profiler = RequestProfiler(token="secret")
+        self.call(profiler.wrap(work_app), {"X-Profile": "secret"})
+        profile_id = profiler.profiles()[0]["id"]
+        text = profiler.pstats_text(profile_id, sort="tottime", limit=5)
+        assert "function calls" in text
+        assert "slow_inner" in profiler.pstats_text(profile_id)
+        assert profiler.pstats_text(profile_id + 1) is None
+        with pytest.raises(ValueError):
+            profiler.pstats_text(profile_id, sort="name")
+
+    def test_collapsed_stacks(self):
+        profiler = RequestProfiler(token="secret")
+        self.call(profiler.wrap(work_app), {"X-Profile": "secret"})
+        text = profiler.collapsed_text(profiler.profiles()[0]["id"])
+        stacks = dict(line.rsplit(" ", 1) for line in text.splitlines())
+        sleep_stack, = [stack for stack in stacks if stack.endswith("<built-in method time.sleep>")]
+        frames = sleep_stack.split(";")
+        assert frames[-3].startswith("slow_outer (test_request_profiler.py:")
+        assert frames[-2].startswith("slow_inner (")
+        assert int(stacks[sleep_stack]) >= 1500
+
+    def test_streaming_body_is_profiled(self):
+        profiler = RequestProfiler(token="secret")
+        app = profiler.wrap(streaming_app)
+        assert self.call(app, {"X-Profile": "secret"}) == [b"chunk", b"chunk"]
+        profile, = profiler.profiles()
+        assert profile["duration_ms"] >= 4
+        assert "slow_inner" in profiler.pstats_text(profile["id"])
+
+    def test_failed_request_is_stored(self):
+        def failing_app(environ, start_response):
+            raise RuntimeError("broken")
+
+        profiler = RequestProfiler(token="secret")
+        with pytest.raises(RuntimeError):
+            self.call(profiler.wrap(failing_app), {"X-Profile": "secret"})
+        assert profiler.profiles()[0]["status"] == "500"
+
+    def test_authorized(self):
+        assert RequestProfiler(token="secret").authorized("secret")
+        assert not RequestProfiler(token="secret").authorized(None)
+        assert not RequestProfiler(sample_rate=0.1).authorized("")
+
+    @pytest.mark.parametrize("kwargs", [{"sample_rate": 1.5}, {"sample_rate": -0.1}, {"keep": 0}])
+    def test_invalid_configuration(self, kwargs):
+        with pytest.raises(ValueError):
+            RequestProfiler(**kwargs)
@@ -0,0 +1,129 @@
+from src.structured_logging import StructuredLogging
+from unittest.mock import patch
+import io
+import json
+import logging
+import threading
+import pytest
+
+
+class BlockingStream(io.StringIO):
+    """Strumień, którego zapis czeka na release - symuluje wolne stdout"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def write(self, text):
+        self.release.wait(5)
+        return super().write(text)
+
+
+class TestStructuredLogging:
+    """Testy logów JSON zapisywanych w tle z poziomem i próbkowaniem"""
+
+    @pytest.fixture
+    def logs_for(self):
+        started = []
+
+        def start(**kwargs):
+            kwargs.setdefault("stream", io.StringIO())
+            started.append(StructuredLogging(logger_name="test.logs", **kwargs))
+            started[-1].start()
+            return started[-1]
+
+        yield start
+        for logs in started:
+            if isinstance(logs.stream, BlockingStream):
+                logs.stream.release.set()
+            logs.stop()
+
+    def entries(self, logs):
+        logs.stop()
+        return [json.loads(line) for line in logs.stream.getvalue().splitlines()]
+
+    def test_json_lines_with_fields(self, logs_for):
+        logs = logs_for()
+        logging.getLogger("test.logs.api").info("Request %s", "received", extra={"route": "GET /x", "pesel": "123"})
+        entry, = self.entries(logs)
+        assert entry["level"] == "INFO"
+        assert entry["logger"] == "test.logs.api"
+        assert entry["message"] == "Request received"
+        assert (entry["route"], entry["pesel"]) == ("GET /x", "123")
+        assert entry["ts"].endswith("Z")
+
+    def test_exception(self, logs_for):
+        logs = logs_for()
+        try:
+            raise ValueError("broken")
+        except ValueError:
+            logging.getLogger("test.logs").exception("Failed")
+        entry, = self.entries(logs)
+        assert "ValueError: broken" in entry["exception"]
+
+    @pytest.mark.parametrize("level,expected", [("DEBUG", 3), ("WARNING", 1), ("OFF", 0)])
+    def test_level(self, logs_for, level, expected):
+        logs = logs_for(level=level)
+        log = logging.getLogger("test.logs")
+        log.debug("debug")
+        log.info("info")
+        log.warning("warning")
+        assert len(self.entries(logs)) == expected
+
+    def test_sampling(self, logs_for):
+        logs = logs_for(sampling={"GET /x": 0.25, "GET /never": 0})
+        with patch("src.structured_logging.random.random", side_effect=[0.1, 0.5, 0.2, 0.9]):
+            assert [logs.sample("GET /x") for _ in range(4)] == [True, False, True, False]
+        assert not logs.sample("GET /never")
+        assert logs.sample("GET /other")
+
+    def test_full_queue_drops_instead_of_blocking(self, logs_for):
+        logs = logs_for(stream=BlockingStream(), queue_size=2)
+        log = logging.getLogger("test.logs")
+        for i in range(10):
+            log.info("message %d", i)
+        # Jeden rekord zapisuje wątek w tle, dwa czekają w kolejce
+        assert 7 <= logs.dropped <= 8
+        logs.stream.release.set()
+        logs.stop()
+        assert len(logs.stream.getvalue().splitlines()) == 10 - logs.dropped
+
+    def test_stop_detaches_handler(self, logs_for):
+        logs = logs_for()
+        logs.stop()
+        assert logs.logger.handlers == []
+        assert logs.logger.propagate
+
+    def test_stop_restores_logging_flags(self, logs_for):
+        """Globalne flagi logging są wyłączone tylko od start pierwszej do stop ostatniej instancji"""
+        # Stan klasy podmieniony - w procesie testów może już działać instancja z app.api
+        with patch.object(StructuredLogging, "_started", 0), patch.object(StructuredLogging, "_saved_flags", None), \
+                patch.object(logging, "_srcfile", "caller.py"), \
+                patch.object(logging, "logProcesses", True), patch.object(logging, "logMultiprocessing", True):
+            first, second = logs_for(), logs_for()
+            assert (logging._srcfile, logging.logProcesses, logging.logMultiprocessing) == (None, False, False)
+            first.stop()
+            first.stop()
+            assert logging._srcfile is None
+            second.stop()
+            assert (logging._srcfile, logging.logProcesses, logging.logMultiprocessing) == ("caller.py", True, True)
+
+    @pytest.mark.parametrize("spec,expected", [
+        ("", {}),
+        ("GET /api/accounts=0.01, GET /api/accounts/count=1", {"GET /api/accounts": 0.01, "GET /api/accounts/count": 1.0}),
+    ])
+    def test_parse_sampling(self, spec, expected):
+        assert StructuredLogging.parse_sampling(spec) == expected
+
+    @pytest.mark.parametrize("kwargs", [
+        {"level": "LOUD"},
+        {"sampling": {"GET /x": 2}},
+    ])
+    def test_invalid_configuration(self, kwargs):
+        with pytest.raises(ValueError):
+            StructuredLogging(**kwargs)
+
+    @pytest.mark.parametrize("spec", ["GET /x", "=0.5", "GET /x=often"])
+    def test_invalid_sampling_spec(self, spec):
+        with pytest.raises(ValueError):
+            StructuredLogging.parse_sampling(spec)
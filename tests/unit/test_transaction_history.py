@@ -0,0 +1,140 @@
+from src.transaction_history import TransactionHistory
+from src.personal_account import PersonalAccount
+import threading
+import pytest
+from unittest.mock import Mock
+
+
+class TestTransactionHistory:
+    """Testy zwartej historii transakcji (array('d'))"""
+
+    @pytest.fixture
+    def history(self):
+        return TransactionHistory([100, -50, 25.5, -1.0])
+
+    def test_behaves_like_list(self, history):
+        assert len(history) == 4
+        assert list(history) == [100.0, -50.0, 25.5, -1.0]
+        assert sum(history) == 74.5
+        assert history[0] == 100.0
+        assert history[-1] == -1.0
+        assert history[-3:] == [-50.0, 25.5, -1.0]
+        assert history.count(-50) == 1
+
+    @pytest.mark.parametrize("amount,expected", [(-50, True), (-50.0, True), (25.5, True), (-1775, False)])
+    def test_contains(self, history, amount, expected):
+        assert (amount in history) is expected
+
+    def test_append_and_extend(self):
+        history = TransactionHistory()
+        history.append(10)
+        history.extend([20.0, -5])
+        assert history == [10, 20, -5]
+
+    def test_equality(self, history):
+        assert history == [100, -50, 25.5, -1.0]
+        assert history == TransactionHistory([100.0, -50.0, 25.5, -1.0])
+        assert history != [100, -50]
+        assert history != "[100, -50, 25.5, -1.0]"
+
+    def test_repr_keeps_ints_without_fraction(self, history):
+        assert repr(history) == "[100, -50, 25.5, -1.0]"
+        assert repr(TransactionHistory()) == "[]"
+
+    def test_tolist_returns_floats(self, history):
+        assert history.tolist() == [100.0, -50.0, 25.5, -1.0]
+        assert all(isinstance(amount, float) for amount in history.tolist())
+
+    def test_account_history_round_trip(self):
+        account = PersonalAccount("John", "Doe", "89092909876")
+        account.incoming_transfer(100)
+        account.outgoing_transfer(40.5)
+
+        restored = PersonalAccount.from_dict(account.to_dict())
+        assert isinstance(restored.history, TransactionHistory)
+        assert restored.history == [100.0, -40.5]
+        assert account.to_dict()["history"] == [100.0, -40.5]
+
+    @pytest.mark.parametrize("start,stop,size,expected", [
+        (0, None, 3, [[100.0, -50.0, 25.5], [-1.0]]),
+        (1, 3, 10, [[-50.0, 25.5]]),
+        (-2, None, 1, [[25.5], [-1.0]]),
+        (3, 1, 2, []),
+    ])
+    def test_chunks(self, history, start, stop, size, expected):
+        assert [chunk.tolist() for chunk in history.chunks(start, stop, size)] == expected
+
+    def test_from_floats(self, history):
+        restored = TransactionHistory.from_floats(history.tolist(), tracked_amounts=(-50.0,))
+        assert restored == history
+        assert restored.count(-50) == 1
+        restored.append(-50)
+        assert restored.count(-50) == 2
+        assert repr(restored) == "[100.0, -50.0, 25.5, -1.0, -50]"
+
+
+class TestTransactionHistoryLazyOlder:
+    """Testy historii z niewczytanymi starszymi wpisami (set_older)"""
+
+    @pytest.fixture
+    def loader(self):
+        return Mock(return_value=[1.0, 2.0, 3.0])
+
+    @pytest.fixture
+    def history(self, loader):
+        history = TransactionHistory.from_floats([4.0, 5.0])
+        history.set_older(3, loader)
+        return history
+
+    def test_len_append_and_recent_entries_do_not_load(self, history, loader):
+        history.append(6)
+        assert len(history) == 6
+        assert history.last(3).tolist() == [4.0, 5.0, 6.0]
+        assert history.since(4) == [5.0, 6.0]
+        loader.assert_not_called()
+
+    @pytest.mark.parametrize("operation,expected", [
+        (lambda history: history.tolist(), [1.0, 2.0, 3.0, 4.0, 5.0]),
+        (lambda history: list(history), [1.0, 2.0, 3.0, 4.0, 5.0]),
+        (lambda history: history.last(4).tolist(), [2.0, 3.0, 4.0, 5.0]),
+        (lambda history: history.since(1), [2.0, 3.0, 4.0, 5.0]),
+        (lambda history: history.count(1.0), 1),
+        (lambda history: 2.0 in history, True),
+        (lambda history: history[0], 1.0),
+        (lambda history: history == [1.0, 2.0, 3.0, 4.0, 5.0], True),
+        (lambda history: repr(history), "[1.0, 2.0, 3.0, 4.0, 5.0]"),
+    ])
+    def test_full_history_operations_load_older_once(self, history, loader, operation, expected):
+        assert operation(history) == expected
+        assert operation(history) == expected
+        loader.assert_called_once()
+        assert len(history) == 5
+
+    def test_chunks_load_older_only_when_needed(self, history, loader):
+        assert [chunk.tolist() for chunk in history.chunks(-2, size=1)] == [[4.0], [5.0]]
+        loader.assert_not_called()
+        assert [chunk.tolist() for chunk in history.chunks(1, size=2)] == [[2.0, 3.0], [4.0, 5.0]]
+        loader.assert_called_once()
+
+    def test_load_publishes_under_given_lock(self, loader):
+        """Doczytane wpisy są łączone z dopisanymi pod blokadą konta - nic nie ginie i nie liczy się dwa razy"""
+        lock = threading.RLock()
+        history = TransactionHistory.from_floats([4.0, 5.0])
+        history.set_older(3, loader, lock)
+        with lock:
+            loading = threading.Thread(target=history.tolist)
+            loading.start()
+            loading.join(0.05)
+            assert loading.is_alive()
+            history.append(6.0)
+            assert len(history) == 6
+            assert history.since(4) == [5.0, 6.0]
+        loading.join()
+        assert history.tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+        assert len(history) == 6
+        loader.assert_called_once()
+
+    def test_tracked_history_must_be_loaded_in_full(self, loader):
+        history = TransactionHistory(tracked_amounts=(-1775,))
+        with pytest.raises(ValueError):
+            history.set_older(3, loader)
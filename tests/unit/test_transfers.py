@@ -1,4 +1,5 @@
 import pytest
+import threading
 from unittest.mock import patch, MagicMock
 from src.personal_account import PersonalAccount
 from src.company_account import CompanyAccount
@@ -7,7 +8,7 @@ from src.company_account import CompanyAccount
 @pytest.fixture
 def mock_mf_api():
     """Fixture: Mock API Ministerstwa Finansów"""
-    with patch('src.company_account.requests.get') as mock_get:
+    with patch('src.nip_validator.requests.Session.get') as mock_get:
         mock_response = MagicMock()
         mock_response.status_code = 200
         mock_response.json.return_value = {
@@ -53,3 +54,50 @@ class TestTransfers:
         account.balance = 100.0
         account.incoming_transfer(20.0)
         assert account.balance == 120.0
+
+
+class TestTransferBetweenAccounts:
+    """Testy przelewu konto -> konto (Account.transfer_to)"""
+
+    @pytest.fixture
+    def source(self):
+        account = PersonalAccount("Alice", "Johnson", "12345678901")
+        account.incoming_transfer(100.0)
+        return account
+
+    @pytest.fixture
+    def target(self):
+        return PersonalAccount("Bob", "Smith", "98765432109")
+
+    def test_transfer_to_moves_money_and_records_history(self, source, target):
+        assert source.transfer_to(target, 40.0) is True
+        assert source.balance == 60.0
+        assert target.balance == 40.0
+        assert source.history == [100.0, -40.0]
+        assert target.history == [40.0]
+
+    @pytest.mark.parametrize("amount", [0, -10.0, 100.01])
+    def test_transfer_to_rejected_changes_nothing(self, source, target, amount):
+        assert source.transfer_to(target, amount) is False
+        assert source.balance == 100.0
+        assert target.balance == 0.0
+        assert target.history == []
+
+    def test_transfer_to_same_account_rejected(self, source):
+        assert source.transfer_to(source, 10.0) is False
+        assert source.balance == 100.0
+
+    def test_opposite_concurrent_transfers_do_not_deadlock(self, source, target):
+        """Przelewy A->B i B->A równolegle - blokady w stałej kolejności, brak zakleszczenia"""
+        target.incoming_transfer(100.0)
+        threads = [
+            threading.Thread(target=lambda: [source.transfer_to(target, 1.0) for _ in range(2000)]),
+            threading.Thread(target=lambda: [target.transfer_to(source, 1.0) for _ in range(2000)]),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+            assert not thread.is_alive()
+        assert source.balance + target.balance == 200.0
+        assert sum(source.history) + sum(target.history) == 200.0